@@ -0,0 +1,71 @@
+# benchmarks/bench_codec.py
+# ==========================================
+# SSE 事件解码基准：json / proto-json / proto 三种编解码器
+# 指标：每秒解码事件数、每事件峰值分配、解码 + 读取全部角色血量的耗时
+# 用法: python -m benchmarks.bench_codec [--json out.json]
+# ==========================================
+import argparse
+import json
+import tracemalloc
+
+from google.protobuf.json_format import MessageToDict
+
+from benchmarks.common import build_sample_state, emit, time_per_call
+from core import protos
+from core.codec import BinaryProtoCodec, get_codec
+
+mutation_pb2, notification_pb2 = protos.load("mutation_pb2", "notification_pb2")
+
+
+def build_payloads():
+    """ 同一条 Notification 的 JSON 文本与二进制信封 """
+    message = notification_pb2.Notification(state=build_sample_state())
+    for k in range(6):
+        message.mutation.add().damage.CopyFrom(
+            mutation_pb2.DamageEM(value=k, target_id=-1, old_health=10, new_health=10 - k))
+    as_json = json.dumps({"type": "notification", "data": MessageToDict(message)}, separators=(",", ":"))
+    as_binary = BinaryProtoCodec.encode("notification", message)
+    return {"json": as_json, "proto-json": as_json, "proto": as_binary}
+
+
+def peak_alloc(fn):
+    """ 单次调用期间的峰值新增分配 (字节) """
+    fn()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    result = fn()
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    del result
+    return peak
+
+
+def health_via_dict(event):
+    return sum(c.get("health", 0) for p in event.data["state"]["player"] for c in p["character"])
+
+
+def health_via_message(event):
+    return sum(c.health for p in event.notification.state.player for c in p.character)
+
+
+def run(number=500):
+    payloads = build_payloads()
+    results = {}
+    for name, raw in payloads.items():
+        codec = get_codec(name)
+        access = health_via_dict if name == "json" else health_via_message
+        decode_s = time_per_call(lambda: codec.decode(raw), number)
+        results[f"{name}_payload_bytes"] = len(raw)
+        results[f"{name}_events_per_s"] = 1.0 / decode_s
+        results[f"{name}_peak_alloc_bytes"] = peak_alloc(lambda: codec.decode(raw))
+        results[f"{name}_decode_and_read_us"] = time_per_call(lambda: access(codec.decode(raw)), number) * 1e6
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SSE 解码基准")
+    parser.add_argument("--number", type=int, default=500)
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+    emit("codec", run(args.number), args.json_path)
@@ -0,0 +1,97 @@
+# benchmarks/bench_dice.py
+# ==========================================
+# 骰子支付求解器基准：朴素组合枚举 vs core.dice (冷缓存 / 热缓存)
+# 场景：8 颗骰子，对一张含 6 个候选 (元素 / 同色 / 任意骰混合费用) 的行动表逐个求支付
+# 用法: python -m benchmarks.bench_dice [--json out.json]
+# ==========================================
+import argparse
+from itertools import combinations
+
+from benchmarks.common import emit, time_per_call
+from core.actions import ActionTable
+from core.dice import ALIGNED, ELEMENTS, OMNI, VOID, dice_vector, normalize_cost, solve_payment, solve_table
+
+POOL = [1, 1, 3, 3, 5, 6, 8, 8]
+# DiceRequirementType: 1~7 元素, 8 同色, 0 任意
+COSTS = [
+    ((3, 3),),
+    ((1, 1), (0, 2)),
+    ((8, 3),),
+    ((8, 2), (0, 1)),
+    ((0, 3),),
+    ((5, 1), (0, 2)),
+]
+WEIGHTS = (0, 1, 1, 1, 1, 1, 1, 1, 3)
+
+
+def build_table():
+    actions = [{"useSkill": {"skillDefinitionId": 11011 + i},
+                "requiredCost": [{"type": t, "count": n} for t, n in cost]} for i, cost in enumerate(COSTS)]
+    return ActionTable.from_dict({"action": actions})
+
+
+def naive_pays(chosen, cost):
+    """ 判断一组骰子是否恰好付清费用 """
+    left = list(chosen)
+    aligned = void = 0
+    for req_type, count in cost:
+        if req_type in ELEMENTS:
+            for _ in range(count):
+                if req_type in left:
+                    left.remove(req_type)
+                elif OMNI in left:
+                    left.remove(OMNI)
+                else:
+                    return False
+        elif req_type == ALIGNED:
+            aligned = count
+        elif req_type == VOID:
+            void = count
+    if aligned:
+        for element in ELEMENTS:
+            if sum(1 for d in left if d in (element, OMNI)) >= aligned:
+                break
+        else:
+            if left.count(OMNI) < aligned:
+                return False
+    return len(left) == aligned + void
+
+
+def naive_payment(pool, cost):
+    total = sum(n for _, n in cost)
+    best = None
+    for chosen in set(combinations(sorted(pool), total)):
+        if naive_pays(chosen, cost):
+            weight = sum(WEIGHTS[d] for d in chosen)
+            if best is None or weight < best[1]:
+                best = (chosen, weight)
+    return best
+
+
+def run(number=2000):
+    table = build_table()
+    vector = dice_vector(POOL)
+    for c in table.valid:
+        naive = naive_payment(POOL, normalize_cost(c.cost))
+        fast = solve_payment(vector, normalize_cost(c.cost), WEIGHTS)
+        assert (naive is None) == (fast is None) and (naive is None or naive[1] == fast[1]), (c, naive, fast)
+
+    def cold():
+        solve_payment.cache_clear()
+        return solve_table(vector, table, WEIGHTS)
+
+    return {
+        "candidates": len(table),
+        "naive_table_us": time_per_call(lambda: [naive_payment(POOL, normalize_cost(c.cost)) for c in table.valid],
+                                        max(1, number // 20)) * 1e6,
+        "solver_cold_table_us": time_per_call(cold, number) * 1e6,
+        "solver_warm_table_us": time_per_call(lambda: solve_table(vector, table, WEIGHTS), number) * 1e6,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="骰子支付求解器基准")
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+    emit("dice", run(args.number), args.json_path)
@@ -0,0 +1,80 @@
+# benchmarks/bench_import.py
+# ==========================================
+# 导入期预算检查：每个模块在全新解释器里导入 repeat 次，取中位耗时 (毫秒)，并检查导入没有副作用：
+#   - 不改 sys.path、不向 stdout 打印；
+#   - 不加载 google.protobuf / *_pb2 / colorama / webbrowser / numpy (它们都应在首次使用时才加载)。
+# 任一模块超出预算或有副作用时以退出码 1 结束。同样的检查在 tests/test_imports.py 里随 pytest 运行，
+# 这里保留命令行入口用来输出各模块的耗时。
+# 用法: python -m benchmarks.bench_import [--repeat 5] [--scale 1.0] [--json out.json]
+# ==========================================
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import emit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 模块 -> 预算 (毫秒，不含解释器自身启动)；asyncio + httpx 本身约占 40 ~ 60 ms
+BUDGETS = {
+    "core.parser": 15,
+    "core.codec": 15,
+    "core.scheduler": 60,
+    "core.network": 120,
+    "core.stub_server": 120,
+    "main": 150,
+}
+LAZY_MODULES = ("google.protobuf", "notification_pb2", "rpc_pb2", "state_pb2", "colorama", "webbrowser", "numpy")
+
+PROBE = """
+import io, json, sys, time
+path, out = list(sys.path), io.StringIO()
+sys.stdout = out
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+sys.stdout = sys.__stdout__
+print(json.dumps({{"ms": elapsed * 1000, "path_changed": sys.path != path, "printed": out.getvalue(),
+                  "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def probe(module):
+    """ 在全新解释器里导入一次 module """
+    code = PROBE.format(module=module, lazy=LAZY_MODULES)
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run(repeat=5, scale=1.0):
+    results, failures = {}, []
+    for module, budget in BUDGETS.items():
+        samples = [probe(module) for _ in range(repeat)]
+        ms = statistics.median(s["ms"] for s in samples)
+        results[f"{module}_ms"] = ms
+        first = samples[0]
+        if ms > budget * scale:
+            failures.append(f"{module}: {ms:.1f} ms > 预算 {budget * scale:.0f} ms")
+        if first["path_changed"]:
+            failures.append(f"{module}: 导入时修改了 sys.path")
+        if first["printed"]:
+            failures.append(f"{module}: 导入时向 stdout 打印了 {first['printed'][:60]!r}")
+        if first["loaded"]:
+            failures.append(f"{module}: 导入时加载了 {first['loaded']}")
+    return results, failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="导入期预算检查")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="预算缩放系数 (慢机器 / CI 上可放宽)")
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+    results, failures = run(args.repeat, args.scale)
+    emit("import", results, args.json_path)
+    for failure in failures:
+        print(f"  ❌ {failure}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,165 @@
+# benchmarks/bench_latency.py
+# ==========================================
+# 端到端决策延迟基准：Bot 通过本地桩服务器回放固定事件序列
+# 分阶段统计 p50/p95/p99 (毫秒)：
+#   parse     : codec.decode
+#   apply     : StateStore 增量更新 (notification)
+#   decide    : 调度器内的决策函数
+#   serialize : 响应 payload 的 JSON 编码
+#   post      : actionResponse 往返 (直到收到 200)
+#   e2e       : rpc 事件开始解码到 send_action 返回 (含流水线排队)
+# 以及 events/s 和每个 Bot 的常驻内存。
+# 用法: python -m benchmarks.bench_latency [--bots 8] [--codec json] [--recording trace.jsonl] [--json out.json]
+# ==========================================
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+from benchmarks.common import emit, percentiles
+from core.codec import get_codec
+from core.logs import get_logger
+from core.stub_server import StubServer, load_recording, scripted_game
+
+STAGES = ("parse", "apply", "decide", "serialize", "post", "e2e")
+
+
+class StageTimer:
+    """ 所有 Bot 共享的阶段耗时采样 (秒) """
+
+    def __init__(self):
+        self.samples = {stage: [] for stage in STAGES}
+        self.events = 0
+
+    def add(self, stage, seconds):
+        self.samples[stage].append(seconds)
+
+
+class TimedCodec:
+    """ 包装真实编解码器：统计解码耗时，并记下 rpc 事件的到达时刻 """
+
+    def __init__(self, codec, bot, timer):
+        self.codec = codec
+        self.bot = bot
+        self.timer = timer
+        self.sse_params = codec.sse_params
+
+    def decode(self, raw):
+        start = time.perf_counter()
+        event = self.codec.decode(raw)
+        self.timer.events += 1
+        self.timer.add("parse", time.perf_counter() - start)
+        if event is not None and event.type == "rpc":
+            self.bot.rpc_arrived_at[event.rpc_id] = start
+        return event
+
+
+def instrument(bot_cls, timer):
+    """ 生成带计时探针的 Bot 子类；探针只包住现有方法，不改变决策行为 """
+
+    class TimedBot(bot_cls):
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.codec = TimedCodec(self.codec, self, timer)
+            self.rpc_arrived_at = {}
+            apply_notification = self.state_store.apply_notification
+
+            def timed_apply(data):
+                start = time.perf_counter()
+                try:
+                    return apply_notification(data)
+                finally:
+                    timer.add("apply", time.perf_counter() - start)
+
+            self.state_store.apply_notification = timed_apply
+            respond = self.scheduler.respond
+
+            async def timed_respond(rpc_id, kind, decide, fallback, send, received_at=None):
+                async def timed_decide():
+                    start = time.perf_counter()
+                    result = await self.scheduler._run(decide)
+                    timer.add("decide", time.perf_counter() - start)
+                    return result
+
+                return await respond(rpc_id, kind, timed_decide, fallback, send, received_at)
+
+            self.scheduler.respond = timed_respond
+
+        async def send_action(self, payload):
+            start = time.perf_counter()
+            json.dumps(payload)
+            timer.add("serialize", time.perf_counter() - start)
+            start = time.perf_counter()
+            ok = await super().send_action(payload)
+            end = time.perf_counter()
+            timer.add("post", end - start)
+            arrived = self.rpc_arrived_at.pop(payload.get("id"), None)
+            if arrived is not None:
+                timer.add("e2e", end - arrived)
+            return ok
+
+    return TimedBot
+
+
+async def run_bots(bot_cls, script, bots, codec, deadline_scale=1.0):
+    timer = StageTimer()
+    timed_cls = instrument(bot_cls, timer)
+    async with StubServer(script=script, deadline_scale=deadline_scale) as server:
+        # 预热编码缓存，让服务端开销不计入 Bot 的内存
+        for event in script:
+            event.encode("protobuf" if codec == "proto" else "json")
+
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        instances = [timed_cls(base_url=server.base_url, open_debug_link=False, codec=get_codec(codec))
+                     for _ in range(bots)]
+        start = time.perf_counter()
+        for bot in instances:
+            await bot.login_guest()
+        await asyncio.gather(*(bot.listen_to_game() for bot in instances))
+        elapsed = time.perf_counter() - start
+        resident = tracemalloc.get_traced_memory()[0] - base
+        tracemalloc.stop()
+
+        finished = sum(bot.game_finished for bot in instances)
+        for bot in instances:
+            await bot.aclose()
+        stats = server.stats()
+
+    results = {"bots": bots, "finished": finished, "timeouts": stats["timeouts"], "events": timer.events,
+               "events_per_s": timer.events / elapsed if elapsed else 0.0,
+               "memory_per_bot_kb": resident / bots / 1024}
+    for stage in STAGES:
+        for name, value in percentiles(timer.samples[stage], scale=1e3).items():
+            results[f"{stage}_{name}_ms"] = value
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端决策延迟基准")
+    parser.add_argument("--bot", choices=("smart", "base"), default="smart", help="SmartBot 或 GenshinTCGBot")
+    parser.add_argument("--bots", type=int, default=8, help="同时回放的 Bot 数")
+    parser.add_argument("--codec", default="json")
+    parser.add_argument("--rounds", type=int, default=4)
+    parser.add_argument("--actions", type=int, default=6)
+    parser.add_argument("--recording", help="用录制文件代替脚本对局")
+    parser.add_argument("--deadline-scale", type=float, default=1.0,
+                        help="桩服务器 RPC 截止时间缩放 (GenshinTCGBot 不回应行动请求，可调小以免干等)")
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+
+    # 日志没有安装队列输出时只会有 WARNING 以上经 lastResort 输出，这里彻底静音
+    get_logger().setLevel("CRITICAL")
+    if args.bot == "smart":
+        from main import SmartBot as bot_cls
+    else:
+        from core.network import GenshinTCGBot as bot_cls
+    script = load_recording(args.recording) if args.recording else scripted_game(args.rounds, args.actions)
+    results = asyncio.run(run_bots(bot_cls, script, args.bots, args.codec, args.deadline_scale))
+    results.update({"bot": args.bot, "codec": args.codec})
+    emit("latency", results, args.json_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# benchmarks/bench_state.py
+# ==========================================
+# 紧凑状态 vs 现有 dict 路径：内存占用、构建耗时、字段访问耗时
+# 用法: python -m benchmarks.bench_state [--json out.json]
+# ==========================================
+import argparse
+
+from benchmarks.common import build_sample_state, emit, memory_per_object, time_per_call
+from core.serializer import proto_to_dict
+from core.state import GameState
+
+
+def dict_scan(state):
+    """ 现有决策代码的典型访问：遍历角色找血量 / 出战角色充能 / 骰子数 """
+    total = 0
+    for p in state["player"]:
+        active = p.get("activeCharacterId")
+        for c in p["character"]:
+            total += c["health"]
+            if c["id"] == active:
+                total += c["energy"]
+        total += len(p["dice"])
+    return total
+
+
+def compact_scan(state):
+    total = 0
+    for p in state.players:
+        total += sum(p.health)
+        i = p.active_index
+        if i is not None:
+            total += p.energy[i]
+        total += p.dice_total
+    return total
+
+
+def run(number=2000):
+    msg = build_sample_state()
+    as_dict = proto_to_dict(msg)
+    compact = GameState.from_proto(msg)
+    assert dict_scan(as_dict) == compact_scan(compact)
+
+    return {
+        "dict_bytes_per_state": memory_per_object(lambda: proto_to_dict(msg)),
+        "compact_bytes_per_state": memory_per_object(lambda: GameState.from_proto(msg)),
+        "dict_build_us": time_per_call(lambda: proto_to_dict(msg), number // 10) * 1e6,
+        "compact_build_us": time_per_call(lambda: GameState.from_proto(msg), number // 10) * 1e6,
+        "compact_from_dict_us": time_per_call(lambda: GameState.from_dict(as_dict), number // 10) * 1e6,
+        "dict_scan_us": time_per_call(lambda: dict_scan(as_dict), number) * 1e6,
+        "compact_scan_us": time_per_call(lambda: compact_scan(compact), number) * 1e6,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="紧凑状态 vs dict 路径基准")
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+    emit("state", run(args.number), args.json_path)
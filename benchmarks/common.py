@@ -0,0 +1,93 @@
+# benchmarks/common.py
+# ==========================================
+# 基准测试公共工具：样例状态构造、计时与内存测量 (以 python -m benchmarks.xxx 运行)
+# ==========================================
+import json
+import time
+import tracemalloc
+
+from core import protos
+
+
+def build_sample_state(seed=0):
+    """
+    构造一份接近真实中盘规模的 state_pb2.State：
+    双方各 3 角色 (带装备/状态)、手牌 8 张、牌堆 20 张、召唤物与支援若干、8 颗骰子。
+    """
+    state_pb2 = protos.load("state_pb2")
+    state = state_pb2.State(phase=state_pb2.PHASE_TYPE_ACTION, round_number=3 + seed % 5, current_turn=seed % 2)
+    next_id = -1
+    for who in range(2):
+        player = state.player.add()
+        player.status = state_pb2.PLAYER_STATUS_ACTING if who == 0 else state_pb2.PLAYER_STATUS_UNSPECIFIED
+        for c in range(3):
+            char = player.character.add(
+                id=next_id, definition_id=1101 + 100 * c + who, health=10 - (seed + c) % 7,
+                max_health=10, energy=c % 3, max_energy=3, aura=c % 3, tags=c,
+            )
+            next_id -= 1
+            for e in range(2):
+                ent = char.entity.add(id=next_id, definition_id=311100 + e, tags=e,
+                                      variable_name="usage", variable_value=e + 1)
+                ent.description_dictionary["[D1]"] = str(e + 1)
+                next_id -= 1
+        player.active_character_id = player.character[0].id
+        for area, count in ((player.combat_status, 2), (player.summon, 2), (player.support, 3)):
+            for k in range(count):
+                ent = area.add(id=next_id, definition_id=112000 + k, variable_name="usage",
+                               variable_value=k + 1, has_usage_per_round=bool(k % 2))
+                ent.description_dictionary["[D1]"] = str(k)
+                next_id -= 1
+        for k in range(8):
+            card = player.hand_card.add(id=next_id, definition_id=311308 + k if who == 0 else 0)
+            card.definition_cost.add(type=k % 9, count=k % 4)
+            next_id -= 1
+        for k in range(20):
+            player.pile_card.add(id=next_id, definition_id=330000 + k if who == 0 else 0)
+            next_id -= 1
+        player.dice.extend([(seed + k) % 8 + 1 for k in range(8)])
+        for k in range(3):
+            skill = player.initiative_skill.add(definition_id=11011 + k)
+            skill.definition_cost.add(type=1, count=k + 1)
+    return state
+
+
+def time_per_call(fn, number=1000):
+    """ 返回单次调用平均耗时 (秒) """
+    fn()
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - start) / number
+
+
+def memory_per_object(factory, number=200):
+    """ 连续创建 number 个对象并全部持有，返回平均每个对象的分配字节数 """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    keep = [factory() for _ in range(number)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del keep
+    return (after - before) / number
+
+
+def emit(name, results, json_path=None):
+    """ 打印结果表，并可选写出 JSON 以便跨提交对比 """
+    print(f"== {name} ==")
+    width = max(len(k) for k in results)
+    for key, value in results.items():
+        shown = f"{value:.3f}" if isinstance(value, float) else value
+        print(f"  {key.ljust(width)}  {shown}")
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"benchmark": name, "results": results}, f, indent=2, ensure_ascii=False)
+
+
+def percentiles(samples, points=(50, 95, 99), scale=1.0):
+    """ 最近秩法求分位数；samples 为空时返回 None。scale 用于换算单位 (如秒 -> 毫秒) """
+    if not samples:
+        return {f"p{p}": None for p in points}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {f"p{p}": ordered[min(last, int(round(p / 100 * last)))] * scale for p in points}
@@ -0,0 +1,211 @@
+# core/actions.py
+from core.serializer import Serializer
+from core.state import DICE_TYPES, enum_int
+
+# ==========================================
+# 行动候选表 (Action Table)
+# 把 rpc.proto 的 ActionRequest (repeated Action) 解码成带索引的候选表：
+# 按种类分组、按 ActionValidity 过滤，常用查询 (全部合法快速行动 / 按定义 id 找技能) 都是 O(1)。
+# 每个候选保留原始下标，用 Serializer.perform_action 直接生成响应。
+# ==========================================
+
+# Action.oneof 键 (camelCase)
+SWITCH = "switchActive"
+CARD = "playCard"
+SKILL = "useSkill"
+TUNING = "elementalTuning"
+END = "declareEnd"
+ACTION_KINDS = (SWITCH, CARD, SKILL, TUNING, END)
+# Action.oneof 字段名 (snake_case，from_proto 用)
+PROTO_KINDS = {"switch_active": SWITCH, "play_card": CARD, "use_skill": SKILL,
+               "elemental_tuning": TUNING, "declare_end": END}
+
+VALIDITIES = {
+    "ACTION_VALIDITY_VALID": 0, "ACTION_VALIDITY_CONDITION_NOT_MET": 1, "ACTION_VALIDITY_NO_TARGET": 2,
+    "ACTION_VALIDITY_NO_DICE": 3, "ACTION_VALIDITY_NO_ENERGY": 4, "ACTION_VALIDITY_DISABLED": 5,
+}
+DICE_REQUIREMENT_TYPES = {
+    "DICE_REQUIREMENT_TYPE_VOID": 0, "DICE_REQUIREMENT_TYPE_CRYO": 1, "DICE_REQUIREMENT_TYPE_HYDRO": 2,
+    "DICE_REQUIREMENT_TYPE_PYRO": 3, "DICE_REQUIREMENT_TYPE_ELECTRO": 4, "DICE_REQUIREMENT_TYPE_ANEMO": 5,
+    "DICE_REQUIREMENT_TYPE_GEO": 6, "DICE_REQUIREMENT_TYPE_DENDRO": 7, "DICE_REQUIREMENT_TYPE_ALIGNED": 8,
+    "DICE_REQUIREMENT_TYPE_ENERGY": 9, "DICE_REQUIREMENT_TYPE_LEGEND": 10,
+}
+
+
+class Candidate:
+    """
+    单个候选行动。
+    definition_id : 技能 / 卡牌 / 切换目标角色的定义 id (调和与结束为 None)
+    target_id     : 卡牌实体 id / 切换目标角色 id / 调和弃置的手牌 id
+    cost          : ((DiceRequirementType, count), ...)
+    auto_dice     : 服务端自动选好的骰子 (DiceType 整数)
+    """
+    __slots__ = ("index", "kind", "validity", "is_fast", "definition_id", "target_id", "target_ids",
+                 "cost", "auto_dice", "preview")
+
+    def __init__(self, index, kind, validity=0, is_fast=False, definition_id=None, target_id=None,
+                 target_ids=(), cost=(), auto_dice=(), preview=()):
+        self.index = index
+        self.kind = kind
+        self.validity = validity
+        self.is_fast = is_fast
+        self.definition_id = definition_id
+        self.target_id = target_id
+        self.target_ids = target_ids
+        self.cost = cost
+        self.auto_dice = auto_dice
+        self.preview = preview
+
+    @property
+    def valid(self):
+        return self.validity == 0
+
+    @property
+    def key(self):
+        """ 与下标无关的身份 (种类, 定义 id, 目标 id)：同一行动在不同请求里的下标可能不同 """
+        return (self.kind, self.definition_id, self.target_id)
+
+    @classmethod
+    def from_dict(cls, index, d):
+        kind = next((k for k in ACTION_KINDS if k in d), None)
+        body = d.get(kind) or {}
+        definition_id = target_id = None
+        target_ids = tuple(body.get("targetIds", ()))
+        if kind == SKILL:
+            definition_id = body.get("skillDefinitionId", 0)
+        elif kind == CARD:
+            definition_id = body.get("cardDefinitionId", 0)
+            target_id = body.get("cardId", 0)
+        elif kind == SWITCH:
+            definition_id = body.get("characterDefinitionId", 0)
+            target_id = body.get("characterId", 0)
+        elif kind == TUNING:
+            target_id = body.get("removedCardId", 0)
+        return cls(
+            index, kind, enum_int(d.get("validity"), VALIDITIES), d.get("isFast", False),
+            definition_id, target_id, target_ids,
+            tuple((enum_int(r.get("type"), DICE_REQUIREMENT_TYPES), r.get("count", 0))
+                  for r in d.get("requiredCost", ())),
+            tuple(enum_int(x, DICE_TYPES) for x in d.get("autoSelectedDice", ())),
+            tuple(d.get("preview", ())),
+        )
+
+    @classmethod
+    def from_proto(cls, index, msg):
+        kind = PROTO_KINDS.get(msg.WhichOneof("action"))
+        definition_id = target_id = None
+        target_ids = ()
+        if kind == SKILL:
+            definition_id = msg.use_skill.skill_definition_id
+            target_ids = tuple(msg.use_skill.target_ids)
+        elif kind == CARD:
+            definition_id = msg.play_card.card_definition_id
+            target_id = msg.play_card.card_id
+            target_ids = tuple(msg.play_card.target_ids)
+        elif kind == SWITCH:
+            definition_id = msg.switch_active.character_definition_id
+            target_id = msg.switch_active.character_id
+        elif kind == TUNING:
+            target_id = msg.elemental_tuning.removed_card_id
+        return cls(
+            index, kind, msg.validity, msg.is_fast, definition_id, target_id, target_ids,
+            tuple((r.type, r.count) for r in msg.required_cost),
+            tuple(msg.auto_selected_dice),
+            tuple(msg.preview),
+        )
+
+    def response(self, rpc_id, used_dice=None):
+        """ 选择本行动的完整响应 payload；used_dice 默认用服务端自动选的骰子 """
+        dice = list(self.auto_dice) if used_dice is None else list(used_dice)
+        return {"id": rpc_id, "response": Serializer.perform_action(self.index, dice)}
+
+    def __repr__(self):
+        return (f"Candidate(#{self.index} {self.kind} def={self.definition_id} target={self.target_id} "
+                f"valid={self.valid} fast={self.is_fast})")
+
+
+class ActionTable:
+    """
+    一次 ActionRequest 的候选表。所有分组在构建时一次算好，查询只做字典 / 元组访问。
+
+        table = ActionTable.from_dict(request)       # rpc 请求 dict (含或不含外层 "action")
+        table.valid_fast                               # 全部合法的快速行动
+        table.skill(11011)                             # 按技能定义 id 取候选
+        table.end.response(rpc_id)                     # 宣布结束的响应 payload
+    """
+    __slots__ = ("candidates", "valid", "valid_fast", "_by_kind", "_valid_by_kind",
+                 "_skills", "_cards", "_switch", "end")
+
+    def __init__(self, candidates):
+        self.candidates = tuple(candidates)
+        self.valid = tuple(c for c in self.candidates if c.valid)
+        self.valid_fast = tuple(c for c in self.valid if c.is_fast)
+        by_kind = {kind: [] for kind in ACTION_KINDS}
+        skills, cards, switch = {}, {}, {}
+        for c in self.candidates:
+            by_kind.setdefault(c.kind, []).append(c)
+            if c.kind == SKILL:
+                skills.setdefault(c.definition_id, c)
+            elif c.kind == CARD:
+                cards.setdefault(c.definition_id, []).append(c)
+            elif c.kind == SWITCH:
+                switch.setdefault(c.target_id, c)
+        self._by_kind = {k: tuple(v) for k, v in by_kind.items()}
+        self._valid_by_kind = {k: tuple(c for c in v if c.valid) for k, v in by_kind.items()}
+        self._skills = skills
+        self._cards = {k: tuple(v) for k, v in cards.items()}
+        self._switch = switch
+        ends = self._by_kind.get(END, ())
+        self.end = ends[0] if ends else None
+
+    @classmethod
+    def from_dict(cls, request):
+        body = request.get("action", request) if isinstance(request, dict) else {}
+        if isinstance(body, dict):
+            body = body.get("action", ())
+        return cls(Candidate.from_dict(i, a) for i, a in enumerate(body or ()))
+
+    @classmethod
+    def from_proto(cls, msg):
+        """ rpc_pb2.ActionRequest 或 rpc_pb2.Request """
+        if msg.DESCRIPTOR.name == "Request":
+            msg = msg.action
+        return cls(Candidate.from_proto(i, a) for i, a in enumerate(msg.action))
+
+    # ---------- 查询 ----------
+
+    def by_kind(self, kind, valid_only=True):
+        table = self._valid_by_kind if valid_only else self._by_kind
+        return table.get(kind, ())
+
+    def skill(self, definition_id):
+        """ 按技能定义 id 取候选 (可能不合法，需检查 .valid) """
+        return self._skills.get(definition_id)
+
+    def cards(self, definition_id):
+        """ 同一张牌的全部候选 (不同实体 / 目标) """
+        return self._cards.get(definition_id, ())
+
+    def switch_to(self, character_id):
+        return self._switch.get(character_id)
+
+    def signature(self):
+        """ 全部合法候选的 Candidate.key 元组 (置换表 / 推测结果的校验键) """
+        return tuple(c.key for c in self.valid)
+
+    def find(self, key):
+        """ 按 Candidate.key 取合法候选；不存在 (或不合法) 时返回 None """
+        return next((c for c in self.valid if c.key == key), None)
+
+    def __len__(self):
+        return len(self.candidates)
+
+    def __iter__(self):
+        return iter(self.candidates)
+
+    def __getitem__(self, index):
+        return self.candidates[index]
+
+    def __repr__(self):
+        counts = ", ".join(f"{k}={len(v)}" for k, v in self._valid_by_kind.items() if v)
+        return f"ActionTable({len(self.candidates)} candidates, valid: {counts})"
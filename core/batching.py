@@ -0,0 +1,139 @@
+# core/batching.py
+import asyncio
+import time
+
+from core.executor import DecisionExecutor
+from core.logs import get_logger
+
+# ==========================================
+# 📦 跨对局批处理 (Batch Broker)
+# 舰队里每个 Bot 的决策请求先进同一个队列，攒满 max_batch 条或等满 window 秒
+# (以先到者为准) 后作为一批交给批量后端 (如 core/policy.py 的 greedy_batch) 一次算完，
+# 结果按提交顺序各自回到等待它的 Bot (每条请求一个 future，键为 rpc id，仅用于日志)。
+# 截止时间：任何一条请求的截止时间临近 (减去 margin) 时提前发车；
+# 发车时已经过期或已被调度器取消的请求直接剔除，不占批量名额。
+# 后端通过 core/executor.py 的 DecisionExecutor 执行，process 模式下一批只 pickle 一次。
+# ==========================================
+
+log = get_logger("batching")
+
+
+class _Pending:
+    __slots__ = ("item", "future", "deadline", "key")
+
+    def __init__(self, item, future, deadline, key):
+        self.item = item
+        self.future = future
+        self.deadline = deadline
+        self.key = key
+
+
+class BatchBroker:
+    """
+    用法:
+        broker = BatchBroker(greedy_batch, weights, executor=executor, max_batch=64, window=0.005)
+        result = await broker.submit((snapshot, table, who), deadline=deadline, key=rpc_id)
+
+    backend(items, *args) 接收一个列表，返回等长的结果列表。
+    """
+
+    def __init__(self, backend, *args, executor=None, max_batch=32, window=0.005, margin=0.05,
+                 clock=time.monotonic):
+        self.backend = backend
+        self.args = args
+        self.executor = executor or DecisionExecutor("inline")
+        self.max_batch = max_batch
+        self.window = window
+        self.margin = margin
+        self.clock = clock
+        self._queue = []
+        self._first_at = None
+        self._ready = None
+        self._collector = None
+        self._running = set()
+        self.stats = {"submitted": 0, "batches": 0, "batched_items": 0, "expired": 0, "max_batch_seen": 0}
+
+    async def submit(self, item, deadline=None, key=None):
+        """ 提交一条请求并等待它所在批次的结果；deadline 为 clock() 时间轴上的绝对时间 """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self._queue:
+            self._first_at = self.clock()
+        self._queue.append(_Pending(item, future, deadline, key))
+        self.stats["submitted"] += 1
+        if self._ready is None:
+            self._ready = asyncio.Event()
+        if len(self._queue) >= self.max_batch or (deadline is not None and deadline - self.margin <= self.clock()):
+            self._ready.set()
+        if self._collector is None or self._collector.done():
+            self._collector = loop.create_task(self._collect())
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # 调度器放弃了这条请求：尚未发车时让它在发车时被剔除
+            future.cancel()
+            raise
+
+    def _flush_at(self):
+        flush_at = self._first_at + self.window
+        deadlines = [p.deadline for p in self._queue if p.deadline is not None]
+        if deadlines:
+            flush_at = min(flush_at, min(deadlines) - self.margin)
+        return flush_at
+
+    async def _collect(self):
+        while self._queue:
+            wait = self._flush_at() - self.clock()
+            if wait > 0 and len(self._queue) < self.max_batch:
+                self._ready.clear()
+                try:
+                    await asyncio.wait_for(self._ready.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+            batch, now = [], self.clock()
+            while self._queue and len(batch) < self.max_batch:
+                pending = self._queue.pop(0)
+                if pending.future.done():
+                    continue
+                if pending.deadline is not None and pending.deadline <= now:
+                    self.stats["expired"] += 1
+                    log.debug("请求 %s 在发车前已过期", pending.key)
+                    pending.future.set_exception(asyncio.TimeoutError())
+                    continue
+                batch.append(pending)
+            self._first_at = self.clock()
+            if batch:
+                task = asyncio.get_running_loop().create_task(self._run(batch))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch):
+        self.stats["batches"] += 1
+        self.stats["batched_items"] += len(batch)
+        self.stats["max_batch_seen"] = max(self.stats["max_batch_seen"], len(batch))
+        # 整批以最晚的截止时间为限：个别请求先到期由各自的调度器兜底，不拖累整批
+        deadlines = [p.deadline for p in batch]
+        deadline = None if None in deadlines else max(deadlines)
+        try:
+            results = await self.executor.run(self.backend, [p.item for p in batch], *self.args, deadline=deadline)
+        except Exception as e:
+            log.error("批量决策失败 (%d 条): %s", len(batch), e)
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+        for pending, result in zip(batch, results):
+            if not pending.future.done():
+                pending.future.set_result(result)
+
+    @property
+    def mean_batch(self):
+        return self.stats["batched_items"] / self.stats["batches"] if self.stats["batches"] else 0.0
+
+    async def aclose(self):
+        """ 等待已发车的批次结束，取消排队中的请求 """
+        for pending in self._queue:
+            pending.future.cancel()
+        self._queue.clear()
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
@@ -0,0 +1,251 @@
+# core/catalog.py
+import argparse
+import json
+import os
+
+import numpy as np
+
+# ==========================================
+# 📖 定义目录 (Definition Catalog)
+# 把角色 / 卡牌 / 技能 / 实体的静态元数据 (类型、元素、费用、标签、血量、充能) 编译成按列存放的紧凑库：
+#   data/definitions.json     源数据：[{"id", "type", "name", "element", "cost": [{"type", "count"}],
+#                              "tags": [...], "health", "energy"}, ...] (由服务端数据包导出)
+#   data/definitions.catalog/ 编译产物：每列一个 .npy (可 mmap) + names.json / meta.json
+# 另有一个稠密的 id -> 行号 数组，单个查询与按 id 数组批量查询都是 O(1) 下标访问。
+# 首次调用 get_catalog() 时才加载；没有编译产物时直接读源 JSON，两者都没有则为空目录。
+# ==========================================
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+DEFAULT_SOURCE = os.path.join(DATA_DIR, "definitions.json")
+DEFAULT_STORE = os.path.join(DATA_DIR, "definitions.catalog")
+
+KINDS = ("unknown", "character", "card", "skill", "entity")
+KIND_CODES = {name: i for i, name in enumerate(KINDS)}
+# 与 DiceType 的元素部分一致 (1 ~ 7)
+ELEMENTS = ("none", "cryo", "hydro", "pyro", "electro", "anemo", "geo", "dendro")
+ELEMENT_CODES = {name: i for i, name in enumerate(ELEMENTS)}
+# DiceRequirementType (见 core/actions.py 的 DICE_REQUIREMENT_TYPES)
+COST_CODES = {name: i for i, name in enumerate(("void",) + ELEMENTS[1:] + ("aligned", "energy", "legend"))}
+COST_SLOTS = 3
+MAX_TAGS = 64
+
+COLUMNS = {
+    "ids": np.int32,
+    "kind": np.int8,
+    "element": np.int8,
+    "health": np.int16,
+    "energy": np.int8,
+    "cost_type": np.int8,     # [N, COST_SLOTS] DiceRequirementType，空位为 -1
+    "cost_count": np.int8,    # [N, COST_SLOTS]
+    "tags": np.uint64,        # 标签位图，位序见 meta.json 的 tags
+}
+
+
+def _code(value, codes):
+    """ 名字 (大小写不敏感，允许 ELEMENT_ / DICE_TYPE_ 等前缀) 或整数 -> 编码 """
+    if value is None:
+        return 0
+    if isinstance(value, int):
+        return value
+    name = str(value).lower().rsplit("_", 1)[-1]
+    return codes.get(name, 0)
+
+
+class Definition:
+    """ 单条定义的只读视图 (数据仍在列里) """
+    __slots__ = ("_catalog", "_row")
+
+    def __init__(self, catalog, row):
+        self._catalog = catalog
+        self._row = row
+
+    id = property(lambda self: int(self._catalog.columns["ids"][self._row]))
+    kind = property(lambda self: KINDS[self._catalog.columns["kind"][self._row]])
+    element = property(lambda self: ELEMENTS[self._catalog.columns["element"][self._row]])
+    health = property(lambda self: int(self._catalog.columns["health"][self._row]))
+    energy = property(lambda self: int(self._catalog.columns["energy"][self._row]))
+    name = property(lambda self: self._catalog.names[self._row])
+
+    @property
+    def cost(self):
+        """ ((DiceRequirementType, count), ...)，与 core/actions.py 的 Candidate.cost 同形 """
+        types = self._catalog.columns["cost_type"][self._row]
+        counts = self._catalog.columns["cost_count"][self._row]
+        return tuple((int(t), int(n)) for t, n in zip(types, counts) if t >= 0)
+
+    @property
+    def tags(self):
+        bits = int(self._catalog.columns["tags"][self._row])
+        return frozenset(tag for i, tag in enumerate(self._catalog.tag_names) if bits >> i & 1)
+
+    def __repr__(self):
+        return f"Definition({self.id} {self.kind} {self.name!r})"
+
+
+class Catalog:
+    """
+    用法:
+        catalog = get_catalog()
+        catalog.get(1101).health                       # 单个
+        catalog.column("health", state.char_defs)      # 按 id 数组批量取列 (缺失为 0)
+        catalog.has_tag(ids, "weapon")                 # 批量标签判定
+    """
+
+    def __init__(self, columns, tag_names=(), names=None, names_path=None):
+        self.columns = columns
+        self.tag_names = tuple(tag_names)
+        self._names = names
+        self._names_path = names_path
+        ids = columns["ids"]
+        self._rows = np.full(int(ids.max()) + 1 if len(ids) else 0, -1, dtype=np.int32)
+        self._rows[ids] = np.arange(len(ids), dtype=np.int32)
+
+    # ---------- 构建 / 存取 ----------
+
+    @classmethod
+    def from_records(cls, records):
+        records = sorted(records, key=lambda r: r["id"])
+        n = len(records)
+        tag_names = sorted({t for r in records for t in r.get("tags", ())})[:MAX_TAGS]
+        tag_bits = {t: 1 << i for i, t in enumerate(tag_names)}
+        columns = {name: np.zeros(n, dtype=dtype) for name, dtype in COLUMNS.items()}
+        columns["cost_type"] = np.full((n, COST_SLOTS), -1, dtype=np.int8)
+        columns["cost_count"] = np.zeros((n, COST_SLOTS), dtype=np.int8)
+        for i, r in enumerate(records):
+            columns["ids"][i] = r["id"]
+            columns["kind"][i] = _code(r.get("type"), KIND_CODES)
+            columns["element"][i] = _code(r.get("element"), ELEMENT_CODES)
+            columns["health"][i] = r.get("health", 0)
+            columns["energy"][i] = r.get("energy", 0)
+            for slot, cost in enumerate(r.get("cost", ())[:COST_SLOTS]):
+                columns["cost_type"][i, slot] = _code(cost.get("type"), COST_CODES)
+                columns["cost_count"][i, slot] = cost.get("count", 0)
+            columns["tags"][i] = sum(tag_bits.get(t, 0) for t in r.get("tags", ()))
+        return cls(columns, tag_names, names=[r.get("name", "") for r in records])
+
+    @classmethod
+    def from_json(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls.from_records(json.load(f))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """ 读取编译产物；mmap=True 时各列按需换页，不整体读入内存 """
+        mode = "r" if mmap else None
+        columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in COLUMNS}
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(columns, meta.get("tags", ()), names_path=os.path.join(path, "names.json"))
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for name in COLUMNS:
+            np.save(os.path.join(path, f"{name}.npy"), np.asarray(self.columns[name]))
+        with open(os.path.join(path, "names.json"), "w", encoding="utf-8") as f:
+            json.dump(self.names, f, ensure_ascii=False)
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"tags": self.tag_names, "count": len(self)}, f, ensure_ascii=False)
+
+    @property
+    def names(self):
+        """ 名字只有用到时才读 (热路径上用不到) """
+        if self._names is None:
+            if self._names_path and os.path.exists(self._names_path):
+                with open(self._names_path, encoding="utf-8") as f:
+                    self._names = json.load(f)
+            else:
+                self._names = [""] * len(self)
+        return self._names
+
+    # ---------- 查询 ----------
+
+    def row(self, definition_id):
+        """ id -> 行号；不存在返回 -1 """
+        if 0 <= definition_id < len(self._rows):
+            return int(self._rows[definition_id])
+        return -1
+
+    def get(self, definition_id):
+        row = self.row(definition_id)
+        return None if row < 0 else Definition(self, row)
+
+    def name(self, definition_id, default=None):
+        row = self.row(definition_id)
+        return self.names[row] if row >= 0 else default
+
+    def rows_of(self, ids):
+        """ 批量 id -> 行号数组 (缺失为 -1) """
+        ids = np.asarray(ids, dtype=np.int64)
+        rows = np.full(ids.shape, -1, dtype=np.int32)
+        inside = (ids >= 0) & (ids < len(self._rows))
+        rows[inside] = self._rows[ids[inside]]
+        return rows
+
+    def column(self, name, ids, default=0):
+        """ 批量取列：与 ids 对齐，缺失的 id 填 default """
+        rows = self.rows_of(ids)
+        data = self.columns[name]
+        out = np.full(rows.shape + data.shape[1:], default, dtype=data.dtype)
+        found = rows >= 0
+        out[found] = data[rows[found]]
+        return out
+
+    def has_tag(self, ids, tag):
+        if tag not in self.tag_names:
+            return np.zeros(np.shape(ids), dtype=np.bool_)
+        bit = np.uint64(1 << self.tag_names.index(tag))
+        return (self.column("tags", ids) & bit) != 0
+
+    def __contains__(self, definition_id):
+        return self.row(definition_id) >= 0
+
+    def __len__(self):
+        return len(self.columns["ids"])
+
+    def __repr__(self):
+        return f"Catalog({len(self)} definitions)"
+
+
+_catalog = None
+
+
+def get_catalog(source=DEFAULT_SOURCE, store=DEFAULT_STORE, mmap=True):
+    """ 进程内共享的目录，首次调用时加载：优先编译产物 (比源文件新时)，其次源 JSON，都没有则为空 """
+    global _catalog
+    if _catalog is None:
+        meta = os.path.join(store, "meta.json")
+        have_store = os.path.exists(meta)
+        have_source = os.path.exists(source)
+        if have_store and (not have_source or os.path.getmtime(meta) >= os.path.getmtime(source)):
+            _catalog = Catalog.load(store, mmap=mmap)
+        elif have_source:
+            _catalog = Catalog.from_json(source)
+        else:
+            _catalog = Catalog.from_records([])
+    return _catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="定义目录：编译 / 查询")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="把源 JSON 编译成可 mmap 的列存储")
+    build.add_argument("source", nargs="?", default=DEFAULT_SOURCE)
+    build.add_argument("--out", default=DEFAULT_STORE)
+    show = sub.add_parser("show", help="按 id 查询")
+    show.add_argument("ids", nargs="+", type=int)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        catalog = Catalog.from_json(args.source)
+        catalog.save(args.out)
+        print(f"✅ {len(catalog)} 条定义 -> {args.out}")
+    else:
+        catalog = get_catalog()
+        for definition_id in args.ids:
+            d = catalog.get(definition_id)
+            print(definition_id, "-" if d is None else
+                  f"{d.kind} {d.name} element={d.element} cost={d.cost} hp={d.health} energy={d.energy} tags={sorted(d.tags)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# core/codec.py
+import base64
+import json
+
+from core import protos
+from core.serializer import proto_to_dict
+
+# ==========================================
+# 🧬 SSE 事件编解码层 (Codec)
+# 三种可选解码方式：
+#   json        : json.loads，事件数据为 dict (现有行为)
+#   proto-json  : json.loads 后 ParseDict 成 notification_pb2 / rpc_pb2 消息
+#   proto       : 信封为 JSON，data 字段是 base64 编码的二进制 Protobuf (需服务端支持)
+# 决策代码可用 event.notification / event.request 直接拿到类型化消息，
+# 不经过 MessageToDict；只有访问 event.data 时才按需生成 dict (保留默认值，与 proto_to_dict 一致)。
+# 热路径上的 notification 交给 StateStore.apply_event，proto 模式下不整份转换。
+# ==========================================
+
+_pb = None
+
+
+def _protos():
+    """ 首次使用时才加载 Protobuf 运行时与编译产物 """
+    global _pb
+    if _pb is None:
+        from google.protobuf.json_format import ParseDict
+        notification_pb2, rpc_pb2 = protos.load("notification_pb2", "rpc_pb2")
+        _pb = (notification_pb2, rpc_pb2, ParseDict)
+    return _pb
+
+
+def split_rpc(event, data):
+    """ 兼容两种 rpc 信封：id 在顶层 / id 与 request 嵌在 data 里 """
+    rpc_id = event.get("id")
+    if rpc_id is None and isinstance(data, dict):
+        rpc_id = data.get("id")
+    if isinstance(data, dict) and "request" in data:
+        data = data["request"]
+    return rpc_id, data
+
+
+class DecodedEvent:
+    """ 解码后的事件。data / notification / request 都是按需生成并缓存的 """
+    __slots__ = ("type", "rpc_id", "_data", "_message", "_raw_body")
+
+    def __init__(self, type, rpc_id=None, data=None, message=None, raw_body=None):
+        self.type = type
+        self.rpc_id = rpc_id
+        self._data = data
+        self._message = message
+        self._raw_body = raw_body   # proto 模式下尚未解析的二进制载荷
+
+    @property
+    def has_dict(self):
+        """ dict 形态是否已经现成 (json / proto-json 模式，或已访问过 data) """
+        return self._data is not None
+
+    @property
+    def data(self):
+        """
+        dict 形态的事件数据 (json 模式零开销；proto 模式首次访问时转换)。
+        转换保留默认值：proto3 省略 0 值字段，而 viewer_index 等代码要靠 definitionId == 0 判断。
+        """
+        if self._data is None:
+            message = self._typed()
+            self._data = {} if message is None else proto_to_dict(message)
+        return self._data
+
+    @property
+    def notification(self):
+        """ notification_pb2.Notification (仅 notification 事件) """
+        return self._typed() if self.type == "notification" else None
+
+    @property
+    def request(self):
+        """ rpc_pb2.Request (仅 rpc 事件) """
+        return self._typed() if self.type == "rpc" else None
+
+    def _typed(self):
+        if self._message is None and self.type in ("notification", "rpc"):
+            notification_pb2, rpc_pb2, parse_dict = _protos()
+            message = notification_pb2.Notification() if self.type == "notification" else rpc_pb2.Request()
+            if self._raw_body is not None:
+                message.ParseFromString(self._raw_body)
+                self._raw_body = None
+            elif self._data is not None:
+                parse_dict(self._data, message, ignore_unknown_fields=True)
+            self._message = message
+        return self._message
+
+
+class JsonCodec:
+    """ 纯 JSON：与原 handle_game_event 行为一致 """
+    name = "json"
+    sse_params = {}
+
+    def decode(self, raw):
+        if not raw.startswith("{"):
+            return None
+        event = json.loads(raw)
+        evt_type = event.get("type")
+        data = event.get("data", {})
+        rpc_id = None
+        if evt_type == "rpc":
+            rpc_id, data = split_rpc(event, data)
+        return DecodedEvent(evt_type, rpc_id, data=data)
+
+
+class ProtoJsonCodec(JsonCodec):
+    """ JSON -> Protobuf 消息：notification / rpc 立即解析成类型化消息，同时保留原始 dict """
+    name = "proto-json"
+
+    def decode(self, raw):
+        event = super().decode(raw)
+        if event is not None:
+            event._typed()
+        return event
+
+
+class BinaryProtoCodec:
+    """
+    二进制 Protobuf：信封 {"type", "id", "data": base64(Notification|Request)}。
+    通过 SSE 查询参数 format=protobuf 向服务端协商；非 notification/rpc 事件仍是 JSON。
+    """
+    name = "proto"
+    sse_params = {"format": "protobuf"}
+
+    def decode(self, raw):
+        if not raw.startswith("{"):
+            return None
+        event = json.loads(raw)
+        evt_type = event.get("type")
+        data = event.get("data", {})
+        if evt_type not in ("notification", "rpc") or not isinstance(data, str):
+            rpc_id = None
+            if evt_type == "rpc":
+                rpc_id, data = split_rpc(event, data)
+            return DecodedEvent(evt_type, rpc_id, data=data)
+        return DecodedEvent(evt_type, event.get("id"), raw_body=base64.b64decode(data))
+
+    @staticmethod
+    def encode(evt_type, message, rpc_id=None):
+        """ 供桩服务器 / 回放使用：把消息编码成本编解码器能读的 SSE data 行 """
+        envelope = {"type": evt_type, "data": base64.b64encode(message.SerializeToString()).decode("ascii")}
+        if rpc_id is not None:
+            envelope["id"] = rpc_id
+        return json.dumps(envelope, separators=(",", ":"))
+
+
+CODECS = {codec.name: codec for codec in (JsonCodec, ProtoJsonCodec, BinaryProtoCodec)}
+
+
+def get_codec(name="json"):
+    """ 按名字取编解码器：json / proto-json / proto """
+    try:
+        return CODECS[name]()
+    except KeyError:
+        raise ValueError(f"未知的编解码器: {name} (可选: {', '.join(CODECS)})") from None
@@ -0,0 +1,272 @@
+# core/dataset.py
+import argparse
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from core.actions import ACTION_KINDS, ActionTable
+from core.parser import StateStore
+from core.replay import ReplayReader
+from core.scheduler import request_kind
+from core.state import DICE_SLOTS, GameState, viewer_index
+
+# ==========================================
+# 📚 录像 -> 训练数据 (Replay Dataset Builder)
+# 把 core/replay.py 录下的对局转成按批的 NumPy 数组，每个行动请求 (ActionRequest) 一个样本：
+#   features : [N, FEATURE_WIDTH] float32   状态特征 (己方在前，对手在后)
+#   mask     : [N, MAX_ACTIONS]   bool      合法行动掩码 (按 ActionRequest 中的下标)
+#   kinds    : [N, MAX_ACTIONS]   int8      各下标的行动种类 (ACTION_KINDS 下标，-1 为空位)
+#   action   : [N]                int16     实际选择的下标 (录像里的 response；没有则 -1)
+#   outcome  : [N]                int8      gameEnd.winPlayerId 视角下的胜负 (+1 / -1 / 0 未知)
+#   round    : [N]                int16
+# 按 (文件, 对局) 分发到进程池，主进程把结果按对局边界切成分片写成 .npy (可 np.load(mmap_mode="r"))，
+# manifest.json 记录已处理的对局，每写完一个分片就保存一次 (中途崩溃只需重做最后一片)；
+# 新录像到来后再次运行只处理新增 (且已结束) 的对局。
+# 房间号会跨运行复用，对局键为 "文件|房间/玩家@首块偏移" (见 ReplayReader.runs)。
+# ==========================================
+
+MAX_CHARACTERS = 3
+MAX_ACTIONS = 32
+PHASES = 6
+# 每个角色: 血量, 最大血量, 充能, 最大充能, 附着, 倒下, 出战
+CHARACTER_WIDTH = 7
+# 每个玩家: 角色 + 骰子计数 + (手牌, 牌堆, 召唤物, 支援, 出战状态, 宣布结束, 秘传已用)
+PLAYER_WIDTH = MAX_CHARACTERS * CHARACTER_WIDTH + DICE_SLOTS + 7
+# 全局: 阶段 one-hot + 回合数 + 是否轮到己方
+GLOBAL_WIDTH = PHASES + 2
+FEATURE_WIDTH = GLOBAL_WIDTH + 2 * PLAYER_WIDTH
+
+ARRAYS = {
+    "features": (np.float32, (FEATURE_WIDTH,)),
+    "mask": (np.bool_, (MAX_ACTIONS,)),
+    "kinds": (np.int8, (MAX_ACTIONS,)),
+    "action": (np.int16, ()),
+    "outcome": (np.int8, ()),
+    "round": (np.int16, ()),
+}
+KIND_INDEX = {kind: i for i, kind in enumerate(ACTION_KINDS)}
+MANIFEST = "manifest.json"
+
+
+def _empty(n=0):
+    return {name: np.zeros((n,) + shape, dtype=dtype) for name, (dtype, shape) in ARRAYS.items()}
+
+
+def encode_player(row, offset, player):
+    """ 把 PlayerState 写进特征行 row[offset:offset + PLAYER_WIDTH] """
+    count = min(player.character_count, MAX_CHARACTERS)
+    for i in range(count):
+        base = offset + i * CHARACTER_WIDTH
+        row[base:base + 7] = (player.health[i], player.max_health[i], player.energy[i], player.max_energy[i],
+                              player.aura[i], player.defeated[i], i == player.active_index)
+    base = offset + MAX_CHARACTERS * CHARACTER_WIDTH
+    row[base:base + DICE_SLOTS] = player.dice
+    base += DICE_SLOTS
+    row[base:base + 7] = (len(player.hand), len(player.pile), len(player.summon), len(player.support),
+                          len(player.combat_status), player.declared_end, player.legend_used)
+
+
+def encode_state(row, state, who):
+    """ GameState -> 特征行 (原地写入)；who 为视角玩家 """
+    if 0 <= state.phase < PHASES:
+        row[state.phase] = 1
+    row[PHASES] = state.round_number
+    row[PHASES + 1] = state.current_turn == who
+    players = state.players
+    if len(players) > 1:
+        encode_player(row, GLOBAL_WIDTH, players[who])
+        encode_player(row, GLOBAL_WIDTH + PLAYER_WIDTH, players[1 - who])
+
+
+def _player_id(game):
+    """ 对局 id "房间/玩家" -> 玩家 id；格式不符时返回 None (胜负记为未知) """
+    _, _, player = game.rpartition("/")
+    return int(player) if player.isdigit() else None
+
+
+def encode_game(reader, game, start=None):
+    """
+    逐条读一局录像，返回 (数组 dict, 是否已结束)。start 为 ReplayReader.runs() 的首块偏移，
+    同一 id 在文件里出现多次时只读那一局。
+    状态用 StateStore 增量维护 (与实时 Bot 同一条 apply_event 路径，Protobuf 录像不经 dict 中转)，
+    并与每条快照校验，只在行动请求到来时才转成 GameState 编码。
+    game 为 "房间/玩家 id" (GenshinTCGBot.game_key)，胜负按 winPlayerId 是否为该玩家判断。
+    """
+    store = StateStore(verify=True)
+    player_id = _player_id(game)
+    rows, pending = [], {}
+    winner = None
+    finished = False
+    for record in reader.records(game, start=start):
+        if record.type == "notification":
+            store.apply_event(record.event())
+        elif record.type == "rpc":
+            request = record.event().data
+            if request_kind(request) != "action" or store.state is None:
+                continue
+            table = ActionTable.from_dict(request)
+            who = viewer_index(store.state)
+            features = np.zeros(FEATURE_WIDTH, dtype=np.float32)
+            encode_state(features, GameState.from_dict(store.state), who)
+            mask = np.zeros(MAX_ACTIONS, dtype=np.bool_)
+            kinds = np.full(MAX_ACTIONS, -1, dtype=np.int8)
+            for c in table.candidates[:MAX_ACTIONS]:
+                mask[c.index] = c.valid
+                kinds[c.index] = KIND_INDEX.get(c.kind, -1)
+            row = [features, mask, kinds, -1, who, store.state.get("roundNumber", 0)]
+            pending[record.rpc_id] = row
+            rows.append(row)
+        elif record.type == "response":
+            row = pending.pop(record.rpc_id, None)
+            if row is not None:
+                chosen = (record.event().data.get("action") or {}).get("chosenActionIndex")
+                row[3] = -1 if chosen is None else chosen
+        elif record.type == "gameEnd":
+            winner = record.event().data.get("winPlayerId")
+            finished = True
+
+    outcome = 0 if winner is None or player_id is None else (1 if winner == player_id else -1)
+    arrays = _empty(len(rows))
+    for i, (features, mask, kinds, chosen, who, round_number) in enumerate(rows):
+        arrays["features"][i] = features
+        arrays["mask"][i] = mask
+        arrays["kinds"][i] = kinds
+        arrays["action"][i] = chosen
+        arrays["outcome"][i] = outcome
+        arrays["round"][i] = round_number
+    return arrays, finished
+
+
+def _game_key(path, game, start):
+    return f"{path}|{game}@{start}"
+
+
+def _encode_file(path, games):
+    """ 进程池任务：编码一个录像文件中的若干 (对局, 首块偏移)，返回 [(manifest 键, 数组, 是否结束)] """
+    with ReplayReader(path) as reader:
+        return [(_game_key(path, game, start),) + encode_game(reader, game, start) for game, start in games]
+
+
+class ShardWriter:
+    """
+    攒够 shard_size 条样本后在对局边界写成一片 (一局不跨片，片长可略超 shard_size)，每个数组写成单独的 .npy。
+    这样每片写完时已加入的对局都完整落盘，manifest 可以随片保存。
+    """
+
+    def __init__(self, out_dir, shard_size, first_shard=0):
+        self.out_dir = out_dir
+        self.shard_size = shard_size
+        self.next_shard = first_shard
+        self.written = []
+        self._parts = []
+        self._count = 0
+
+    def add(self, arrays):
+        n = len(arrays["action"])
+        if n:
+            self._parts.append(arrays)
+            self._count += n
+        if self._count >= self.shard_size:
+            self._write()
+            return True
+        return False
+
+    def close(self):
+        if self._count:
+            self._write()
+
+    def _write(self):
+        name = f"shard-{self.next_shard:05d}"
+        for key in ARRAYS:
+            np.save(os.path.join(self.out_dir, f"{name}-{key}.npy"), np.concatenate([p[key] for p in self._parts]))
+        self.written.append({"name": name, "samples": self._count})
+        self.next_shard += 1
+        self._count = 0
+        self._parts = []
+
+
+def _load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {"shards": [], "games": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def build_dataset(sources, out_dir, workers=None, shard_size=4096, games_per_task=16):
+    """
+    sources : 录像文件路径 (可含通配符)
+    返回本次新写入的 (对局数, 样本数)。未结束的对局不记入 manifest，下次运行再处理。
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = _load_manifest(out_dir)
+    done = manifest["games"]
+    paths = sorted({os.path.abspath(p) for pattern in sources for p in glob.glob(pattern)})
+
+    tasks = []
+    for path in paths:
+        with ReplayReader(path) as reader:
+            todo = [(g, start) for g in reader.games() for start, _ in reader.runs(g)
+                    if _game_key(path, g, start) not in done]
+        for i in range(0, len(todo), games_per_task):
+            tasks.append((path, todo[i:i + games_per_task]))
+
+    writer = ShardWriter(out_dir, shard_size, first_shard=len(manifest["shards"]))
+    queued = {}     # 已交给 writer、还没随分片落盘的对局
+
+    def commit():
+        manifest["shards"].extend(writer.written)
+        writer.written = []
+        done.update(queued)
+        queued.clear()
+        _save_manifest(out_dir, manifest)
+
+    new_games = new_samples = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_encode_file, path, games) for path, games in tasks]
+        for future in futures:
+            for key, arrays, finished in future.result():
+                if not finished:
+                    continue
+                queued[key] = len(arrays["action"])
+                new_games += 1
+                new_samples += len(arrays["action"])
+                if writer.add(arrays):
+                    commit()
+    writer.close()
+    commit()
+    return new_games, new_samples
+
+
+def load_dataset(out_dir, mmap=True):
+    """ 读取全部分片，返回 [{数组名: ndarray}, ...] (默认内存映射，不整体读入) """
+    manifest = _load_manifest(out_dir)
+    mode = "r" if mmap else None
+    return [{key: np.load(os.path.join(out_dir, f"{shard['name']}-{key}.npy"), mmap_mode=mode) for key in ARRAYS}
+            for shard in manifest["shards"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="录像 -> NumPy 训练数据")
+    parser.add_argument("sources", nargs="+", help="录像文件 (core/replay.py 格式，可用通配符)")
+    parser.add_argument("--out", required=True, help="输出目录 (分片 .npy + manifest.json)")
+    parser.add_argument("--workers", type=int, default=None, help="进程数 (默认 CPU 核数)")
+    parser.add_argument("--shard-size", type=int, default=4096, help="每个分片的样本数")
+    args = parser.parse_args()
+    games, samples = build_dataset(args.sources, args.out, args.workers, args.shard_size)
+    print(f"新增 {games} 局，{samples} 个样本 -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
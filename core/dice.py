@@ -0,0 +1,135 @@
+# core/dice.py
+from functools import lru_cache
+
+from core.state import DICE_SLOTS
+
+# ==========================================
+# 骰子支付 / 重投求解器 (Dice Solver)
+# 骰子池用按 DiceType 计数的向量表示 (与 core/state.py 的 PlayerState.dice 一致)，
+# 费用是 ((DiceRequirementType, count), ...)。求解是贪心 + 对"同色"枚举 7 种元素，
+# 结果按 (骰子池, 费用, 权重) 记忆化，同一回合内反复查询几乎零开销。
+# ==========================================
+
+OMNI = 8                       # DiceType.OMNI
+ELEMENTS = range(1, 8)         # DiceType.CRYO ~ DENDRO，同时也是同名 DiceRequirementType 的取值
+VOID = 0                       # DiceRequirementType.VOID (任意骰)
+ALIGNED = 8                    # DiceRequirementType.ALIGNED (同色骰)
+NON_DICE = (9, 10)             # ENERGY / LEGEND，不消耗骰子
+
+# 花掉一颗骰子的代价：万能骰最珍贵，其余元素骰相同
+DEFAULT_WEIGHTS = (0, 1, 1, 1, 1, 1, 1, 1, 3)
+
+
+def dice_vector(dice):
+    """ DiceType 列表 (整数) -> 长度 9 的计数元组 """
+    counts = [0] * DICE_SLOTS
+    for die in dice:
+        counts[die] += 1
+    return tuple(counts)
+
+
+def weights_for(keep_types=(), keep_weight=2, omni_weight=3):
+    """ 生成权重：keep_types 中的元素 (如出战角色元素) 比其它元素骰更不舍得花 """
+    weights = [0] + [1] * 7 + [omni_weight]
+    for t in keep_types:
+        if t in ELEMENTS:
+            weights[t] = keep_weight
+    return tuple(weights)
+
+
+def normalize_cost(cost):
+    """ 合并同类费用并去掉能量 / 秘传，得到可哈希的规范形式 """
+    merged = {}
+    for req_type, count in cost:
+        if req_type in NON_DICE or count <= 0:
+            continue
+        merged[req_type] = merged.get(req_type, 0) + count
+    return tuple(sorted(merged.items()))
+
+
+def _spend_void(pool, count, weights, used):
+    """ 任意骰：按 (代价, -剩余数量) 从低到高逐颗花，尽量保留稀缺的种类 """
+    for _ in range(count):
+        best = None
+        for t in range(1, DICE_SLOTS):
+            if pool[t] and (best is None or (weights[t], -pool[t]) < (weights[best], -pool[best])):
+                best = t
+        if best is None:
+            return False
+        pool[best] -= 1
+        used.append(best)
+    return True
+
+
+@lru_cache(maxsize=65536)
+def solve_payment(pool, cost, weights=DEFAULT_WEIGHTS):
+    """
+    求代价最小的支付方案。
+    pool  : 长度 9 的计数元组 (dice_vector)
+    cost  : normalize_cost 的结果
+    返回 (used_dice 元组, 总代价)；付不起时返回 None。
+    """
+    base = list(pool)
+    used = []
+    aligned = 0
+    void = 0
+    for req_type, count in cost:
+        if req_type in ELEMENTS:
+            own = min(base[req_type], count)
+            omni = count - own
+            if omni > base[OMNI]:
+                return None
+            base[req_type] -= own
+            base[OMNI] -= omni
+            used.extend([req_type] * own + [OMNI] * omni)
+        elif req_type == ALIGNED:
+            aligned = count
+        elif req_type == VOID:
+            void = count
+
+    best = None
+    # 同色：枚举用哪种元素 (不足部分用万能骰补)，以及全用万能骰；每种方案再贪心付任意骰
+    for element in (list(ELEMENTS) + [OMNI]) if aligned else [None]:
+        trial = list(base)
+        trial_used = list(used)
+        if element is not None:
+            own = min(trial[element], aligned) if element != OMNI else 0
+            omni = aligned - own
+            if omni > trial[OMNI]:
+                continue
+            trial[element] -= own
+            trial[OMNI] -= omni
+            trial_used.extend([element] * own + [OMNI] * omni)
+        if not _spend_void(trial, void, weights, trial_used):
+            continue
+        total = sum(weights[d] for d in trial_used)
+        if best is None or total < best[1]:
+            best = (tuple(sorted(trial_used)), total)
+    return best
+
+
+def solve_table(pool, table, weights=DEFAULT_WEIGHTS):
+    """
+    一次性为候选表 (core/actions.py 的 ActionTable) 里每个合法候选求支付方案。
+    返回 {候选下标: (used_dice, 代价) 或 None}；相同费用只算一次。
+    """
+    return {c.index: solve_payment(pool, normalize_cost(c.cost), weights) for c in table.valid}
+
+
+@lru_cache(maxsize=4096)
+def solve_reroll(pool, keep_types):
+    """
+    重投选择：保留万能骰和 keep_types 中的元素骰，其余全部重投。
+    keep_types 为排好序的元组 (如己方角色 / 技能费用涉及的元素)。
+    返回要重投的 DiceType 元组 (每颗骰子一项，对应 RerollDiceResponse.dice_to_reroll)。
+    """
+    reroll = []
+    for t in range(1, OMNI):
+        if t not in keep_types:
+            reroll.extend([t] * pool[t])
+    return tuple(reroll)
+
+
+def clear_cache():
+    solve_payment.cache_clear()
+    solve_reroll.cache_clear()
@@ -0,0 +1,181 @@
+# core/evaluator.py
+import numpy as np
+
+from core.actions import END, SKILL, SWITCH, TUNING
+from core.state import AURA_TYPES, GameState, enum_int
+
+# ==========================================
+# 预览驱动的行动评估器 (Preview Evaluator)
+# 每个 Action 都带有服务端给出的 PreviewData (执行后会发生的 DamageEM / ApplyAuraEM / ...)。
+# 把每个候选的预览叠加到当前状态得到后继状态 (按 [候选, 玩家, 角色] 排布的数组)，
+# 一次性算出全部候选的特征矩阵，再与可替换的权重向量做点积得到分数，贪心取最高分。
+# ==========================================
+
+FEATURES = (
+    "opp_hp_loss",        # 对手角色总掉血
+    "my_hp_change",       # 己方角色总血量变化 (治疗为正)
+    "my_energy_gain",     # 己方充能变化
+    "opp_energy_change",  # 对手充能变化
+    "opp_defeated",       # 新击倒的对手角色数
+    "my_defeated",        # 新倒下的己方角色数
+    "opp_auras",          # 对手身上的元素附着数
+    "my_auras",           # 己方身上的元素附着数
+    "my_created",         # 己方新建实体 (召唤物 / 状态 / 支援)
+    "opp_removed",        # 对手被移除的实体
+    "dice_spent",         # 需要支付的骰子数 (不含能量 / 秘传)
+    "is_fast",            # 快速行动 (不结束本轮行动)
+    "is_skill",
+    "is_end",             # 宣布回合结束
+    "card_discarded",     # 元素调和弃置的手牌
+    "is_switch",          # 切换出战角色 (预览看不出站位收益)
+)
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURES)}
+
+DEFAULT_WEIGHTS = {
+    "opp_hp_loss": 1.0, "my_hp_change": 1.0, "my_energy_gain": 0.4, "opp_energy_change": -0.3,
+    "opp_defeated": 4.0, "my_defeated": -4.0, "opp_auras": 0.2, "my_auras": -0.2,
+    "my_created": 0.6, "opp_removed": 0.4, "dice_spent": -0.15, "is_fast": 0.1,
+    "is_skill": 0.2, "is_end": -0.5,
+    # 调和 / 切人在预览里通常没有可见收益：只剩骰子与快速行动两项时分数会高于宣布结束，
+    # 这两项负权重保证它们必须靠预览收益才能胜过 declareEnd
+    "card_discarded": -0.8, "is_switch": -0.8,
+}
+
+# 角色变量 (ModifyEntityVarEM.variable_name) -> 后继数组
+_CHAR_VARS = ("health", "energy")
+
+
+def weight_vector(weights=None):
+    """ {特征名: 权重} (缺省项取 DEFAULT_WEIGHTS) -> 与 FEATURES 对齐的数组 """
+    merged = dict(DEFAULT_WEIGHTS)
+    merged.update(weights or {})
+    unknown = set(merged) - set(FEATURES)
+    if unknown:
+        raise ValueError(f"未知特征: {', '.join(sorted(unknown))}")
+    return np.array([merged[name] for name in FEATURES], dtype=np.float64)
+
+
+def _preview_dict(entry):
+    """ PreviewData 可能是 dict (JSON) 或 protobuf 消息 """
+    if isinstance(entry, dict):
+        return entry
+    from google.protobuf.json_format import MessageToDict
+    return MessageToDict(entry)
+
+
+class PreviewEvaluator:
+    """
+    用法:
+        evaluator = PreviewEvaluator()                    # 或 PreviewEvaluator({"opp_hp_loss": 2.0})
+        best = evaluator.best(state, table, who=0)         # state: GameState 或 StateStore.state dict
+    """
+
+    def __init__(self, weights=None):
+        self.weights = weights if isinstance(weights, np.ndarray) else weight_vector(weights)
+
+    def successors(self, state, table, who):
+        """
+        为每个候选生成后继数组。
+        返回 (candidates, base, succ)，base / succ 是 {"health" | "energy" | "aura" | "defeated": 数组}，
+        base 形状 [2, C]，succ 形状 [N, 2, C]；另附 created / removed 两个 [N, 2] 计数。
+        """
+        if not isinstance(state, GameState):
+            state = GameState.from_dict(state)
+        candidates = table.valid
+        n = len(candidates)
+        width = max((p.character_count for p in state.players), default=0)
+        base = {key: np.zeros((2, width), dtype=np.int32) for key in ("health", "energy", "aura", "defeated")}
+        locate = {}
+        for w, p in enumerate(state.players[:2]):
+            count = p.character_count
+            base["health"][w, :count] = p.health
+            base["energy"][w, :count] = p.energy
+            base["aura"][w, :count] = p.aura
+            base["defeated"][w, :count] = p.defeated
+            for i, cid in enumerate(p.char_ids):
+                locate[cid] = (w, i)
+
+        succ = {key: np.repeat(value[None], n, axis=0) for key, value in base.items()}
+        created = np.zeros((n, 2), dtype=np.int32)
+        removed = np.zeros((n, 2), dtype=np.int32)
+
+        for row, candidate in enumerate(candidates):
+            for entry in candidate.preview:
+                for kind, body in _preview_dict(entry).items():
+                    if kind == "damage":
+                        at = locate.get(body.get("targetId"))
+                        if at is not None:
+                            succ["health"][(row,) + at] = body.get("newHealth", 0)
+                            succ["aura"][(row,) + at] = enum_int(body.get("newAura"), AURA_TYPES)
+                            if body.get("causeDefeated"):
+                                succ["defeated"][(row,) + at] = 1
+                    elif kind == "applyAura":
+                        at = locate.get(body.get("targetId"))
+                        if at is not None:
+                            succ["aura"][(row,) + at] = enum_int(body.get("newAura"), AURA_TYPES)
+                    elif kind == "modifyEntityVar":
+                        at = locate.get(body.get("entityId"))
+                        name = body.get("variableName")
+                        if at is not None and name in _CHAR_VARS:
+                            succ[name][(row,) + at] = body.get("variableValue", 0)
+                    elif kind == "createEntity":
+                        created[row, body.get("who", 0) % 2] += 1
+                    elif kind == "removeEntity":
+                        removed[row, body.get("who", 0) % 2] += 1
+        succ["created"] = created
+        succ["removed"] = removed
+        return candidates, base, succ
+
+    def features(self, state, table, who):
+        """ 返回 (candidates, 特征矩阵 [N, len(FEATURES)]) """
+        candidates, base, succ = self.successors(state, table, who)
+        me, opp = who, 1 - who
+        f = np.zeros((len(candidates), len(FEATURES)), dtype=np.float64)
+        if not len(candidates):
+            return candidates, f
+        health, energy = succ["health"], succ["energy"]
+        f[:, 0] = base["health"][opp].sum() - health[:, opp].sum(axis=1)
+        f[:, 1] = health[:, me].sum(axis=1) - base["health"][me].sum()
+        f[:, 2] = energy[:, me].sum(axis=1) - base["energy"][me].sum()
+        f[:, 3] = energy[:, opp].sum(axis=1) - base["energy"][opp].sum()
+        f[:, 4] = succ["defeated"][:, opp].sum(axis=1) - base["defeated"][opp].sum()
+        f[:, 5] = succ["defeated"][:, me].sum(axis=1) - base["defeated"][me].sum()
+        f[:, 6] = (succ["aura"][:, opp] != 0).sum(axis=1)
+        f[:, 7] = (succ["aura"][:, me] != 0).sum(axis=1)
+        f[:, 8] = succ["created"][:, me]
+        f[:, 9] = succ["removed"][:, opp]
+        f[:, 10] = [sum(count for req, count in c.cost if req < 9) for c in candidates]
+        f[:, 11] = [c.is_fast for c in candidates]
+        f[:, 12] = [c.kind == SKILL for c in candidates]
+        f[:, 13] = [c.kind == END for c in candidates]
+        f[:, 14] = [c.kind == TUNING for c in candidates]
+        f[:, 15] = [c.kind == SWITCH for c in candidates]
+        return candidates, f
+
+    def score(self, state, table, who):
+        """ 返回 (candidates, 分数数组) """
+        candidates, f = self.features(state, table, who)
+        return candidates, f @ self.weights
+
+    def best(self, state, table, who):
+        """ 分数最高的合法候选；没有合法候选时返回 None """
+        candidates, scores = self.score(state, table, who)
+        if not len(candidates):
+            return None
+        return candidates[int(np.argmax(scores))]
+
+    def best_many(self, items):
+        """
+        批量版 best：items 为 [(state, table, who), ...]。
+        各局的特征矩阵拼成一个大矩阵，只做一次矩阵乘法，再按段取 argmax。
+        """
+        blocks = [self.features(state, table, who) for state, table, who in items]
+        if not blocks:
+            return []
+        scores = np.concatenate([f for _, f in blocks]) @ self.weights
+        results, start = [], 0
+        for candidates, f in blocks:
+            end = start + len(candidates)
+            results.append(candidates[int(np.argmax(scores[start:end]))] if end > start else None)
+            start = end
+        return results
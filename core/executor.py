@@ -0,0 +1,97 @@
+# core/executor.py
+import asyncio
+import functools
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from core.logs import get_logger
+
+# ==========================================
+# 🧮 决策执行层 (Decision Executor)
+# 把 CPU 密集的决策 (评估 / 搜索 / 拼提示词) 从事件循环里挪出去：
+#   inline  : 直接在事件循环线程里调用 (默认，零开销，适合便宜的策略)
+#   thread  : 线程池 (决策本身释放 GIL 时有用，如 NumPy 大矩阵运算)
+#   process : 进程池，真正并行；参数与返回值需要可 pickle，所以只传紧凑快照
+#             (core/state.py 的 GameState + core/actions.py 的 ActionTable)
+# 每次调用可带截止时间；超时或外层 (ResponseScheduler) 取消时，
+# 还没开始执行的任务直接从池中撤销，已在执行的任务结果被丢弃。
+# 舰队模式下所有 Bot 共用一个执行器。
+# ==========================================
+
+MODES = ("inline", "thread", "process")
+
+log = get_logger("executor")
+
+
+class DecisionExecutor:
+    """
+    用法:
+        executor = DecisionExecutor("process", workers=4)
+        result = await executor.run(greedy_action, snapshot, table, who, deadline=deadline)
+        executor.shutdown()
+    """
+
+    def __init__(self, mode="inline", workers=None, clock=time.monotonic):
+        if mode not in MODES:
+            raise ValueError(f"未知的执行模式: {mode} (可选: {', '.join(MODES)})")
+        self.mode = mode
+        self.workers = workers
+        self.clock = clock
+        self._pool = None
+        self.stats = {"submitted": 0, "completed": 0, "timeouts": 0, "cancelled": 0, "errors": 0}
+
+    def _ensure_pool(self):
+        if self._pool is None:
+            if self.mode == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="decide")
+        return self._pool
+
+    async def run(self, fn, *args, deadline=None, **kwargs):
+        """
+        执行 fn(*args, **kwargs) 并返回结果。
+        deadline 为 clock() 时间轴上的绝对截止时间；超时抛出 asyncio.TimeoutError。
+        """
+        self.stats["submitted"] += 1
+        if self.mode == "inline":
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                self.stats["errors"] += 1
+                raise
+            self.stats["completed"] += 1
+            return result
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._ensure_pool(), functools.partial(fn, *args, **kwargs))
+        try:
+            if deadline is None:
+                result = await future
+            else:
+                result = await asyncio.wait_for(future, timeout=max(0.0, deadline - self.clock()))
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise
+        except asyncio.CancelledError:
+            # run_in_executor 的 future 被取消时会一并撤销池中尚未开始的任务
+            future.cancel()
+            self.stats["cancelled"] += 1
+            raise
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        self.stats["completed"] += 1
+        return result
+
+    def shutdown(self, wait=True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+        log.debug("决策执行器已关闭: %s", self.stats)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
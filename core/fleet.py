@@ -0,0 +1,133 @@
+# core/fleet.py
+import asyncio
+import random
+import time
+
+import httpx
+
+from core.logs import get_logger
+
+# ==========================================
+# 🚢 舰队模式 (Fleet Mode)
+# 在同一个事件循环里同时跑 N 局游戏，共享一个有界连接池
+# ==========================================
+
+DEFAULT_BASE_URL = "http://localhost:3000/api"
+
+log = get_logger("fleet")
+
+
+def create_shared_client(base_url=DEFAULT_BASE_URL, concurrency=1, post_headroom=None):
+    """
+    创建所有 Bot 共享的 httpx 客户端。
+
+    每局游戏会长期占用一条 SSE 连接，所以连接上限 = 并发局数 + 给 POST
+    (建房 / actionResponse) 预留的余量，否则 SSE 会把连接池占满、POST 永远排队。
+    """
+    headroom = post_headroom if post_headroom is not None else max(8, concurrency // 4)
+    limits = httpx.Limits(
+        max_connections=concurrency + headroom,
+        max_keepalive_connections=headroom,
+        keepalive_expiry=30.0,
+    )
+    return httpx.AsyncClient(base_url=base_url, timeout=None, limits=limits)
+
+
+class FleetStats:
+    """ 舰队运行统计 (仅在事件循环内修改，无需加锁) """
+
+    def __init__(self):
+        self.started = 0      # 成功建房并开始监听的次数
+        self.finished = 0     # 正常收到 gameEnd 的局数
+        self.crashed = 0      # 单次运行抛出异常的次数
+        self.restarts = 0     # 监督者重启 Bot 的次数
+        self.failed = 0       # 重启次数耗尽仍未完成的局数
+        self.in_flight = 0    # 当前正在进行的局数
+        self.started_at = time.monotonic()
+
+    def as_dict(self):
+        return {
+            "started": self.started,
+            "finished": self.finished,
+            "crashed": self.crashed,
+            "restarts": self.restarts,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "elapsed": round(time.monotonic() - self.started_at, 2),
+        }
+
+
+class BotFleet:
+    """
+    多房间 Bot 舰队：每个 Bot 拥有独立的房间、Token 和 SSE 流，
+    但共享同一个事件循环和同一个 httpx 连接池。
+
+    bot_factory 需要接受关键字参数 client / base_url / open_debug_link，
+    例如 GenshinTCGBot 或 main.SmartBot；bot_kwargs 会原样透传 (如 codec)。
+    """
+
+    def __init__(self, bot_factory, total_games, concurrency=None, base_url=DEFAULT_BASE_URL,
+                 room_config=None, max_restarts=2, name_prefix="Agent", bot_kwargs=None):
+        self.bot_factory = bot_factory
+        self.bot_kwargs = bot_kwargs or {}
+        self.total_games = total_games
+        self.concurrency = concurrency or total_games
+        self.base_url = base_url
+        self.room_config = room_config
+        self.max_restarts = max_restarts
+        self.name_prefix = name_prefix
+        self.stats = FleetStats()
+        self.client = None
+
+    async def run(self):
+        """ 跑完全部对局后返回统计信息 """
+        self.client = create_shared_client(self.base_url, self.concurrency)
+        slots = asyncio.Semaphore(self.concurrency)
+        log.info("🚢 舰队启动: %d 局 | 并发上限 %d", self.total_games, self.concurrency)
+        try:
+            await asyncio.gather(*(self._supervise(i, slots) for i in range(self.total_games)))
+        finally:
+            await self.client.aclose()
+        log.info("🏁 舰队结束: %s", self.stats.as_dict())
+        return self.stats
+
+    async def _supervise(self, index, slots):
+        """ 单个 Bot 的监督者：崩溃后退避重启，直到完成或重启次数耗尽；退避期间不占并发名额 """
+        name = f"{self.name_prefix}_{index:03d}"
+        attempt = 0
+        while True:
+            async with slots:
+                bot = self.bot_factory(client=self.client, base_url=self.base_url, open_debug_link=False,
+                                       **self.bot_kwargs)
+                try:
+                    if await self._run_once(bot, name):
+                        self.stats.finished += 1
+                        return
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.stats.crashed += 1
+                    log.error("💥 [%s] 运行崩溃: %s", name, e)
+                finally:
+                    await bot.aclose()
+
+            attempt += 1
+            if attempt > self.max_restarts:
+                self.stats.failed += 1
+                log.error("⛔ [%s] 重启 %d 次仍失败，放弃", name, self.max_restarts)
+                return
+            self.stats.restarts += 1
+            # 指数退避 + 抖动，避免几百个 Bot 同时砸向服务器；名额已释放，其他 Bot 可先开局
+            await asyncio.sleep(min(30.0, 2 ** attempt) * (0.5 + random.random()))
+
+    async def _run_once(self, bot, name):
+        """ 建房并监听到游戏结束；返回是否正常结束 """
+        if not await bot.login_guest(name=name, custom_config=self.room_config):
+            return False
+        self.stats.started += 1
+        self.stats.in_flight += 1
+        try:
+            await bot.listen_to_game()
+        finally:
+            self.stats.in_flight -= 1
+        return bot.game_finished
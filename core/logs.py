@@ -0,0 +1,137 @@
+# core/logs.py
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+
+# ==========================================
+# 📝 结构化日志 (Structured Logging)
+# 事件循环里只把 LogRecord 放进队列，格式化与终端写入都在 QueueListener 的后台线程完成；
+# 级别未开启时连参数都不会被格式化。每条记录带 room / player / rpc 上下文。
+# colorama 只在创建彩色 Formatter (即 setup_logging) 时才导入。
+# ==========================================
+
+LOGGER_NAME = "AGCAgent"
+
+
+def _level_colors():
+    """ 日志级别 -> 终端颜色 """
+    from colorama import Fore, Style
+
+    return {
+        logging.DEBUG: Fore.BLUE,
+        logging.INFO: Fore.CYAN,
+        logging.WARNING: Fore.YELLOW,
+        logging.ERROR: Fore.RED,
+        logging.CRITICAL: Fore.RED + Style.BRIGHT,
+    }, Style.RESET_ALL
+
+
+_listener = None
+
+
+def get_logger(name=None):
+    """ 取 AGCAgent 命名空间下的 logger (name 为子模块名，如 "fleet") """
+    return logging.getLogger(f"{LOGGER_NAME}.{name}" if name else LOGGER_NAME)
+
+
+class LazyJson:
+    """ 作为日志参数使用：只有记录真正被输出时才执行 json.dumps """
+    __slots__ = ("obj",)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __str__(self):
+        return json.dumps(self.obj, ensure_ascii=False, separators=(",", ":"))
+
+
+class BotLogAdapter(logging.LoggerAdapter):
+    """
+    绑定到某个 Bot 的 logger：room / player 在每次输出时从 bot 上读取 (建房后才有)，
+    rpc 由调用方通过 rpc= 关键字传入。bot 为 None 时只带 rpc 上下文。
+        bot.log.info("发送响应", rpc=3)
+    """
+
+    def __init__(self, bot=None, logger=None):
+        super().__init__(logger or get_logger("bot"), {})
+        self.bot = bot
+
+    def process(self, msg, kwargs):
+        extra = kwargs.setdefault("extra", {})
+        extra["room"] = getattr(self.bot, "room_id", None)
+        extra["player"] = getattr(self.bot, "player_id", None)
+        extra["rpc"] = kwargs.pop("rpc", None)
+        return msg, kwargs
+
+
+class ContextFormatter(logging.Formatter):
+    """ 时间 + 级别色 + [room/player#rpc] 前缀；没有上下文的记录只输出消息本身 """
+
+    def __init__(self, color=True):
+        super().__init__("%(asctime)s %(message)s", datefmt="%H:%M:%S")
+        self.color = color
+        self.colors, self.reset = _level_colors() if color else ({}, "")
+
+    def format(self, record):
+        context = ""
+        room = getattr(record, "room", None)
+        rpc = getattr(record, "rpc", None)
+        if room is not None:
+            context = f"[{room}/{getattr(record, 'player', None)}"
+            context += f"#{rpc}] " if rpc is not None else "] "
+        elif rpc is not None:
+            context = f"[#{rpc}] "
+        line = super().format(record)
+        stamp, _, message = line.partition(" ")
+        line = f"{stamp} {context}{message}"
+        if self.color:
+            line = self.colors.get(record.levelno, "") + line + self.reset
+        return line
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    标准 QueueHandler.prepare 会在调用线程里先 format 一遍；这里跳过，
+    把 msg % args 和格式化都留给监听线程。日志参数在记录后不应再被修改。
+    """
+
+    def prepare(self, record):
+        if record.exc_info and not record.exc_text:
+            # 异常对象不可跨线程延后格式化 (traceback 可能已被释放)
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(level="INFO", stream=None, color=True):
+    """
+    安装队列化日志：AGCAgent logger -> SimpleQueue -> 后台线程 -> stream。
+    重复调用只会调整级别。返回 QueueListener。
+    """
+    global _listener
+    logger = get_logger()
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    if _listener is not None:
+        return _listener
+
+    records = queue.SimpleQueue()
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(ContextFormatter(color=color))
+    logger.addHandler(DeferredQueueHandler(records))
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    """ 刷新队列并停止后台线程 (进程退出时自动调用) """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,248 @@
+# core/metrics.py
+import os
+import time
+from bisect import bisect_left
+
+# ==========================================
+# 📊 运行指标 (Metrics)
+# 进程内的计数器 / 直方图 / 实时量，由 web_ui/server.py 以 Prometheus 文本格式与 JSON 暴露。
+#   - 计数器只是一次字典加法，始终开启；
+#   - 需要计时的埋点 (解码、决策、POST) 先看 METRICS.active：只有最近 idle_after 秒内有人抓取过
+#     才调用 perf_counter 并落桶，没人看时热路径上只多一次属性读取；
+#   - 实时量 (在途对局、RSS) 在抓取时才计算。
+# 写入都发生在 Bot 的事件循环线程里；抓取线程只复制快照 (dict / list 复制在 GIL 下是原子的)。
+# 用法:
+#   if METRICS.active:
+#       start = time.perf_counter(); ...; DECODE_SECONDS.observe(time.perf_counter() - start)
+#   EVENTS.inc("rpc")
+# ==========================================
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(label_name, value, extra=""):
+    parts = [f'{label_name}="{_escape(value)}"'] if label_name and value is not None else []
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Counter:
+    """ 单调递增计数；可带一个标签 (label 为标签名，inc 时传标签值) """
+    kind = "counter"
+
+    def __init__(self, name, help, label=None):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.values = {}
+
+    def inc(self, label_value=None, value=1):
+        self.values[label_value] = self.values.get(label_value, 0) + value
+
+    def samples(self):
+        return [(self.name + _labels(self.label, k), v) for k, v in sorted(self.values.copy().items(), key=_key)]
+
+    def as_dict(self):
+        values = self.values.copy()
+        return values.get(None, 0) if self.label is None else {str(k): v for k, v in values.items()}
+
+
+class Gauge:
+    """ 当前值：inc / dec / set，或给出 fn 在抓取时计算 (返回 None 表示该平台不可用) """
+    kind = "gauge"
+
+    def __init__(self, name, help, fn=None):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.value = 0
+
+    def inc(self, value=1):
+        self.value += value
+
+    def dec(self, value=1):
+        self.value -= value
+
+    def set(self, value):
+        self.value = value
+
+    def get(self):
+        return self.fn() if self.fn is not None else self.value
+
+    def samples(self):
+        value = self.get()
+        return [] if value is None else [(self.name, value)]
+
+    def as_dict(self):
+        return self.get()
+
+
+class Histogram:
+    """ 固定分桶直方图 (秒)；桶内计数非累积存放，输出 Prometheus 格式时再累加 """
+    kind = "histogram"
+
+    def __init__(self, name, help, label=None, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = tuple(buckets)
+        self.series = {}    # 标签值 -> [各桶计数 (末位为 +Inf), 总和, 次数]
+
+    def observe(self, value, label_value=None):
+        series = self.series.get(label_value)
+        if series is None:
+            series = self.series[label_value] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def _snapshot(self):
+        return sorted(((k, (list(s[0]), s[1], s[2])) for k, s in self.series.copy().items()), key=_key)
+
+    def samples(self):
+        out = []
+        for label_value, (counts, total, count) in self._snapshot():
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                out.append((self.name + "_bucket" + _labels(self.label, label_value, f'le="{le}"'), cumulative))
+            out.append((self.name + "_sum" + _labels(self.label, label_value), total))
+            out.append((self.name + "_count" + _labels(self.label, label_value), count))
+        return out
+
+    def as_dict(self):
+        """ {标签值: {count, mean_ms, p50_ms, p95_ms, p99_ms}}；分位数取桶上界 """
+        out = {}
+        for label_value, (counts, total, count) in self._snapshot():
+            summary = {"count": count, "mean_ms": total / count * 1000 if count else None}
+            for q in (50, 95, 99):
+                summary[f"p{q}_ms"] = self._quantile(counts, count, q / 100)
+            out["all" if label_value is None else str(label_value)] = summary
+        return out
+
+    def _quantile(self, counts, count, q):
+        if not count:
+            return None
+        rank, seen = q * count, 0
+        for bound, n in zip(self.buckets, counts):
+            seen += n
+            if seen >= rank:
+                return bound * 1000
+        return float("inf")
+
+
+def _key(item):
+    return "" if item[0] is None else str(item[0])
+
+
+class Metrics:
+    """ 指标注册表；active 由抓取方维护 (mark_scraped / expire) """
+
+    def __init__(self, idle_after=60.0, clock=time.monotonic):
+        self.active = False
+        self.idle_after = idle_after
+        self.clock = clock
+        self.last_scrape = None
+        self.metrics = {}
+        self._rate_base = None     # JSON 抓取之间计算 events/s 用
+
+    def _register(self, metric):
+        return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, label=None):
+        return self._register(Counter(name, help, label))
+
+    def gauge(self, name, help, fn=None):
+        return self._register(Gauge(name, help, fn))
+
+    def histogram(self, name, help, label=None, buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, label, buckets))
+
+    def mark_scraped(self):
+        self.last_scrape = self.clock()
+        self.active = True
+
+    def expire(self):
+        """ 超过 idle_after 秒没人抓取就关闭计时埋点 (由抓取方定期调用) """
+        if self.active and (self.last_scrape is None or self.clock() - self.last_scrape > self.idle_after):
+            self.active = False
+
+    def render_prometheus(self):
+        self.mark_scraped()
+        lines = []
+        for metric in list(self.metrics.values()):
+            samples = metric.samples()
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name} {value}" for name, value in samples)
+        return "\n".join(lines) + "\n"
+
+    def as_dict(self):
+        """ JSON 视图；额外给出与上一次 JSON 抓取之间的 events/s """
+        self.mark_scraped()
+        data = {name: metric.as_dict() for name, metric in list(self.metrics.items())}
+        now, events = self.clock(), sum(EVENTS.values.copy().values())
+        rate = None
+        if self._rate_base is not None and now > self._rate_base[0]:
+            rate = (events - self._rate_base[1]) / (now - self._rate_base[0])
+        self._rate_base = (now, events)
+        data["events_per_sec"] = rate
+        data["timing_active"] = self.active
+        return data
+
+
+def process_rss():
+    """ 当前进程常驻内存 (字节)；Linux 读 /proc，其余平台退回峰值 RSS，都不可用时返回 None """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        return None
+
+
+def _rss_per_bot():
+    rss = process_rss()
+    return None if rss is None else rss / max(1, GAMES_IN_FLIGHT.value)
+
+
+METRICS = Metrics()
+
+EVENTS = METRICS.counter("agc_sse_events_total", "解码后的 SSE 事件数 (按事件类型)", label="type")
+EVENT_BYTES = METRICS.counter("agc_sse_bytes_total", "收到的 SSE data 字节数")
+DECODE_SECONDS = METRICS.histogram("agc_decode_seconds", "单个 SSE 事件的解码耗时 (仅在有人抓取时计时)",
+                                   buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+                                            0.005, 0.01, 0.05))
+DECISION_SECONDS = METRICS.histogram("agc_decision_seconds", "调度器内决策耗时 (按 RPC 类型，仅在有人抓取时计时)",
+                                     label="kind")
+DECISIONS = METRICS.counter("agc_decisions_total", "已发送的响应 (decided / fallback / late)", label="outcome")
+POST_SECONDS = METRICS.histogram("agc_post_seconds", "actionResponse POST 往返耗时 (仅在有人抓取时计时)")
+POST_FAILURES = METRICS.counter("agc_post_failures_total", "actionResponse 发送失败 (按状态码或异常类型)",
+                                label="reason")
+RECONNECTS = METRICS.counter("agc_reconnects_total", "SSE 断线重连次数")
+GAMES_IN_FLIGHT = METRICS.gauge("agc_games_in_flight", "正在监听事件流的对局数")
+PROCESS_RSS = METRICS.gauge("agc_process_rss_bytes", "进程常驻内存", fn=process_rss)
+RSS_PER_BOT = METRICS.gauge("agc_rss_per_bot_bytes", "进程常驻内存 / 在途对局数", fn=_rss_per_bot)
+SPECTATORS = METRICS.gauge("agc_spectators", "当前连接到观战推送 (/feed) 的观众数")
+FEED_FRAMES = METRICS.counter("agc_feed_frames_total", "观战推送编码的帧数 (每帧只编码一次，按类型)", label="kind")
+FEED_DROPPED = METRICS.counter("agc_feed_dropped_total", "观众缓冲中被丢弃的帧 (stale = 被新局面替换，overflow = 超出上限)",
+                               label="reason")
+RAW_QUEUE_DEPTH = METRICS.gauge("agc_pipeline_raw_depth", "事件流水线：等待解码的原始 SSE data 条数 (所有 Bot 合计)")
+EVENT_QUEUE_DEPTH = METRICS.gauge("agc_pipeline_event_depth", "事件流水线：等待状态更新的已解码事件数 (所有 Bot 合计)")
+READER_STALLS = METRICS.counter("agc_pipeline_reader_stalls_total", "事件流水线：读取段因 raw 队列已满而等待的次数")
+DECIDER_COALESCED = METRICS.counter("agc_pipeline_coalesced_total",
+                                    "事件流水线：决策段尚未处理上一次唤醒时又到达、被合并掉的唤醒数")
@@ -1,47 +1,27 @@
-import sys
 import os
 import asyncio
 import json
+import random
+import time
 import httpx
-from httpx_sse import aconnect_sse
-import logging
-import webbrowser # 用于自动打开浏览器
-from colorama import Fore, Style, init
+from httpx_sse import SSEError, aconnect_sse
 
 # ==========================================
-# 🛠️ 环境与路径配置
+# 导入本模块没有副作用：不改 sys.path、不初始化 colorama、不打印。
+# Protobuf 编译产物由 core/protos.py 在第一次解码时加载，
+# 调试网页 / 浏览器只在显式调用 generate_debug_link 时才用到。
 # ==========================================
-# 获取当前文件所在路径 (core/)
-current_file_path = os.path.abspath(__file__)
-# 获取项目根路径 (Genshin_Agent/)
-project_root = os.path.dirname(os.path.dirname(current_file_path))
-# 定位 Proto 编译文件夹
-proto_dir = os.path.join(project_root, "proto_compiled")
 
-# 将路径加入 sys.path 以便导入
-sys.path.insert(0, proto_dir)
-sys.path.insert(1, project_root)
-
-# 初始化彩色输出
-init(autoreset=True)
-
-# ==========================================
-# 🧬 协议加载 (Proto)
-# ==========================================
-try:
-    # 尝试导入编译好的 Proto 文件
-    # 注意：根据实际生成的文件名可能需要调整 (例如 server_notification_pb2)
-    import notification_pb2
-    import state_pb2
-    from google.protobuf.json_format import MessageToDict
-    print(Fore.GREEN + "✅ Proto 协议库加载成功")
-except ImportError as e:
-    print(Fore.RED + f"⚠️ Proto 加载警告: {e}")
-    print(Fore.YELLOW + "   (将在无 Proto 解析模式下运行，仅显示原始数据)")
-
-# 配置日志
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
-logger = logging.getLogger("AGCAgent")
+from core.codec import JsonCodec
+from core.parser import StateStore
+from core.pipeline import EventPipeline
+from core.scheduler import ResponseScheduler, fallback_response, request_kind
+from core.serializer import Serializer
+from core.logs import BotLogAdapter, LazyJson
+from core.metrics import (DECODE_SECONDS, EVENT_BYTES, EVENTS, GAMES_IN_FLIGHT, METRICS, POST_FAILURES,
+                          POST_SECONDS, RECONNECTS)
+from core.spectate import FEED
+from core.state import viewer_index
 
 # ==========================================
 # 🃏 黄金卡组 (Golden Deck) - Ver 24
@@ -58,18 +38,62 @@ SAMPLE_DECK = {
     ]
 }
 
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """ 指数退避 + 抖动：base * 2^(attempt-1)，上限 cap，乘以 [0.5, 1.5) 的随机系数 """
+    return min(cap, base * 2 ** (attempt - 1)) * (0.5 + random.random())
+
 class GenshinTCGBot:
-    def __init__(self, base_url="http://localhost:3000/api"):
+    def __init__(self, base_url="http://localhost:3000/api", client=None, open_debug_link=True, codec=None,
+                 stall_timeout=15.0, max_reconnects=8, recorder=None, queue_size=256):
         self.base_url = base_url
-        self.client = httpx.AsyncClient(base_url=base_url, timeout=None)
+        # SSE 事件编解码器 (json / proto-json / proto)，见 core/codec.py
+        self.codec = codec or JsonCodec()
+        # 对局录像 (core/replay.py)：包装编解码器，解码时顺带追加到录像文件；发出的响应也一并记录
+        self.recorder = recorder
+        if recorder is not None:
+            self.codec = recorder.wrap(self.codec, self.game_key)
+        # 舰队模式下由 BotFleet 注入共享连接池；单机模式下自己创建并负责关闭
+        self._owns_client = client is None
+        self.client = client if client is not None else httpx.AsyncClient(base_url=base_url, timeout=None)
+        # generate_debug_link 写出调试网页后是否自动打开浏览器 (批量运行时不应每个 Bot 都弹出)
+        self.open_debug_link = open_debug_link
         self.token = None
         self.player_id = None
         self.room_id = None
         # [新增] 用于记忆最近的战场状态，以便查询 Entity ID
         self.latest_state = None
+        # 增量状态引擎：用 mutation 维护常驻模型，latest_state 始终指向它
+        self.state_store = StateStore()
+        self.last_delta = None
+        # 带 room / player / rpc 上下文的日志 (队列化输出，见 core/logs.py)
+        self.log = BotLogAdapter(self)
+        # RPC 响应调度：按房间计时参数计算截止时间，超时前保证发出兜底响应
+        self.scheduler = ResponseScheduler(log=self.log)
+        # 收到 gameEnd 后置位，listen_to_game 据此退出而不是重连；winner 为 gameEnd.winPlayerId
+        self.game_finished = False
+        self.winner = None
+        # SSE 断线恢复：静默判定时长、最大连续重连次数、续传位置
+        self.stall_timeout = stall_timeout
+        self.max_reconnects = max_reconnects
+        self.last_event_id = None
+        self.reconnects = 0
+        # 事件流水线 (core/pipeline.py) 每段之间队列的容量；pending_rpc 为待决策段处理的 rpc 事件
+        self.queue_size = queue_size
+        self.pending_rpc = None
+
+    def game_key(self):
+        """ 录像中的对局 id """
+        return f"{self.room_id}/{self.player_id}"
+
+    async def aclose(self):
+        """ 释放连接 (共享连接池由 BotFleet 统一关闭) """
+        if self._owns_client:
+            await self.client.aclose()
+
     def generate_debug_link(self):
         """
         生成一个 HTML 文件，双击打开后会自动写入 Token 并跳转到前端页面 (5173)。
+        只在交互模式下显式调用 (login_guest 不再自动生成)；open_debug_link 为真时顺带打开浏览器。
         """
         if not self.room_id or not self.token:
             return
@@ -122,17 +146,19 @@ class GenshinTCGBot:
         try:
             with open(file_path, "w", encoding="utf-8") as f:
                 f.write(html_content)
-            print(Fore.CYAN + f"\n🐛 [调试神器] AI 视角入口已生成: {filename}")
-            print(Fore.CYAN + f"👉 双击文件或访问: file:///{file_path.replace(os.sep, '/')}\n")
+            self.log.info("🐛 [调试神器] AI 视角入口已生成: %s", filename)
+            self.log.info("👉 双击文件或访问: file:///%s", file_path.replace(os.sep, '/'))
             
             # [新增] 自动在默认浏览器中打开
-            webbrowser.open('file://' + file_path) 
+            if self.open_debug_link:
+                import webbrowser
+                webbrowser.open('file://' + file_path)
             
         except Exception as e:
-            print(Fore.RED + f"❌ 生成调试文件失败: {e}")
+            self.log.error("❌ 生成调试文件失败: %s", e)
 
     async def login_guest(self, name="Agent_001", custom_config=None):
-        print(Fore.YELLOW + f"🚀 正在发起连接... [Target: {self.base_url}]")
+        self.log.info("🚀 正在发起连接... [Target: %s]", self.base_url)
         
         # 1. 定义平铺的基础配置 (Flattened Config)
         # 根据 RoomDialog.tsx，这些必须直接放在根节点
@@ -162,6 +188,7 @@ class GenshinTCGBot:
         if custom_config:
             # 注意：custom_config 里的键名必须也是 initTotalActionTime 这种
             payload.update(custom_config)
+        self.scheduler.configure(payload)
 
         try:
             # 发送请求
@@ -177,74 +204,129 @@ class GenshinTCGBot:
                 room_info = data.get("room", {})
                 self.room_id = room_info.get("id") if room_info else data.get("roomId")
                 
-                print(Fore.GREEN + f"✅ 房间创建成功!")
-                print(Fore.CYAN + f"   🏠 Room ID: {self.room_id}")
-                print(Fore.CYAN + f"   👤 Player ID: {self.player_id}")
-                print(Fore.CYAN + f"   🔑 Token: {self.token}")
-                
-                # 生成调试网页
-                self.generate_debug_link()
-
+                self.log.info("✅ 房间创建成功! 🏠 Room ID: %s | 👤 Player ID: %s", self.room_id, self.player_id)
+                self.log.debug("   🔑 Token: %s", self.token)
                 return True
             
             else:
                 # 失败处理：打印服务端返回的详细错误
-                print(Fore.RED + f"❌ 创建房间失败 (Code {resp.status_code})")
-                print(Fore.RED + f"   Server Says: {resp.text}")
+                self.log.error("❌ 创建房间失败 (Code %s) Server Says: %s", resp.status_code, resp.text)
                 return False
 
         except httpx.ConnectError:
-            print(Fore.RED + "❌ 连接被拒绝: 请确保 'npm run start' 或 'bun dev' 正在运行")
+            self.log.error("❌ 连接被拒绝: 请确保 'npm run start' 或 'bun dev' 正在运行")
             return False
         except Exception as e:
-            print(Fore.RED + f"💥 发生未知错误: {e}")
+            self.log.error("💥 发生未知错误: %s", e)
+            return False
+
+    async def join_room(self, room_id, name="Agent_002", deck=None):
+        """ 以第二名玩家加入已有房间 (自对弈用)：POST /rooms/{id}/players，返回是否成功 """
+        payload = {"name": name, "deck": deck or SAMPLE_DECK}
+        try:
+            resp = await self.client.post(f"/rooms/{room_id}/players", json=payload, timeout=10.0)
+        except httpx.HTTPError as e:
+            self.log.error("❌ 加入房间 %s 失败: %s", room_id, e)
+            return False
+        if resp.status_code not in (200, 201):
+            self.log.error("❌ 加入房间 %s 失败 (Code %s) Server Says: %s", room_id, resp.status_code, resp.text)
             return False
+        data = resp.json()
+        self.token = data.get("accessToken")
+        self.player_id = data.get("playerId")
+        self.room_id = room_id
+        self.log.info("✅ 已加入房间 🏠 Room ID: %s | 👤 Player ID: %s", self.room_id, self.player_id)
+        return True
 
     async def listen_to_game(self):
-        """ 监听 SSE 事件流 (Server-Sent Events) """
+        """
+        监听 SSE 事件流 (Server-Sent Events)，断线自动恢复：
+        - 指数退避 + 抖动重连，收到事件后重置计数；
+        - 带上 Last-Event-ID，服务端支持时从断点续传；
+        - 读超时即静默检测：stall_timeout 秒内没有任何字节 (含心跳注释) 就主动重连；
+        - 重连后丢弃增量模型，从下一条完整 Notification 重新同步；
+        - 读取、解码、状态更新、决策分段并行 (core/pipeline.py)，决策 + POST 期间链路照常读取。
+        """
         if not self.token or not self.room_id:
-            print(Fore.RED + "❌ 缺少 Token 或 RoomID，无法监听")
+            self.log.error("❌ 缺少 Token 或 RoomID，无法监听")
             return
+        GAMES_IN_FLIGHT.inc()
+        pipeline = EventPipeline(self.decode_event, self.apply_event, self.decide, self.queue_size, log=self.log)
+        try:
+            await pipeline.run(self._listen, until=lambda: self.game_finished)
+        finally:
+            GAMES_IN_FLIGHT.dec()
+
+    async def _listen(self, pipeline):
+        """ 流水线的读取段：只读链路并把 data 交给 pipeline.put，解码 / 状态 / 决策都在后面的段里 """
 
         # SSE URL 拼接
         sse_path = f"/rooms/{self.room_id}/players/{self.player_id}/notification"
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Accept": "text/event-stream"
-        }
-
-
-        print(Fore.YELLOW + f"📡 正在接入神经链路 (SSE)...")
-        print(Fore.MAGENTA + f"   Endpoint: {sse_path}")
-
-        retry_count = 0
-        max_retries = 3
-
-        while retry_count < max_retries:
+        self.log.info("📡 正在接入神经链路 (SSE)... Endpoint: %s", sse_path)
+
+        # 长连接不设总超时，只限制单次读等待的时长；pool=None 让舰队模式下排队等连接
+        timeout = httpx.Timeout(10.0, read=self.stall_timeout, pool=None)
+        attempt = 0
+
+        while not self.game_finished:
+            headers = {
+                "Authorization": f"Bearer {self.token}",
+                "Accept": "text/event-stream"
+            }
+            if self.last_event_id is not None:
+                headers["Last-Event-ID"] = self.last_event_id
             try:
-                # timeout=None 告诉 httpx：这条线是长连接，永远不要因为没数据而挂断
-                async with aconnect_sse(self.client, "GET", sse_path, headers=headers, timeout=None) as event_source:
-                    print(Fore.GREEN + "✅ 链路已建立，等待数据流...")
+                async with aconnect_sse(self.client, "GET", sse_path, headers=headers, params=self.codec.sse_params, timeout=timeout) as event_source:
+                    status = event_source.response.status_code
+                    if status in (401, 403, 404):
+                        self.log.error("❌ 链路被拒绝 (Code %s)，房间可能已关闭", status)
+                        return
+                    event_source.response.raise_for_status()
+                    self.log.info("✅ 链路已建立，等待数据流...")
                     
                     async for sse in event_source.aiter_sse():
-                        # 打印原始事件类型
-                        print(Fore.BLUE + f"📩 [Event: {sse.event}] Size: {len(sse.data)} bytes")
+                        attempt = 0
+                        if sse.id:
+                            self.last_event_id = sse.id
+                        # 原始事件类型 (DEBUG 级别，热路径上默认不格式化)
+                        self.log.debug("📩 [Event: %s] Size: %d bytes", sse.event, len(sse.data))
                         
                         if sse.event == "message":
-                            await self.handle_game_event(sse.data)
+                            await pipeline.put(sse.data)
                         elif sse.event == "error":
-                            print(Fore.RED + f"⚠️ Server Error Event: {sse.data}")
-                            
+                            self.log.warning("⚠️ Server Error Event: %s", sse.data)
+
+                        if self.game_finished:
+                            return
+                # gameEnd 可能还在流水线里：处理完已收到的事件再判断是不是意外断开
+                await pipeline.flush()
+                if self.game_finished:
+                    return
+                self.log.warning("⚠️ 服务端关闭了链路 (未收到 gameEnd)")
+
             except httpx.ReadTimeout:
-                print(Fore.YELLOW + "⚠️ 心跳超时，正在重连...")
-                retry_count += 1
-            except Exception as e:
-                print(Fore.RED + f"❌ 监听中断: {e}")
-                break
+                self.log.warning("⚠️ %.0f 秒内没有任何数据，判定链路静默", self.stall_timeout)
+            except (httpx.HTTPError, SSEError) as e:
+                self.log.warning("⚠️ 链路中断: %s", e)
+            # 丢弃增量模型之前先把断线前收到的事件应用完
+            await pipeline.flush()
+
+            attempt += 1
+            if attempt > self.max_reconnects:
+                self.log.error("❌ 连续重连 %d 次失败，放弃监听", self.max_reconnects)
+                return
+            self.reconnects += 1
+            RECONNECTS.inc()
+            # 断线期间可能漏掉 mutation，等下一份完整快照再恢复增量更新
+            self.state_store.reset()
+            delay = backoff_delay(attempt)
+            self.log.info("🔁 %.1f 秒后第 %d 次重连 (Last-Event-ID: %s)", delay, attempt, self.last_event_id)
+            await asyncio.sleep(delay)
+
     async def send_action(self, payload):
         # 必须同时有 Token, RoomID 和 PlayerID 才能发送
         if not self.token or not self.room_id or not self.player_id:
-            print(Fore.RED + "❌ 无法发送指令: 缺少必要连接信息")
+            self.log.error("❌ 无法发送指令: 缺少必要连接信息")
             return False
 
         # ✅ 修正：使用你抓包得到的正确路径
@@ -255,136 +337,179 @@ class GenshinTCGBot:
             "Content-Type": "application/json"
         }
 
-        print(Fore.YELLOW + f"📤 正在发送指令 Payload: {json.dumps(payload, indent=None)}")
+        rpc_id = payload.get("id")
+        self.log.debug("📤 正在发送指令 Payload: %s", LazyJson(payload), rpc=rpc_id)
+        if self.recorder is not None:
+            envelope = {"type": "response", "id": rpc_id, "data": payload.get("response", {})}
+            self.recorder.record(self.game_key(), "response", rpc_id, json.dumps(envelope, separators=(",", ":")))
 
+        if FEED.active:
+            FEED.publish_event(self.game_key(), "decision", {"rpc": rpc_id, "response": payload.get("response")})
+
+        start = time.perf_counter() if METRICS.active else None
         try:
             # 发送响应
             resp = await self.client.post(url, json=payload, headers=headers, timeout=5.0)
+            if start is not None:
+                POST_SECONDS.observe(time.perf_counter() - start)
             
             if resp.status_code == 200 or resp.status_code == 201:
-                print(Fore.GREEN + f"✅ 指令发送成功!")
+                self.log.info("✅ 指令发送成功!", rpc=rpc_id)
                 return True
             else:
-                print(Fore.RED + f"❌ 指令发送失败 ({resp.status_code}) URL: {resp.url}")
-                print(Fore.RED + f"   Server Says: {resp.text}")
+                POST_FAILURES.inc(resp.status_code)
+                self.log.error("❌ 指令发送失败 (%s) URL: %s Server Says: %s",
+                               resp.status_code, resp.url, resp.text, rpc=rpc_id)
                 return False
         except Exception as e:
-            print(Fore.RED + f"💥 发送异常: {e}")
+            POST_FAILURES.inc(type(e).__name__)
+            self.log.error("💥 发送异常: %s", e, rpc=rpc_id)
             return False
-    async def handle_game_event(self, raw_data):
-        """ 战术仪表盘：解析并清洗战场数据 """
-        try:
-            if not raw_data.startswith("{"):
-                return
-
-            event = json.loads(raw_data)
-            evt_type = event.get("type")
-            evt_data = event.get("data", {})
-
-            # ==========================================
-            # 1. 🔍 侦测游戏结束原因 (为何判负?)
-            # ==========================================
-            if evt_type == "gameEnd":
-                winner = evt_data.get("winPlayerId")
-                reason = evt_data.get("reason", "Unknown") # 获取判负原因
-                print(Fore.RED + "="*50)
-                print(Fore.RED + f"🏁 游戏结束! 获胜者: {winner}")
-                print(Fore.RED + f"❓ 结束原因/判负理由: {reason}")
-                print(Fore.RED + "="*50)
-                return
-
-            # ==========================================
-            # 2. ⚡ 核心逻辑：响应 RPC 请求
-            # ==========================================
-            if evt_type == "rpc":
-                rpc_id = evt_data.get("id")
-                print(Fore.RED + f"⚡⚡⚡ [收到指令] Server 要求操作 | RPC ID: {rpc_id} ⚡⚡⚡")
-                
-                response_payload = None
-
-                # --- RPC 0: 换牌 (Mulligan) ---
-                if rpc_id == 0:
-                    print(Fore.YELLOW + "🤖 [AI] 决定不换牌 (Keep All)")
-                    response_payload = {
-                        "id": rpc_id,
-                        "response": {"switchHands": {"removedHandIds": []}}
-                    }
-
-                # --- RPC 1: 选首发 (Select Active) ---
-                elif rpc_id == 1:
-                    print(Fore.RED + "🤖 [AI] 正在计算最佳首发角色...")
-                    
-                    # 🎯 关键修复：从 State 中查找 Entity ID
-                    target_def_id = 1112  # 我们想选的神里绫华/第一个角色
-                    target_entity_id = None
-
-                    if self.latest_state:
-                        # 遍历我的角色列表，找到 definitionId 为 1112 的那个实体的 id
-                        players = self.latest_state.get("player", [])
-                        # 简单判定我是哪个 (假设我是 Guest/P1，或者根据 socket 里的 player ID 匹配)
-                        # 这里做一个简化的遍历：在所有玩家的所有角色里找，通常自己的角色 ID 较小
-                        for p in players:
-                            for char in p.get("character", []):
-                                if char.get("definitionId") == target_def_id:
-                                    target_entity_id = char.get("id")
-                                    print(Fore.GREEN + f"   🔍 找到角色 {target_def_id} -> 实体ID: {target_entity_id}")
-                                    break
-                            if target_entity_id: break
-                    
-                    # 如果没找到状态（比如第一帧），降级使用 Definition ID
-                    final_id = target_entity_id if target_entity_id else target_def_id
-                    
-                    response_payload = {
-                        "id": rpc_id,
-                        "response": {
-                            "setup": {
-                                "characterId": final_id 
-                            }
-                        }
-                    }
-
-                # --- 发送响应 ---
-                if response_payload:
-                    print(Fore.YELLOW + f"🚀 发送响应 RPC {rpc_id}: {response_payload}")
-                    asyncio.create_task(self.send_action(response_payload))
-                
-                return
 
-            # ==========================================
-            # 3. 📥 更新状态 (Notification)
-            # ==========================================
-            if evt_type == "notification":
-                state = evt_data.get("state", {})
-                if state:
-                    self.latest_state = state  # <--- [新增] 记忆状态
-                    
-                    # 打印一些调试信息
-                    phase = state.get("phase")
-                    print(Fore.BLUE + f"ℹ️ [状态更新] Phase: {phase}")
+    def decode_event(self, raw_data):
+        """ 解码一条 SSE data 并计入指标 (解码计时只在有人抓取指标时进行) """
+        EVENT_BYTES.inc(value=len(raw_data))
+        if METRICS.active:
+            start = time.perf_counter()
+            event = self.codec.decode(raw_data)
+            DECODE_SECONDS.observe(time.perf_counter() - start)
+        else:
+            event = self.codec.decode(raw_data)
+        if event is not None:
+            EVENTS.inc(event.type)
+        return event
+
+    def publish_state(self):
+        """ 有观众时把当前局面摘要交给观战推送 (core/spectate.py)；摘要只含标量，序列化在监控服务线程里做 """
+        state = self.state_store.state
+        if FEED.active and state:
+            FEED.publish_state(self.game_key(), StateStore.summary(state), viewer_index(state))
+
+    def publish_end(self, winner, reason=None):
+        if FEED.active:
+            FEED.publish_event(self.game_key(), "end", {"winner": winner, "reason": reason})
 
-            elif evt_type == "gameStart":
-                print(Fore.GREEN + "✨✨✨ 游戏正式开始! ✨✨✨")
-            
-            elif evt_type == "oppTimer":
-                pass 
-            
-            else:
-                pass
+    async def handle_game_event(self, raw_data):
+        """ 不经流水线、就地处理一条 SSE data (回放 / 调试用)；listen_to_game 走 core/pipeline.py 的分阶段流水线 """
+        event = self.decode_event(raw_data)
+        if event is not None and self.apply_event(event):
+            await self.decide()
+
+    def apply_event(self, event):
+        """ 状态更新段：按到达顺序处理一条已解码事件 (不 await)，返回是否需要唤醒决策段 """
+        # event.data 只在用到的分支里取：proto 模式下 notification 不整份转成 dict
+        evt_type = event.type
+
+        # ==========================================
+        # 1. 🔍 侦测游戏结束原因 (为何判负?)
+        # ==========================================
+        if evt_type == "gameEnd":
+            winner = event.data.get("winPlayerId")
+            reason = event.data.get("reason", "Unknown") # 获取判负原因
+            self.log.warning("🏁 游戏结束! 获胜者: %s | ❓ 结束原因/判负理由: %s", winner, reason)
+            self.winner = winner
+            self.game_finished = True
+            self.publish_end(winner, reason)
+            return False
 
-        except Exception as e:
-            print(Fore.RED + f"⚠️ 解析异常: {e}")
-            import traceback
-            traceback.print_exc()
+        # ==========================================
+        # 2. ⚡ RPC 请求：记下来交给决策段
+        # ==========================================
+        if evt_type == "rpc":
+            self.log.info("⚡ [收到指令] Server 要求操作", rpc=event.rpc_id)
+            self.pending_rpc = event
+            return True
+
+        # ==========================================
+        # 3. 📥 更新状态 (Notification)
+        # ==========================================
+        if evt_type == "notification":
+            self.last_delta = self.state_store.apply_event(event)
+            state = self.state_store.state
+            if state:
+                self.latest_state = state  # <--- [新增] 记忆状态
+                self.scheduler.on_round(state.get("roundNumber"))
+                self.publish_state()
+
+                # 阶段变化才记录，避免每帧一行
+                if self.last_delta is not None and (self.last_delta.phase_changed or self.last_delta.resynced):
+                    self.log.info("ℹ️ [状态更新] Phase: %s", state.get("phase"))
+
+        elif evt_type == "gameStart":
+            self.log.info("✨✨✨ 游戏正式开始! ✨✨✨")
+
+        elif evt_type == "oppTimer":
+            self.scheduler.observe_opp_timer(event.data)
+
+        return False
+
+    async def decide(self):
+        """ 决策段：响应最近一条 rpc (读取链路不等它)，由调度器保证截止时间前发出 """
+        event, self.pending_rpc = self.pending_rpc, None
+        if event is None:
+            return
+        rpc_id = event.rpc_id
+        evt_data = event.data
+        kind = request_kind(evt_data)
+        response_payload = None
+
+        # --- 换牌 (Mulligan) ---
+        if kind == "switchHands":
+            self.log.info("🤖 [AI] 决定不换牌 (Keep All)", rpc=rpc_id)
+            response_payload = {"id": rpc_id, "response": Serializer.switch_hands([])}
+
+        # --- 选出战 (开局首发 / 角色倒下后的替补) ---
+        elif kind == "chooseActive":
+            self.log.info("🤖 [AI] 正在计算最佳首发角色...", rpc=rpc_id)
+
+            # 🎯 关键修复：从 State 中查找 Entity ID
+            target_def_id = SAMPLE_DECK["characters"][0]  # 卡组里的第一个角色
+            target_entity_id = None
+
+            if self.latest_state:
+                # 遍历我的角色列表，找到 definitionId 为 target_def_id 的那个实体的 id
+                players = self.latest_state.get("player", [])
+                # 简单判定我是哪个 (假设我是 Guest/P1，或者根据 socket 里的 player ID 匹配)
+                # 这里做一个简化的遍历：在所有玩家的所有角色里找，通常自己的角色 ID 较小
+                for p in players:
+                    for char in p.get("character", []):
+                        if char.get("definitionId") == target_def_id:
+                            target_entity_id = char.get("id")
+                            self.log.debug("   🔍 找到角色 %s -> 实体ID: %s", target_def_id, target_entity_id, rpc=rpc_id)
+                            break
+                    if target_entity_id: break
+
+            # 如果没找到状态（比如第一帧），降级使用 Definition ID
+            final_id = target_entity_id if target_entity_id else target_def_id
+            # 必须是服务端给出的候选之一 (角色倒下后首发角色可能已不可选)
+            candidates = (evt_data.get(kind) or {}).get("candidateIds") or []
+            if candidates and final_id not in candidates:
+                final_id = candidates[0]
+
+            response_payload = {"id": rpc_id, "response": Serializer.choose_active(final_id)}
+
+        # --- 其他请求 (重投 / 行动 / 选牌)：基础 Bot 没有策略，直接发保底答案 ---
+        elif kind is not None:
+            response_payload = fallback_response(rpc_id, kind, evt_data)
+
+        # --- 发送响应 ---
+        if response_payload:
+            self.log.debug("🚀 发送响应: %s", LazyJson(response_payload), rpc=rpc_id)
+            await self.scheduler.respond(
+                rpc_id, kind, lambda: response_payload,
+                fallback_response(rpc_id, kind, evt_data), self.send_action,
+            )
 
 async def main():
     bot = GenshinTCGBot()
     
     # 1. 登录并创建房间
     if await bot.login_guest():
+        bot.generate_debug_link()
         # 2. 如果成功，开始监听
         await bot.listen_to_game()
     else:
-        print(Fore.RED + "⛔ 程序终止")
+        print("⛔ 程序终止")
         
 """
 if __name__ == "__main__":
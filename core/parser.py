@@ -0,0 +1,511 @@
+# core/parser.py
+# ==========================================
+# 增量状态引擎 (Incremental State Store)
+# 用 Notification 里的 ExposedMutation 增量维护一份常驻战场模型，
+# 只在必要时 (首帧 / 未支持的变更 / 一致性校验失败) 才整体采用快照。
+# 状态沿用服务端 JSON 的形态 (camelCase 键)，与 latest_state / current_state 兼容。
+# proto 编解码下 (apply_message) 不把整份快照转成 dict：只转换需要应用的 mutation，
+# 一致性校验直接读类型化消息，快照只在需要整体采用时才转换。
+# ==========================================
+from core import zobrist
+from core.serializer import proto_to_dict
+from core.state import AURA_TYPES
+
+# EntityArea 枚举 -> PlayerState 中的列表字段
+AREA_FIELDS = {
+    "ENTITY_AREA_COMBAT_STATUS": "combatStatus",
+    "ENTITY_AREA_SUMMON": "summon",
+    "ENTITY_AREA_SUPPORT": "support",
+    "ENTITY_AREA_HAND": "handCard",
+    "ENTITY_AREA_PILE": "pileCard",
+    2: "combatStatus",
+    3: "summon",
+    4: "support",
+    5: "handCard",
+    6: "pileCard",
+}
+AREA_CHARACTER = ("ENTITY_AREA_CHARACTER", 1)
+
+# AuraType 整数 -> 枚举名 (ModifyEntityVarEM 的 aura 变量是整数)
+AURA_NAMES = {number: name for name, number in AURA_TYPES.items()}
+
+
+def aura_name(value):
+    """
+    附着统一成一种表示：枚举名，无附着为 None。
+    proto3 JSON 省略 0 值 (缺省即无附着)，proto_to_dict 保留默认值 (AURA_TYPE_NONE)，
+    变量修改给的是整数；不统一的话同一局面的摘要与哈希会对不上，触发无谓的重同步。
+    """
+    if isinstance(value, int):
+        value = AURA_NAMES.get(value, value)
+    return None if value == "AURA_TYPE_NONE" or value == 0 else value
+
+
+# ModifyEntityVarEM 中角色变量名 -> CharacterState 字段
+CHARACTER_VARS = {
+    "health": "health",
+    "maxHealth": "maxHealth",
+    "energy": "energy",
+    "maxEnergy": "maxEnergy",
+    "aura": "aura",
+}
+
+
+def mutation_kind(mutation):
+    """ ExposedMutation 的 oneof 只有一个键，返回 (键名, 内容) """
+    for key, value in mutation.items():
+        return key, value
+    return None, None
+
+
+class StateDelta:
+    """ 一次 Notification 带来的变化摘要，供决策代码按 O(delta) 查询 """
+    __slots__ = ("created", "removed", "modified", "players", "phase_changed", "resynced", "mutations")
+
+    def __init__(self):
+        self.created = set()    # 新建实体 id
+        self.removed = set()    # 移除实体 id
+        self.modified = set()   # 变量 / 血量 / 附着变化的实体或角色 id
+        self.players = set()    # 发生变化的玩家下标 (who)
+        self.phase_changed = False
+        self.resynced = False   # 本次是否整体采用了快照
+        self.mutations = 0
+
+    def touched(self, entity_id):
+        return entity_id in self.created or entity_id in self.removed or entity_id in self.modified
+
+    def __bool__(self):
+        return bool(self.created or self.removed or self.modified or self.players or self.phase_changed or self.resynced)
+
+    def __repr__(self):
+        return (f"StateDelta(created={sorted(self.created)}, removed={sorted(self.removed)}, "
+                f"modified={sorted(self.modified)}, players={sorted(self.players)}, "
+                f"phase_changed={self.phase_changed}, resynced={self.resynced})")
+
+
+class NeedsResync(Exception):
+    """ 增量应用失败 (未支持的变更 / 找不到实体)，需要回退到完整快照 """
+
+
+class StateStore:
+    """
+    常驻战场模型。
+
+    用法:
+        store = StateStore()
+        delta = store.apply_notification(evt_data)   # evt_data = {"state": ..., "mutation": [...]}
+        store.state                                  # 与服务端 State JSON 同构的 dict
+        store.entity(eid) / store.character(cid)     # O(1) 索引
+        store.hash                                   # 64 位局面哈希 (core/zobrist.py)，随变更 O(1) 更新
+    """
+
+    def __init__(self, verify=True):
+        self.state = None
+        # 是否在每次增量应用后与快照做廉价一致性校验
+        self.verify = verify
+        self.version = 0
+        self.resyncs = 0
+        self.needs_resync = True
+        # id -> (who, 所在列表, 实体 dict)；角色也在此索引，所在列表为 player["character"]
+        self._index = {}
+        self._characters = set()
+        # 实体 id -> 哈希用的区域编号 (zobrist.AREA_CODES / zobrist.character_area)
+        self._areas = {}
+        self.hash = 0
+
+    # ------------------------------------------
+    # 对外接口
+    # ------------------------------------------
+    def apply_notification(self, data):
+        """ 处理一条 notification 事件的 data，返回 StateDelta """
+        snapshot = data.get("state")
+        mutations = data.get("mutation") or []
+        delta = StateDelta()
+        delta.mutations = len(mutations)
+
+        if self.needs_resync or self.state is None:
+            if snapshot:
+                self._load_snapshot(snapshot, delta)
+            return delta
+
+        try:
+            for mutation in mutations:
+                self._apply_mutation(mutation, delta)
+        except NeedsResync:
+            if snapshot:
+                self._load_snapshot(snapshot, delta)
+            else:
+                self.needs_resync = True
+            return delta
+
+        if snapshot and self.verify and self.summary(self.state) != self.summary(snapshot):
+            self._load_snapshot(snapshot, delta)
+            return delta
+
+        self.version += 1
+        return delta
+
+    def apply_event(self, event):
+        """ 处理一条已解码的 notification 事件 (core/codec.py)：有 dict 走 dict，只有类型化消息时走 apply_message """
+        if event.has_dict:
+            return self.apply_notification(event.data)
+        return self.apply_message(event.notification)
+
+    def apply_message(self, message):
+        """ apply_notification 的 notification_pb2.Notification 版本，结果与转成 dict 后应用一致 """
+        has_state = message.HasField("state")
+        delta = StateDelta()
+        delta.mutations = len(message.mutation)
+
+        if self.needs_resync or self.state is None:
+            if has_state:
+                self._load_snapshot(proto_to_dict(message.state), delta)
+            return delta
+
+        try:
+            for mutation in message.mutation:
+                field = mutation.WhichOneof("mutation")
+                kind = mutation.DESCRIPTOR.fields_by_name[field].json_name if field else None
+                if kind in _IGNORED:
+                    continue
+                handler = _HANDLERS.get(kind)
+                if handler is None:
+                    raise NeedsResync(kind)
+                handler(self, proto_to_dict(getattr(mutation, field)), delta)
+        except NeedsResync:
+            if has_state:
+                self._load_snapshot(proto_to_dict(message.state), delta)
+            else:
+                self.needs_resync = True
+            return delta
+
+        if has_state and self.verify and self.summary(self.state) != self.message_summary(message.state):
+            self._load_snapshot(proto_to_dict(message.state), delta)
+            return delta
+
+        self.version += 1
+        return delta
+
+    def reset(self):
+        """ 断线重连等场景：丢弃模型，等待下一个完整快照 """
+        self.needs_resync = True
+
+    def entity(self, entity_id):
+        entry = self._index.get(entity_id)
+        return entry[2] if entry else None
+
+    def character(self, character_id):
+        return self.entity(character_id)
+
+    def owner(self, entity_id):
+        entry = self._index.get(entity_id)
+        return entry[0] if entry else None
+
+    def player(self, who):
+        players = self.state.get("player", []) if self.state else []
+        return players[who] if 0 <= who < len(players) else None
+
+    @staticmethod
+    def summary(state):
+        """
+        廉价一致性指纹：阶段、回合、行动方，以及每个玩家的出战角色、
+        骰子多重集、手牌数、召唤物数与各角色 (血量, 附着)。只扫角色和骰子，不扫全部实体。
+        """
+        players = []
+        for p in state.get("player", []):
+            players.append((
+                p.get("activeCharacterId"),
+                tuple(sorted(p.get("dice", []), key=str)),
+                len(p.get("handCard", [])),
+                len(p.get("summon", [])),
+                tuple((c.get("health", 0), aura_name(c.get("aura"))) for c in p.get("character", [])),
+            ))
+        return (state.get("phase"), state.get("roundNumber"), state.get("currentTurn"), tuple(players))
+
+    @staticmethod
+    def message_summary(state):
+        """ summary 的 state_pb2.State 版本：枚举取名字，与 proto_to_dict 转出的 dict 逐项可比 """
+        phases, dice, auras = _summary_enums(state.DESCRIPTOR)
+        players = []
+        for p in state.player:
+            players.append((
+                p.active_character_id if p.HasField("active_character_id") else None,
+                tuple(sorted((dice.get(d, d) for d in p.dice), key=str)),
+                len(p.hand_card),
+                len(p.summon),
+                tuple((c.health, auras.get(c.aura, c.aura) if c.aura else None) for c in p.character),
+            ))
+        return (phases.get(state.phase, state.phase), state.round_number, state.current_turn, tuple(players))
+
+    # ------------------------------------------
+    # 快照
+    # ------------------------------------------
+    def _load_snapshot(self, snapshot, delta):
+        self.state = snapshot
+        self._index = {}
+        self._characters = set()
+        self._areas = {}
+        for who, p in enumerate(snapshot.get("player", [])):
+            for char in p.get("character", []):
+                if "aura" in char:
+                    char["aura"] = aura_name(char["aura"])
+                self._index[char.get("id")] = (who, p["character"], char)
+                self._characters.add(char.get("id"))
+                area = zobrist.character_area(char)
+                for ent in char.get("entity", []):
+                    self._index[ent.get("id")] = (who, char["entity"], ent)
+                    self._areas[ent.get("id")] = area
+            for field in zobrist.PLAYER_AREAS:
+                for ent in p.get(field, []):
+                    self._index[ent.get("id")] = (who, p[field], ent)
+                    self._areas[ent.get("id")] = zobrist.AREA_CODES[field]
+        self.hash = zobrist.full_hash(snapshot)
+        self.needs_resync = False
+        self.resyncs += 1
+        self.version += 1
+        delta.resynced = True
+
+    # ------------------------------------------
+    # 变更应用
+    # ------------------------------------------
+    def _apply_mutation(self, mutation, delta):
+        kind, body = mutation_kind(mutation)
+        if kind in _IGNORED:
+            return
+        handler = _HANDLERS.get(kind)
+        if handler is None:
+            raise NeedsResync(kind)
+        handler(self, body or {}, delta)
+
+    def _container(self, who, where, master_character_id=None):
+        """ 返回 (目标列表, 哈希区域编号) """
+        player = self.player(who)
+        if player is None:
+            raise NeedsResync("player")
+        if where in AREA_CHARACTER:
+            master = self.entity(master_character_id)
+            if master is None:
+                raise NeedsResync("master")
+            return master.setdefault("entity", []), zobrist.character_area(master)
+        field = AREA_FIELDS.get(where)
+        if field is None:
+            raise NeedsResync("area")
+        return player.setdefault(field, []), zobrist.AREA_CODES[field]
+
+    def _rehash(self, old, new):
+        """ 局面哈希：减去旧部分、加上新部分 """
+        self.hash = (self.hash - old + new) & zobrist.MASK
+
+    def _create_entity(self, body, delta):
+        who = body.get("who", 0)
+        entity = dict(body.get("entity") or {})
+        container, area = self._container(who, body.get("where"), body.get("masterCharacterId"))
+        container.append(entity)
+        eid = entity.get("id")
+        self._index[eid] = (who, container, entity)
+        self._areas[eid] = area
+        self._rehash(0, zobrist.entity_part(who, area, entity))
+        delta.created.add(eid)
+        delta.players.add(who)
+
+    def _detach(self, eid):
+        """ 把实体从所在列表中摘下，返回索引条目 """
+        if eid in self._characters or eid not in self._index:
+            raise NeedsResync("detach")
+        entry = self._index.pop(eid)
+        who, container, entity = entry
+        for i, item in enumerate(container):
+            if item is entity:
+                del container[i]
+                break
+        self._rehash(zobrist.entity_part(who, self._areas.pop(eid, 0), entity), 0)
+        return entry
+
+    def _remove_entity(self, body, delta):
+        eid = (body.get("entity") or {}).get("id")
+        who = self._detach(eid)[0]
+        delta.removed.add(eid)
+        delta.players.add(who)
+
+    def _move_entity(self, body, delta):
+        """ 抽牌 / 调和 / 装备转移等：从原区域摘下，插入目标区域 """
+        entity_body = body.get("entity") or {}
+        eid = entity_body.get("id")
+        old_who, _, entity = self._detach(eid)
+        entity.update(entity_body)
+        to_who = body.get("toWho", 0)
+        container, area = self._container(to_who, body.get("toWhere"))
+        index = body.get("targetIndex")
+        if index is None or index >= len(container):
+            container.append(entity)
+        else:
+            container.insert(index, entity)
+        self._index[eid] = (to_who, container, entity)
+        self._areas[eid] = area
+        self._rehash(0, zobrist.entity_part(to_who, area, entity))
+        delta.modified.add(eid)
+        delta.players.update((old_who, to_who))
+
+    def _modify_entity_var(self, body, delta):
+        eid = body.get("entityId")
+        entry = self._index.get(eid)
+        if entry is None:
+            raise NeedsResync("modify")
+        who, _, entity = entry
+        name = body.get("variableName")
+        value = body.get("variableValue", 0)
+        if eid in self._characters:
+            old = zobrist.character_part(who, entity)
+            field = CHARACTER_VARS.get(name)
+            if field == "aura":
+                entity[field] = aura_name(value)
+            elif field:
+                entity[field] = value
+            elif name == "alive":
+                entity["defeated"] = not value
+            self._rehash(old, zobrist.character_part(who, entity))
+        elif entity.get("variableName") == name:
+            area = self._areas.get(eid, 0)
+            old = zobrist.entity_part(who, area, entity)
+            entity["variableValue"] = value
+            self._rehash(old, zobrist.entity_part(who, area, entity))
+        delta.modified.add(eid)
+        delta.players.add(who)
+
+    def _damage(self, body, delta):
+        target = body.get("targetId")
+        entry = self._index.get(target)
+        if entry is None:
+            raise NeedsResync("damage")
+        who, _, char = entry
+        old = zobrist.character_part(who, char)
+        char["health"] = body.get("newHealth", 0)
+        # 伤害清掉附着时 newAura 为 AURA_TYPE_NONE，proto3 JSON 直接省略该字段：缺省即无附着
+        char["aura"] = aura_name(body.get("newAura"))
+        if body.get("causeDefeated"):
+            char["defeated"] = True
+        self._rehash(old, zobrist.character_part(who, char))
+        delta.modified.add(target)
+        delta.players.add(who)
+
+    def _apply_aura(self, body, delta):
+        target = body.get("targetId")
+        entry = self._index.get(target)
+        if entry is None:
+            raise NeedsResync("aura")
+        who, _, char = entry
+        old = zobrist.character_part(who, char)
+        char["aura"] = aura_name(body.get("newAura"))
+        self._rehash(old, zobrist.character_part(who, char))
+        delta.modified.add(target)
+        delta.players.add(entry[0])
+
+    def _switch_active(self, body, delta):
+        who = body.get("who", 0)
+        player = self.player(who)
+        if player is None:
+            raise NeedsResync("switch")
+        old = zobrist.player_part(who, player)
+        player["activeCharacterId"] = body.get("characterId")
+        self._rehash(old, zobrist.player_part(who, player))
+        delta.players.add(who)
+
+    def _reset_dice(self, body, delta):
+        who = body.get("who", 0)
+        player = self.player(who)
+        if player is None:
+            raise NeedsResync("dice")
+        old = zobrist.player_part(who, player)
+        player["dice"] = list(body.get("dice") or [])
+        self._rehash(old, zobrist.player_part(who, player))
+        delta.players.add(who)
+
+    def _change_phase(self, body, delta):
+        old = zobrist.global_part(self.state)
+        self.state["phase"] = body.get("newPhase")
+        self._rehash(old, zobrist.global_part(self.state))
+        delta.phase_changed = True
+
+    def _step_round(self, body, delta):
+        old = zobrist.global_part(self.state)
+        self.state["roundNumber"] = self.state.get("roundNumber", 0) + 1
+        self._rehash(old, zobrist.global_part(self.state))
+        delta.phase_changed = True
+
+    def _switch_turn(self, body, delta):
+        old = zobrist.global_part(self.state)
+        self.state["currentTurn"] = 1 - self.state.get("currentTurn", 0)
+        self._rehash(old, zobrist.global_part(self.state))
+        delta.phase_changed = True
+
+    def _set_winner(self, body, delta):
+        old = zobrist.global_part(self.state)
+        self.state["winner"] = body.get("winner")
+        self._rehash(old, zobrist.global_part(self.state))
+        delta.phase_changed = True
+
+    def _player_status(self, body, delta):
+        who = body.get("who", 0)
+        player = self.player(who)
+        if player is None:
+            raise NeedsResync("status")
+        player["status"] = body.get("status")
+        delta.players.add(who)
+
+    def _player_flag(self, body, delta):
+        who = body.get("who", 0)
+        player = self.player(who)
+        field = _FLAG_FIELDS.get(body.get("flagName"))
+        if player is None or field is None:
+            raise NeedsResync("flag")
+        old = zobrist.player_part(who, player)
+        player[field] = bool(body.get("flagValue", False))
+        self._rehash(old, zobrist.player_part(who, player))
+        delta.players.add(who)
+
+
+# message_summary 用：阶段 / 骰子 / 附着三个枚举的 {数值: 名字}，首次用到时从 State 描述符构建
+_SUMMARY_ENUMS = None
+
+
+def _summary_enums(state_descriptor):
+    global _SUMMARY_ENUMS
+    if _SUMMARY_ENUMS is None:
+        player = state_descriptor.fields_by_name["player"].message_type
+        character = player.fields_by_name["character"].message_type
+        _SUMMARY_ENUMS = tuple(
+            {v.number: v.name for v in descriptor.fields_by_name[field].enum_type.values}
+            for descriptor, field in ((state_descriptor, "phase"), (player, "dice"), (character, "aura"))
+        )
+    return _SUMMARY_ENUMS
+
+
+_FLAG_FIELDS = {
+    "PLAYER_FLAG_DECLARED_END": "declaredEnd",
+    "PLAYER_FLAG_LEGEND_USED": "legendUsed",
+    1: "declaredEnd",
+    2: "legendUsed",
+}
+
+_HANDLERS = {
+    "createEntity": StateStore._create_entity,
+    "removeEntity": StateStore._remove_entity,
+    "moveEntity": StateStore._move_entity,
+    "modifyEntityVar": StateStore._modify_entity_var,
+    "damage": StateStore._damage,
+    "applyAura": StateStore._apply_aura,
+    "switchActive": StateStore._switch_active,
+    "resetDice": StateStore._reset_dice,
+    "changePhase": StateStore._change_phase,
+    "stepRound": StateStore._step_round,
+    "switchTurn": StateStore._switch_turn,
+    "setWinner": StateStore._set_winner,
+    "playerStatusChange": StateStore._player_status,
+    "setPlayerFlag": StateStore._player_flag,
+}
+
+# 纯提示性变更，不影响模型
+_IGNORED = {
+    "skillUsed", "rerollDone", "switchHandsDone", "chooseActiveDone",
+    "selectCardDone", "handleEvent",
+}
@@ -0,0 +1,117 @@
+# core/pipeline.py
+import asyncio
+
+from core.metrics import DECIDER_COALESCED, EVENT_QUEUE_DEPTH, RAW_QUEUE_DEPTH, READER_STALLS
+
+# ==========================================
+# 🚰 事件流水线 (Event Pipeline)
+# 逐条 await 处理 SSE 消息时，决策 + POST 期间链路没人读。这里拆成四段，
+# 段间用有界队列连接，各段是同一事件循环里的独立任务：
+#   reader        : 只读链路，把原始 data 放进 raw 队列；队列满时等待 (背压，内存有界)
+#   decoder       : codec 解码，放进 events 队列
+#   state updater : 按顺序应用每一条事件 (notification 的 mutation 是增量的，一条也不能跳过)，
+#                   需要决策时置位唤醒标志
+#   decider       : 唤醒标志而不是队列 —— 上一轮决策期间到达的多条 notification / rpc 只触发一次决策，
+#                   决策看到的总是最新局面，同一个 rpc 也不会被重复决策
+# 队列深度与合并次数计入 core/metrics.py (所有 Bot 合计)。
+# 用法:
+#   pipeline = EventPipeline(bot.decode_event, bot.apply_event, bot.decide, maxsize=256, log=bot.log)
+#   await pipeline.run(bot._listen, until=lambda: bot.game_finished)
+# ==========================================
+
+
+class EventPipeline:
+    """
+    decode(raw) -> event | None : 解码段 (同步)
+    apply(event) -> bool        : 状态更新段 (同步、廉价)；返回 True 表示需要唤醒决策段
+    decide()                    : 决策段 (协程)，同一时刻最多一个在跑
+    """
+
+    def __init__(self, decode, apply, decide, maxsize=256, log=None):
+        self.decode = decode
+        self.apply = apply
+        self.decide = decide
+        self.log = log
+        self.raw = asyncio.Queue(maxsize)
+        self.events = asyncio.Queue(maxsize)
+        self._wake = asyncio.Event()
+        self._stopped = asyncio.Event()
+        self._until = None
+
+    async def run(self, read, until=None):
+        """
+        read(pipeline) 为读取协程，把原始 data 交给 pipeline.put。
+        读取结束 (链路关闭 / 放弃重连) 时先处理完已收到的事件再返回；until() 为真 (如收到 gameEnd) 时立即返回。
+        """
+        self._until = until
+        loop = asyncio.get_running_loop()
+        stages = [loop.create_task(self._decoder()), loop.create_task(self._updater()),
+                  loop.create_task(self._decider())]
+        reader = loop.create_task(read(self))
+        stopped = loop.create_task(self._stopped.wait())
+        try:
+            await asyncio.wait({reader, stopped}, return_when=asyncio.FIRST_COMPLETED)
+            if not stopped.done():
+                reader.result()
+                await self.flush()
+        finally:
+            for task in (reader, stopped, *stages):
+                task.cancel()
+            await asyncio.gather(reader, stopped, *stages, return_exceptions=True)
+            RAW_QUEUE_DEPTH.dec(self.raw.qsize())
+            EVENT_QUEUE_DEPTH.dec(self.events.qsize())
+
+    async def put(self, raw):
+        if self.raw.full():
+            READER_STALLS.inc()
+        await self.raw.put(raw)
+        RAW_QUEUE_DEPTH.inc()
+
+    async def flush(self):
+        """ 等已收到的事件全部解码并应用到状态 (不等决策段)；读取段判断链路为何结束前调用 """
+        await self.raw.join()
+        await self.events.join()
+
+    async def _decoder(self):
+        while True:
+            raw = await self.raw.get()
+            RAW_QUEUE_DEPTH.dec()
+            try:
+                event = self.decode(raw)
+            except Exception as e:
+                self._error("⚠️ 解析异常: %s", e)
+                event = None
+            if event is not None:
+                await self.events.put(event)
+                EVENT_QUEUE_DEPTH.inc()
+            self.raw.task_done()
+
+    async def _updater(self):
+        while True:
+            event = await self.events.get()
+            EVENT_QUEUE_DEPTH.dec()
+            try:
+                wake = self.apply(event)
+            except Exception as e:
+                self._error("⚠️ 状态更新异常: %s", e)
+                wake = False
+            if wake:
+                if self._wake.is_set():
+                    DECIDER_COALESCED.inc()
+                self._wake.set()
+            self.events.task_done()
+            if self._until is not None and self._until():
+                self._stopped.set()
+
+    async def _decider(self):
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            try:
+                await self.decide()
+            except Exception as e:
+                self._error("⚠️ 决策异常: %s", e)
+
+    def _error(self, message, error):
+        if self.log is not None:
+            self.log.exception(message, error)
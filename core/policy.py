@@ -0,0 +1,63 @@
+# core/policy.py
+from core.dice import normalize_cost, solve_payment
+from core.evaluator import PreviewEvaluator
+
+# ==========================================
+# 纯函数策略 (Policy Functions)
+# 不依赖 Bot 实例，只吃 GameState / ActionTable 快照、只返回下标与骰子，
+# 因此既能在事件循环里直接调用，也能交给 core/executor.py 的线程池 / 进程池。
+# 评估器按权重缓存在模块级：进程池中每个工作进程只构建一次。
+# ==========================================
+
+_evaluators = {}
+
+
+def _evaluator(weights):
+    """ weights: None / {特征名: 权重} / 权重数组 """
+    if weights is None:
+        key = None
+    elif hasattr(weights, "tobytes"):
+        key = weights.tobytes()
+    else:
+        key = tuple(sorted(weights.items()))
+    evaluator = _evaluators.get(key)
+    if evaluator is None:
+        evaluator = _evaluators[key] = PreviewEvaluator(weights)
+    return evaluator
+
+
+def pay_for(candidate, player):
+    """ 用求解器挑支付骰子；付不起 (或没有骰子) 时返回 None，即沿用服务端自动选择 """
+    if not candidate.cost or player is None:
+        return None
+    payment = solve_payment(tuple(player.dice), normalize_cost(candidate.cost))
+    return None if payment is None else list(payment[0])
+
+
+def greedy_action(state, table, who, weights=None):
+    """
+    按预览评估贪心选行动。
+    state : core/state.py 的 GameState；table : core/actions.py 的 ActionTable
+    返回 (候选下标, 支付骰子或 None)；没有合法候选时返回 None。
+    """
+    best = _evaluator(weights).best(state, table, who)
+    if best is None:
+        return None
+    players = state.players
+    return best.index, pay_for(best, players[who] if who < len(players) else None)
+
+
+def greedy_batch(items, weights=None):
+    """
+    greedy_action 的批量版 (core/batching.py 的 BatchBroker 用)：
+    items 为 [(state, table, who), ...]，返回与之对齐的 [(下标, 骰子) 或 None, ...]。
+    进程池模式下整批只 pickle 一次。
+    """
+    results = []
+    for (state, table, who), best in zip(items, _evaluator(weights).best_many(items)):
+        if best is None:
+            results.append(None)
+        else:
+            players = state.players
+            results.append((best.index, pay_for(best, players[who] if who < len(players) else None)))
+    return results
@@ -0,0 +1,24 @@
+# core/protos.py
+import importlib
+import os
+import sys
+
+# ==========================================
+# 🧬 协议模块懒加载 (Proto Loader)
+# proto_compiled/ 下的 *_pb2 之间用顶层 import 互相引用 (import enums_pb2)，目录本身必须在 sys.path 上。
+# 只在第一次真正用到某个 pb2 模块时才把目录加进 sys.path 并导入；
+# import core.* 本身不改 sys.path、不加载 google.protobuf。
+# 用法:
+#   rpc_pb2 = load("rpc_pb2")
+#   notification_pb2, state_pb2 = load("notification_pb2", "state_pb2")
+# ==========================================
+
+PROTO_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "proto_compiled")
+
+
+def load(*names):
+    """ 导入 proto_compiled 下的模块；一个名字返回模块本身，多个名字返回元组 """
+    if PROTO_DIR not in sys.path:
+        sys.path.append(PROTO_DIR)
+    modules = tuple(importlib.import_module(name) for name in names)
+    return modules[0] if len(modules) == 1 else modules
@@ -0,0 +1,426 @@
+# core/replay.py
+import mmap
+import os
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from core.codec import DecodedEvent, JsonCodec
+from core.logs import get_logger
+
+# ==========================================
+# 📼 对局录像 (Replay Recorder / Reader)
+# 只追加的二进制文件，多局游戏共用一个文件 (舰队模式)：
+#   文件头  MAGIC
+#   数据块  CHUNK 头 (魔数, 对局 id 长度, 回合, 首条序号, 记录数, 原始长度, 压缩长度) + 对局 id + zlib(记录...)
+#   记录    REC 头 (载荷格式, 事件类型, rpc id, 时间戳, 载荷长度) + 载荷
+# 每局游戏各自缓冲，满 chunk_size 或进入新回合时压缩成一个块写出，
+# 所以每个块只属于一局、一个回合。块头即索引：读取端 mmap 后只扫块头，
+# 不解压任何数据就能得到 "对局 -> 回合 -> 块偏移"，跳到任意回合只解压该回合之后的块。
+# 崩溃容错：
+#   - 录像器打开已有文件时先校验末尾，截掉写了一半的块再追加，后续对局不会接在残块后面；
+#   - 读取端遇到损坏的块时向后查找下一个块魔数重新同步 (候选块必须能完整解压)，只丢损坏的那一段。
+# 压缩与写盘在单独的写线程里按顺序执行 (zlib 会释放 GIL)，不占用 Bot 的事件循环。
+# ==========================================
+
+MAGIC = b"AGCREPL1"
+CHUNK_MAGIC = b"CHNK"
+CHUNK_HEADER = struct.Struct("<4sHiIIII")   # magic, game_len, round, first_seq, count, raw_len, comp_len
+RECORD_HEADER = struct.Struct("<BBidI")     # format, type, rpc_id, timestamp, payload_len
+
+# 载荷格式
+FORMAT_JSON = 0     # 原始 SSE data 文本 (JSON 信封)
+FORMAT_PROTO = 1    # notification_pb2.Notification / rpc_pb2.Request 二进制
+
+# response 是 Bot 自己发出的 actionResponse (信封 {"type": "response", "id", "data": Response})
+EVENT_TYPES = ("notification", "rpc", "gameStart", "gameEnd", "oppTimer", "response")
+TYPE_CODES = {name: i for i, name in enumerate(EVENT_TYPES)}
+TYPE_OTHER = 255
+NO_RPC = -1
+
+log = get_logger("replay")
+
+
+class Record:
+    """ 一条录制事件 """
+    __slots__ = ("seq", "type", "rpc_id", "timestamp", "format", "payload")
+
+    def __init__(self, seq, type, rpc_id, timestamp, format, payload):
+        self.seq = seq
+        self.type = type
+        self.rpc_id = rpc_id
+        self.timestamp = timestamp
+        self.format = format
+        self.payload = payload
+
+    def event(self):
+        """ 还原成 core/codec.py 的 DecodedEvent (与实时解码结果同形) """
+        if self.format == FORMAT_PROTO:
+            return DecodedEvent(self.type, self.rpc_id, raw_body=bytes(self.payload))
+        return JsonCodec().decode(bytes(self.payload).decode("utf-8"))
+
+    def envelope(self):
+        """ 还原成 {"type", "data", "id"?} 信封 (桩服务器重放用) """
+        event = self.event()
+        envelope = {"type": event.type, "data": event.data}
+        if event.rpc_id is not None:
+            envelope["id"] = event.rpc_id
+        return envelope
+
+    def __repr__(self):
+        return f"Record(#{self.seq} {self.type} rpc={self.rpc_id} {len(self.payload)}B)"
+
+
+class _GameBuffer:
+    __slots__ = ("game", "records", "size", "round", "seq", "first_seq")
+
+    def __init__(self, game):
+        self.game = game
+        self.records = []
+        self.size = 0
+        self.round = 0
+        self.seq = 0
+        self.first_seq = 0
+
+
+class ReplayRecorder:
+    """
+    用法:
+        recorder = ReplayRecorder("games.agcr", binary=True)
+        bot = SmartBot(recorder=recorder, ...)      # GenshinTCGBot 自动包装编解码器
+        ...
+        recorder.close()
+
+    binary=True 时 notification / rpc 以 Protobuf 二进制保存 (proto 编解码器下零额外开销，
+    json 编解码器下需要多做一次 ParseDict + SerializeToString)；其余事件始终保存原始 JSON。
+    background=True 时块的压缩与写盘交给单个写线程 (保持块顺序)；写入错误在下一次 flush / close 时抛出。
+    """
+
+    def __init__(self, path, binary=False, chunk_size=64 * 1024, level=6, background=True):
+        self.path = path
+        self.binary = binary
+        self.chunk_size = chunk_size
+        self.level = level
+        self._games = {}
+        self.chunks = 0
+        self.bytes_raw = 0
+        self.bytes_written = 0
+        self.repaired = repair_tail(path)    # 打开时截掉的残块字节数
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "ab")
+        if new:
+            self._file.write(MAGIC)
+            self._file.flush()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="replay") if background else None
+        self._pending = []
+
+    def wrap(self, codec, game):
+        """ 返回一个边解码边录制的编解码器；game 为对局 id 字符串或返回它的无参函数 """
+        return RecordingCodec(codec, self, game)
+
+    def record(self, game, evt_type, rpc_id, payload, round_number=None, timestamp=None):
+        """
+        追加一条事件。payload 为 str (JSON 文本) 或 bytes (Protobuf 二进制)。
+        round_number 变化时先把上一回合的缓冲写成独立的块。
+        """
+        buf = self._games.get(game)
+        if buf is None:
+            buf = self._games[game] = _GameBuffer(game)
+        if round_number is not None and round_number != buf.round:
+            self._flush(buf)
+            buf.round = round_number
+        if isinstance(payload, str):
+            fmt, payload = FORMAT_JSON, payload.encode("utf-8")
+        else:
+            fmt = FORMAT_PROTO
+        header = RECORD_HEADER.pack(
+            fmt, TYPE_CODES.get(evt_type, TYPE_OTHER), NO_RPC if rpc_id is None else rpc_id,
+            time.time() if timestamp is None else timestamp, len(payload),
+        )
+        buf.records.append(header)
+        buf.records.append(payload)
+        buf.size += len(header) + len(payload)
+        buf.seq += 1
+        if buf.size >= self.chunk_size:
+            self._flush(buf)
+        if evt_type == "gameEnd":
+            self._flush(buf)
+            del self._games[game]
+
+    def flush(self):
+        """ 写出全部缓冲并等写线程落盘 """
+        for buf in self._games.values():
+            self._flush(buf)
+        pending, self._pending = self._pending, []
+        for future in pending:
+            future.result()
+        self._file.flush()
+
+    def close(self):
+        if self._file.closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self._games.clear()
+            if self._writer is not None:
+                self._writer.shutdown(wait=True)
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _flush(self, buf):
+        if not buf.records:
+            return
+        chunk = (buf.game.encode("utf-8"), buf.round, buf.first_seq, buf.seq - buf.first_seq, b"".join(buf.records))
+        buf.records = []
+        buf.size = 0
+        buf.first_seq = buf.seq
+        if self._writer is None:
+            self._write_chunk(*chunk)
+            return
+        # 已完成的写入先检查结果，让写线程里的错误尽早在调用方抛出
+        done = [future for future in self._pending if future.done()]
+        self._pending = [future for future in self._pending if not future.done()]
+        for future in done:
+            future.result()
+        self._pending.append(self._writer.submit(self._write_chunk, *chunk))
+
+    def _write_chunk(self, game, round_number, first_seq, count, raw):
+        """ 压缩并整块写出 (一次 write，缩小崩溃时留下残块的窗口)；background 模式下在写线程执行 """
+        body = zlib.compress(raw, self.level)
+        header = CHUNK_HEADER.pack(CHUNK_MAGIC, len(game), round_number, first_seq, count, len(raw), len(body))
+        self._file.write(header + game + body)
+        self._file.flush()
+        self.chunks += 1
+        self.bytes_raw += len(raw)
+        self.bytes_written += len(header) + len(game) + len(body)
+
+
+class RecordingCodec:
+    """ 包装任意编解码器：先交给内层解码，再把 (类型, rpc id, 原始载荷) 交给录像器 """
+
+    def __init__(self, codec, recorder, game):
+        self.codec = codec
+        self.recorder = recorder
+        self.game = game
+        self.name = codec.name
+        self.sse_params = codec.sse_params
+
+    def decode(self, raw):
+        event = self.codec.decode(raw)
+        if event is None:
+            return None
+        payload = raw
+        if self.recorder.binary and event.type in ("notification", "rpc"):
+            if event._raw_body is not None:
+                payload = event._raw_body
+            else:
+                payload = event._typed().SerializeToString()
+        round_number = None
+        if event.type == "notification":
+            if event.has_dict:
+                round_number = (event.data.get("state") or {}).get("roundNumber")
+            else:
+                # proto 模式只读类型化消息，不为录制触发 dict 转换 (保住 apply_message 快路径)
+                message = event.notification
+                if message.HasField("state"):
+                    round_number = message.state.round_number
+        game = self.game() if callable(self.game) else self.game
+        self.recorder.record(game, event.type, event.rpc_id, payload, round_number)
+        return event
+
+
+class ChunkInfo:
+    __slots__ = ("offset", "game", "round", "first_seq", "count", "raw_len", "comp_len", "body")
+
+    def __init__(self, offset, game, round, first_seq, count, raw_len, comp_len, body):
+        self.offset = offset
+        self.game = game
+        self.round = round
+        self.first_seq = first_seq
+        self.count = count
+        self.raw_len = raw_len
+        self.comp_len = comp_len
+        self.body = body        # 压缩数据在文件中的起始偏移
+
+    def __repr__(self):
+        return f"ChunkInfo({self.game} round={self.round} seq={self.first_seq}+{self.count} @{self.offset})"
+
+
+def _chunk_at(data, offset):
+    """ offset 处块头完整、数据没有越过文件末尾的块 -> ChunkInfo；否则 None """
+    end = len(data)
+    if offset + CHUNK_HEADER.size > end:
+        return None
+    magic, game_len, round_number, first_seq, count, raw_len, comp_len = CHUNK_HEADER.unpack_from(data, offset)
+    body = offset + CHUNK_HEADER.size + game_len
+    if magic != CHUNK_MAGIC or body + comp_len > end:
+        return None
+    try:
+        game = bytes(data[offset + CHUNK_HEADER.size:body]).decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+    return ChunkInfo(offset, game, round_number, first_seq, count, raw_len, comp_len, body)
+
+
+def _intact(data, chunk):
+    """ 块数据能完整解压且长度与块头一致 """
+    try:
+        return len(zlib.decompress(data[chunk.body:chunk.body + chunk.comp_len])) == chunk.raw_len
+    except zlib.error:
+        return False
+
+
+def scan_chunks(data):
+    """
+    扫描块头 (data 为整个文件的 bytes / mmap)：返回 (块列表, 是否遇到损坏)。
+    正常情况下只读块头不解压；遇到损坏时向后找下一个块魔数，
+    重新同步到的候选块必须能完整解压才被采用 (防止把压缩数据里碰巧出现的魔数当成块头)。
+    """
+    chunks, damaged, resyncing = [], False, False
+    offset, end = len(MAGIC), len(data)
+    while offset < end:
+        chunk = _chunk_at(data, offset)
+        if chunk is None or (resyncing and not _intact(data, chunk)):
+            damaged = resyncing = True
+            offset = data.find(CHUNK_MAGIC, offset + 1)
+            if offset < 0:
+                break
+            continue
+        resyncing = False
+        chunks.append(chunk)
+        offset = chunk.body + chunk.comp_len
+    return chunks, damaged
+
+
+def repair_tail(path):
+    """
+    追加写入之前截掉末尾不完整的数据 (进程崩溃时写了一半的块)，返回截掉的字节数。
+    末尾的块还要能完整解压才算完整。文件存在但不是录像文件时抛出 ValueError，避免追加到别的文件后面。
+    """
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < len(MAGIC):
+            head = f.read()
+            if not MAGIC.startswith(head):
+                raise ValueError(f"不是录像文件: {path}")
+            good = 0     # 文件头都没写完：当作新文件
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data[:len(MAGIC)] != MAGIC:
+                    raise ValueError(f"不是录像文件: {path}")
+                chunks, _ = scan_chunks(data)
+                while chunks and not _intact(data, chunks[-1]):
+                    chunks.pop()
+                good = chunks[-1].body + chunks[-1].comp_len if chunks else len(MAGIC)
+    if good < size:
+        with open(path, "r+b") as f:
+            f.truncate(good)
+        log.warning("✂️ 录像文件 %s 末尾有 %d 字节不完整的数据，已截断", path, size - good)
+    return size - good
+
+
+class ReplayReader:
+    """
+    mmap 读取端。打开时只扫描块头建立索引 (不解压)。
+
+        with ReplayReader("games.agcr") as reader:
+            reader.games()                              # 全部对局 id
+            reader.rounds(game)                         # 该局出现过的回合
+            for record in reader.records(game, from_round=3):
+                event = record.event()                  # DecodedEvent
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"不是录像文件: {path}")
+        self.index = {}             # game -> [ChunkInfo, ...] (按写入顺序)
+        self.truncated = False      # 有写了一半 / 损坏的块 (进程被杀等)，已跳过
+        self._scan()
+
+    @staticmethod
+    def is_replay(path):
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+
+    def _scan(self):
+        chunks, self.truncated = scan_chunks(self._map)
+        for chunk in chunks:
+            self.index.setdefault(chunk.game, []).append(chunk)
+
+    def games(self):
+        return list(self.index)
+
+    def rounds(self, game):
+        return sorted({chunk.round for chunk in self.index.get(game, ())})
+
+    def runs(self, game):
+        """
+        同一对局 id 可能在一个文件里出现多次 (房间号跨运行复用)。每次新开的对局从 seq 0 写起，
+        按 first_seq 归零切开，返回 [(首块文件偏移, [ChunkInfo, ...]), ...]；首块偏移可作为该局的稳定标识。
+        """
+        runs = []
+        for chunk in self.index.get(game, ()):
+            if chunk.first_seq == 0 or not runs:
+                runs.append((chunk.offset, []))
+            runs[-1][1].append(chunk)
+        return runs
+
+    def chunks(self, game, from_round=None, start=None):
+        """ start 为 runs() 给出的首块偏移时只取那一局，否则取该 id 下的全部块 """
+        if start is None:
+            chunks = self.index.get(game, [])
+        else:
+            chunks = next((run for offset, run in self.runs(game) if offset == start), [])
+        if from_round is None:
+            return chunks
+        for i, chunk in enumerate(chunks):
+            if chunk.round >= from_round:
+                return chunks[i:]
+        return []
+
+    def records(self, game, from_round=None, start=None):
+        """ 逐条产出 Record；from_round 只解压该回合起的块，start 见 chunks() """
+        for chunk in self.chunks(game, from_round, start):
+            yield from self._decode_chunk(chunk)
+
+    def _decode_chunk(self, chunk):
+        try:
+            raw = zlib.decompress(self._map[chunk.body:chunk.body + chunk.comp_len])
+        except zlib.error:
+            # 块头完整但数据没写全 (崩溃时的最后一块)：跳过这一块
+            self.truncated = True
+            return
+        view = memoryview(raw)
+        offset = 0
+        for i in range(chunk.count):
+            fmt, type_code, rpc_id, timestamp, length = RECORD_HEADER.unpack_from(raw, offset)
+            offset += RECORD_HEADER.size
+            evt_type = EVENT_TYPES[type_code] if type_code < len(EVENT_TYPES) else None
+            yield Record(chunk.first_seq + i, evt_type, None if rpc_id == NO_RPC else rpc_id,
+                         timestamp, fmt, view[offset:offset + length])
+            offset += length
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
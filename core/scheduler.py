@@ -0,0 +1,205 @@
+# core/scheduler.py
+import asyncio
+import inspect
+import time
+
+from core.actions import END, Candidate
+from core.logs import BotLogAdapter, get_logger
+from core.metrics import DECISION_SECONDS, DECISIONS, METRICS
+from core.serializer import Serializer
+
+# ==========================================
+# ⏱️ 截止时间感知的响应调度器 (Response Scheduler)
+# 按房间计时配置为每个 RPC 计算截止时间：决策一就绪立即发送；
+# 慢策略可以用掉剩余预算，但必须在 (截止时间 - 安全余量) 前交出结果，
+# 否则改发兜底答案，保证不会因超时判负。
+# ==========================================
+
+# 与 login_guest 的默认值一致 (标准房间)
+DEFAULT_TIMING = {
+    "initTotalActionTime": 45,
+    "rerollTime": 40,
+    "roundTotalActionTime": 60,
+    "actionTime": 25,
+}
+
+# rpc_pb2.Request 的 oneof 键 (camelCase)
+REQUEST_KINDS = ("rerollDice", "switchHands", "chooseActive", "action", "selectCard")
+
+
+def request_kind(request):
+    """ 从 rpc 请求 dict 中取出请求类型 (rerollDice / action / ...)，未知时返回 None """
+    if isinstance(request, dict):
+        for key in REQUEST_KINDS:
+            if key in request:
+                return key
+    return None
+
+
+class ResponseScheduler:
+    """
+    每个 Bot 一个调度器。
+
+    计时模型 (与服务端房间参数对应):
+      - 开局阶段 (换牌 / 首次选人) 共享 initTotalActionTime 总时长；
+      - 重投骰子每次 rerollTime；
+      - 行动 / 选卡 / 阵亡后选人：每次 actionTime，超出部分从本回合 roundTotalActionTime 里扣，
+        回合切换 (on_round) 时重置。
+    oppTimer 事件会带回服务端实际使用的计时上限，用它校正配置值 (服务端可能裁剪配置)。
+    """
+
+    def __init__(self, room_config=None, safety_margin=1.5, min_budget=0.2, clock=time.monotonic, log=None):
+        self.timing = dict(DEFAULT_TIMING)
+        self.safety_margin = safety_margin   # 截止时间前预留给网络往返的秒数
+        self.min_budget = min_budget         # 预算耗尽时仍留给决策的最短时间
+        self.clock = clock
+        self.log = log or BotLogAdapter(logger=get_logger("scheduler"))
+        self.in_setup = True                 # gameStart / 首个回合之前都算开局阶段
+        self.init_bank = 0.0
+        self.round_bank = 0.0
+        self.round_number = None
+        self.opp_timer = None                # 最近一次 oppTimer 原始数据
+        self.answered = set()                # 已发送过响应的 rpc id，防止重复发送
+        self.stats = {"sent": 0, "fallback": 0, "late": 0}
+        self.configure(room_config)
+
+    def configure(self, room_config):
+        """ 采用房间计时参数 (login_guest 的最终 payload)，并重置各计时池 """
+        if room_config:
+            for key in DEFAULT_TIMING:
+                if room_config.get(key) is not None:
+                    self.timing[key] = float(room_config[key])
+        self.init_bank = float(self.timing["initTotalActionTime"])
+        self.round_bank = float(self.timing["roundTotalActionTime"])
+
+    # ---------- 服务端时钟信号 ----------
+
+    def on_round(self, round_number):
+        """ 回合数变化时重置回合时间池；第一次看到回合数即视为开局阶段结束 """
+        if round_number is None or round_number == self.round_number:
+            return
+        if self.round_number is not None or round_number > 0:
+            self.in_setup = False
+        self.round_number = round_number
+        self.round_bank = float(self.timing["roundTotalActionTime"])
+
+    def observe_opp_timer(self, data):
+        """
+        记录 oppTimer 事件。数据形如 {"current": 剩余秒, "total": 上限秒}；
+        total 反映服务端实际生效的单次行动时限，比本地配置更可信。
+        """
+        if not isinstance(data, dict):
+            return
+        self.opp_timer = data
+        total = data.get("total")
+        if isinstance(total, (int, float)) and total > 0 and not self.in_setup:
+            self.timing["actionTime"] = float(total)
+
+    # ---------- 预算计算 ----------
+
+    def budget(self, kind):
+        """ 某类请求从收到起可用的总秒数 (尚未扣除安全余量) """
+        if kind == "rerollDice":
+            return self.timing["rerollTime"]
+        if self.in_setup and kind in ("switchHands", "chooseActive"):
+            return self.init_bank
+        return self.timing["actionTime"] + self.round_bank
+
+    def deadline(self, kind, received_at=None):
+        """ 绝对截止时间 (clock 时间轴)，已扣除安全余量 """
+        received_at = self.clock() if received_at is None else received_at
+        return received_at + max(self.min_budget, self.budget(kind) - self.safety_margin)
+
+    def _charge(self, kind, elapsed):
+        """ 发送后从对应时间池里扣除实际耗时 """
+        if kind == "rerollDice":
+            return
+        if self.in_setup and kind in ("switchHands", "chooseActive"):
+            self.init_bank = max(0.0, self.init_bank - elapsed)
+        else:
+            overflow = elapsed - self.timing["actionTime"]
+            if overflow > 0:
+                self.round_bank = max(0.0, self.round_bank - overflow)
+
+    # ---------- 调度 ----------
+
+    async def respond(self, rpc_id, kind, decide, fallback, send, received_at=None):
+        """
+        在截止时间内求出响应并立即发送。
+
+        decide   : 返回 payload 的普通函数或协程函数，可能很慢；返回 None 视为放弃
+        fallback : 兜底 payload (必须合法)，决策超时 / 异常 / 放弃时发送
+        send     : 协程函数 send(payload)，一般是 bot.send_action
+        返回实际发送的 payload；同一 rpc_id 只会发送一次。
+        """
+        if rpc_id in self.answered:
+            return None
+        received_at = self.clock() if received_at is None else received_at
+        deadline = self.deadline(kind, received_at)
+
+        payload = None
+        outcome = "decided"
+        started = time.perf_counter() if METRICS.active else None
+        try:
+            payload = await asyncio.wait_for(self._run(decide), timeout=max(0.0, deadline - self.clock()))
+        except asyncio.TimeoutError:
+            outcome = "late"
+            self.stats["late"] += 1
+            self.log.warning("⏰ [调度] %s 决策超出预算，改发兜底响应", kind, rpc=rpc_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.log.error("💥 [调度] 决策异常: %s，改发兜底响应", e, rpc=rpc_id)
+
+        if started is not None:
+            DECISION_SECONDS.observe(time.perf_counter() - started, kind)
+        if rpc_id in self.answered:
+            return None
+        if payload is None:
+            payload = fallback
+            self.stats["fallback"] += 1
+            if outcome == "decided":
+                outcome = "fallback"
+        DECISIONS.inc(outcome)
+        self.answered.add(rpc_id)
+        self.stats["sent"] += 1
+        if await send(payload) is False:
+            # 发送失败 (如断线) 时允许服务端重发的同一 rpc 再次应答
+            self.answered.discard(rpc_id)
+        self._charge(kind, self.clock() - received_at)
+        return payload
+
+    @staticmethod
+    async def _run(decide):
+        result = decide()
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+
+def fallback_response(rpc_id, kind, request=None):
+    """
+    每类请求的保底合法响应：不换牌 / 不重投 / 选第一个候选角色 / 选第一张候选卡 / 宣布回合结束。
+    request 为 rpc 请求 dict，用来取候选项和 declareEnd 所在的下标；
+    没有 declareEnd 时改选第一个合法行动并用服务端给的 autoSelectedDice。
+    """
+    body = (request.get(kind) if isinstance(request, dict) else None) or {}
+    if kind == "rerollDice":
+        response = Serializer.reroll_dice([])
+    elif kind == "chooseActive":
+        candidates = body.get("candidateIds") or [1]
+        response = Serializer.choose_active(candidates[0])
+    elif kind == "selectCard":
+        candidates = body.get("candidateDefinitionIds") or [0]
+        response = Serializer.select_card(candidates[0])
+    elif kind == "action":
+        candidates = [Candidate.from_dict(index, d) for index, d in enumerate(body.get("action", []))]
+        choice = next((c for c in candidates if c.kind == END), None) \
+            or next((c for c in candidates if c.valid), None)
+        if choice is None:
+            response = Serializer.perform_action(0, [])
+        else:
+            response = Serializer.perform_action(choice.index, [] if choice.kind == END else list(choice.auto_dice))
+    else:
+        response = Serializer.switch_hands([])
+    return {"id": rpc_id, "response": response}
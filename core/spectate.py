@@ -0,0 +1,151 @@
+# core/spectate.py
+import asyncio
+import collections
+import json
+import time
+
+from core.metrics import FEED_DROPPED, FEED_FRAMES, SPECTATORS
+
+# ==========================================
+# 👀 观战推送 (Spectator Feed)
+# 让任意数量的仪表盘同时实时观看所有 Bot 的局面与决策 (web_ui/server.py 的 GET /feed，SSE)。
+#   - Bot 侧 (Bot 的事件循环)：只在有观众时 (FEED.active) 才取一份由标量组成的局面摘要放进交接区；
+#     局面按对局"最新覆盖"，决策 / 终局进定长 deque。不序列化、不加锁、不等待；
+#   - 服务端侧 (监控服务线程)：每隔 interval 取空交接区，每条更新只 json 编码一次，
+#     同一份 bytes 分发给所有订阅者；
+#   - 每个订阅者一个有界缓冲：同一对局的旧局面直接被新局面替换，超出上限时丢弃最旧的帧，
+#     慢客户端只会少看几帧，不会让内存增长。
+# 交接区只用 dict 的 setitem / popitem 与 deque 的 append / popleft，跨线程在 GIL 下都是原子的。
+# 用法 (Bot 侧):
+#   if FEED.active:
+#       FEED.publish_state(game, StateStore.summary(state), viewer)
+# ==========================================
+
+
+def encode(kind, body):
+    """ 一帧 SSE：event + 单行 JSON data """
+    data = json.dumps(body, separators=(",", ":"), ensure_ascii=False, default=str)
+    return f"event: {kind}\ndata: {data}\n\n".encode()
+
+
+def state_body(game, at, summary, viewer):
+    """ StateStore.summary 元组 -> 推送给前端的局面 """
+    phase, round_number, turn, players = summary
+    return {
+        "game": game, "t": at, "viewer": viewer, "phase": phase, "round": round_number, "turn": turn,
+        "players": [{"active": active, "dice": len(dice), "hand": hand, "summons": summons,
+                     "hp": [health for health, _ in characters], "aura": [aura for _, aura in characters]}
+                    for active, dice, hand, summons, characters in players],
+    }
+
+
+class Subscriber:
+    """ 单个观众的有界缓冲；只在监控服务的事件循环里使用 """
+
+    def __init__(self, max_frames=256):
+        self.max_frames = max_frames
+        self.frames = collections.OrderedDict()   # 键: 对局 (局面帧，可被替换) 或序号 (决策帧)
+        self.wakeup = asyncio.Event()
+        self.dropped = 0
+        self._seq = 0
+
+    def push(self, frame, game=None):
+        """ game 不为 None 表示局面帧：替换该对局尚未发出的旧局面 """
+        if game is None:
+            self._seq += 1
+            key = self._seq
+        else:
+            key = game
+            if self.frames.pop(key, None) is not None:
+                self._drop("stale")
+        self.frames[key] = frame
+        if len(self.frames) > self.max_frames:
+            self.frames.popitem(last=False)
+            self._drop("overflow")
+        self.wakeup.set()
+
+    def take(self):
+        frames = list(self.frames.values())
+        self.frames.clear()
+        self.wakeup.clear()
+        return frames
+
+    def _drop(self, reason):
+        self.dropped += 1
+        FEED_DROPPED.inc(reason)
+
+
+class SpectatorFeed:
+    """
+    Bot 侧调用 publish_state / publish_event；监控服务调用 subscribe / unsubscribe / pump。
+    latest 保存每个进行中对局最近一帧局面，新观众连上时先补发，不必等下一次变化。
+    """
+
+    def __init__(self, max_events=1024):
+        self.active = False
+        self.subscribers = set()
+        self.latest = {}
+        self._states = {}                                      # 对局 -> (时刻, 摘要, 视角)
+        self._events = collections.deque(maxlen=max_events)    # (对局, 类型, 数据, 时刻)
+
+    # ---------- Bot 侧 ----------
+
+    def publish_state(self, game, summary, viewer=None):
+        self._states[game] = (time.time(), summary, viewer)
+
+    def publish_event(self, game, kind, data):
+        self._events.append((game, kind, data, time.time()))
+
+    # ---------- 服务端侧 ----------
+
+    def subscribe(self, max_frames=256):
+        subscriber = Subscriber(max_frames)
+        for game, frame in self.latest.items():
+            subscriber.push(frame, game)
+        self.subscribers.add(subscriber)
+        self.active = True
+        SPECTATORS.set(len(self.subscribers))
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+        SPECTATORS.set(len(self.subscribers))
+        if not self.subscribers:
+            # 没人看时 Bot 停止发布，留着的局面会过期，下一位观众等对局下一次变化即可
+            self.active = False
+            self.latest.clear()
+
+    def pump(self):
+        """ 取空交接区，每条更新编码一次后分发给全部订阅者；返回本次编码的帧数 """
+        encoded = 0
+        while True:
+            try:
+                game, (at, summary, viewer) = self._states.popitem()
+            except KeyError:
+                break
+            if not self.subscribers:
+                continue
+            frame = self.latest[game] = encode("state", state_body(game, at, summary, viewer))
+            self._fan_out(frame, game)
+            encoded += 1
+            FEED_FRAMES.inc("state")
+        while True:
+            try:
+                game, kind, data, at = self._events.popleft()
+            except IndexError:
+                break
+            if kind == "end":
+                self.latest.pop(game, None)
+            if not self.subscribers:
+                continue
+            self._fan_out(encode(kind, {"game": game, "t": at, **data}))
+            encoded += 1
+            FEED_FRAMES.inc(kind)
+        return encoded
+
+    def _fan_out(self, frame, game=None):
+        for subscriber in self.subscribers:
+            subscriber.push(frame, game)
+
+
+FEED = SpectatorFeed()
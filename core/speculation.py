@@ -0,0 +1,78 @@
+# core/speculation.py
+import asyncio
+import inspect
+
+from core.state import PLAYER_STATUSES
+
+# ==========================================
+# 🔮 推测执行 (Speculative Decisions)
+# 服务端通常先推送把我方置为 ACTING / REROLLING / CHOOSING_ACTIVE 的 Notification，
+# 稍后才发来对应的 rpc。收到这样的 Notification 时就以任务形式提前开算，
+# rpc 到达时只要局面哈希 (core/zobrist.py) 没变就直接取用结果；
+# 期间又来了新的 Notification (哈希变化) 则取消旧任务、按新局面重算。
+# ==========================================
+
+# PlayerStatus -> 即将到来的 rpc 类型 (与 core/scheduler.py 的 request_kind 一致)
+SPECULATIVE_KINDS = {
+    PLAYER_STATUSES["PLAYER_STATUS_CHOOSING_ACTIVE"]: "chooseActive",
+    PLAYER_STATUSES["PLAYER_STATUS_REROLLING"]: "rerollDice",
+    PLAYER_STATUSES["PLAYER_STATUS_ACTING"]: "action",
+}
+
+
+class Speculator:
+    """
+    用法:
+        speculator.start("rerollDice", store.hash, lambda: compute(state))   # 收到 Notification 时
+        result = await speculator.take("rerollDice", store.hash)            # 收到 rpc 时；不匹配返回 None
+    """
+
+    def __init__(self):
+        self._kind = None
+        self._hash = None
+        self._task = None
+        self.stats = {"started": 0, "hits": 0, "stale": 0, "misses": 0}
+
+    def start(self, kind, position_hash, compute):
+        """ 为 (kind, 局面哈希) 开始推测；同一局面已在推测时什么也不做 """
+        if self._task is not None and self._kind == kind and self._hash == position_hash:
+            return
+        self.discard()
+        self._kind, self._hash = kind, position_hash
+        self._task = asyncio.get_running_loop().create_task(self._run(compute))
+        self.stats["started"] += 1
+
+    @staticmethod
+    async def _run(compute):
+        result = compute()
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def take(self, kind, position_hash):
+        """ 取出与当前局面匹配的推测结果 (尚未算完则等待)；不匹配或推测失败时返回 None """
+        task, matched = self._task, self._kind == kind and self._hash == position_hash
+        if task is None:
+            self.stats["misses"] += 1
+            return None
+        if not matched:
+            self.stats["stale"] += 1
+            self.discard()
+            return None
+        self._task = self._kind = self._hash = None
+        try:
+            result = await task
+        except Exception:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return result
+
+    def discard(self):
+        task = self._task
+        if task is not None:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()    # 取走异常，避免 "never retrieved" 警告
+        self._task = self._kind = self._hash = None
@@ -0,0 +1,271 @@
+# core/state.py
+from array import array
+
+# ==========================================
+# 紧凑战场状态 (Compact State)
+# 对应 raw_protos/state.proto 中的 State / PlayerState / CharacterState / EntityState。
+# 标量字段放在 __slots__ 类里，角色数值 (血量/充能/附着...) 按玩家打包成 array，
+# 骰子存为按 DiceType 计数的向量。可直接从 state_pb2 消息或服务端 JSON dict 构建。
+# ==========================================
+
+DICE_SLOTS = 9  # DiceType: UNSPECIFIED(0) ~ OMNI(8)
+
+# JSON 中的枚举可能是名字也可能是整数，这里只收录状态里会出现的几种
+PHASE_TYPES = {
+    "PHASE_TYPE_INIT_HANDS": 0, "PHASE_TYPE_INIT_ACTIVES": 1, "PHASE_TYPE_ROLL": 2,
+    "PHASE_TYPE_ACTION": 3, "PHASE_TYPE_END": 4, "PHASE_TYPE_GAME_END": 5,
+}
+PLAYER_STATUSES = {
+    "PLAYER_STATUS_UNSPECIFIED": 0, "PLAYER_STATUS_CHOOSING_ACTIVE": 1, "PLAYER_STATUS_SWITCHING_HANDS": 2,
+    "PLAYER_STATUS_REROLLING": 3, "PLAYER_STATUS_ACTING": 4, "PLAYER_STATUS_SELECTING_CARDS": 5,
+}
+DICE_TYPES = {
+    "DICE_TYPE_UNSPECIFIED": 0, "DICE_TYPE_CRYO": 1, "DICE_TYPE_HYDRO": 2, "DICE_TYPE_PYRO": 3,
+    "DICE_TYPE_ELECTRO": 4, "DICE_TYPE_ANEMO": 5, "DICE_TYPE_GEO": 6, "DICE_TYPE_DENDRO": 7, "DICE_TYPE_OMNI": 8,
+}
+AURA_TYPES = {
+    "AURA_TYPE_NONE": 0, "AURA_TYPE_CRYO": 1, "AURA_TYPE_HYDRO": 2, "AURA_TYPE_PYRO": 3,
+    "AURA_TYPE_ELECTRO": 4, "AURA_TYPE_DENDRO": 7, "AURA_TYPE_CRYO_DENDRO": 0x71,
+}
+EQUIPMENT_TYPES = {
+    "EQUIPMENT_TYPE_OTHER": 0, "EQUIPMENT_TYPE_WEAPON": 1, "EQUIPMENT_TYPE_ARTIFACT": 2, "EQUIPMENT_TYPE_TECHNIQUE": 3,
+}
+
+
+def viewer_index(state):
+    """ 状态 dict 是哪一方的视角 (P0/P1)：对手的手牌定义 id 对我们不可见 (为 0) """
+    players = (state or {}).get("player", [])
+    if len(players) > 1:
+        # proto3 JSON 省略 0 值字段，缺省即 0
+        if players[0].get("handCard", []) and players[0]["handCard"][0].get("definitionId", 0) == 0:
+            return 1
+    return 0
+
+
+def enum_int(value, table):
+    """ 枚举名 / 整数 / None 统一转为整数 """
+    if value is None:
+        return 0
+    if isinstance(value, int):
+        return value
+    return table.get(value, 0)
+
+
+class EntityView:
+    """ 实体 (出战状态 / 召唤物 / 支援牌 / 手牌 / 角色装备与状态) """
+    __slots__ = ("id", "definition_id", "tags", "variable_name", "variable_value",
+                 "has_usage_per_round", "equipment")
+
+    def __init__(self, id, definition_id, tags=0, variable_name=None, variable_value=None,
+                 has_usage_per_round=False, equipment=None):
+        self.id = id
+        self.definition_id = definition_id
+        self.tags = tags
+        self.variable_name = variable_name
+        self.variable_value = variable_value
+        self.has_usage_per_round = has_usage_per_round
+        self.equipment = equipment
+
+    @classmethod
+    def from_proto(cls, msg):
+        return cls(
+            msg.id, msg.definition_id, msg.tags,
+            msg.variable_name if msg.HasField("variable_name") else None,
+            msg.variable_value if msg.HasField("variable_value") else None,
+            msg.has_usage_per_round,
+            msg.equipment if msg.HasField("equipment") else None,
+        )
+
+    @classmethod
+    def from_dict(cls, d):
+        equipment = d.get("equipment")
+        return cls(
+            d.get("id", 0), d.get("definitionId", 0), d.get("tags", 0),
+            d.get("variableName"), d.get("variableValue"),
+            d.get("hasUsagePerRound", False),
+            None if equipment is None else enum_int(equipment, EQUIPMENT_TYPES),
+        )
+
+    def __repr__(self):
+        return f"EntityView(id={self.id}, def={self.definition_id}, var={self.variable_name}={self.variable_value})"
+
+
+class CharacterView:
+    """ 角色视图：不持有数据，只是 PlayerState 打包数组中的一个下标 """
+    __slots__ = ("_player", "_i")
+
+    def __init__(self, player, index):
+        self._player = player
+        self._i = index
+
+    id = property(lambda self: self._player.char_ids[self._i])
+    definition_id = property(lambda self: self._player.char_defs[self._i])
+    health = property(lambda self: self._player.health[self._i])
+    max_health = property(lambda self: self._player.max_health[self._i])
+    energy = property(lambda self: self._player.energy[self._i])
+    max_energy = property(lambda self: self._player.max_energy[self._i])
+    aura = property(lambda self: self._player.aura[self._i])
+    defeated = property(lambda self: bool(self._player.defeated[self._i]))
+    tags = property(lambda self: self._player.char_tags[self._i])
+    entities = property(lambda self: self._player.char_entities[self._i])
+
+    def __repr__(self):
+        return f"CharacterView(id={self.id}, def={self.definition_id}, hp={self.health}/{self.max_health}, energy={self.energy})"
+
+
+class PlayerState:
+    """ 单个玩家。角色数值按列打包：health[i] 即第 i 个角色的血量 """
+    __slots__ = ("active_character_id", "status", "declared_end", "legend_used",
+                 "char_ids", "char_defs", "health", "max_health", "energy", "max_energy",
+                 "aura", "defeated", "char_tags", "char_entities", "_char_index",
+                 "combat_status", "summon", "support", "hand", "pile", "dice", "dice_total",
+                 "active_index", "skills")
+
+    def __init__(self):
+        self.active_character_id = None
+        self.status = 0
+        self.declared_end = False
+        self.legend_used = False
+        self.char_ids = array("i")
+        self.char_defs = array("i")
+        self.health = array("h")
+        self.max_health = array("h")
+        self.energy = array("b")
+        self.max_energy = array("b")
+        self.aura = array("B")
+        self.defeated = array("b")
+        self.char_tags = array("I")
+        self.char_entities = []
+        self._char_index = {}
+        self.combat_status = ()
+        self.summon = ()
+        self.support = ()
+        self.hand = ()
+        self.pile = array("i")           # 牌堆只保留定义 id (对手牌堆为 0)
+        self.dice = array("B", bytes(DICE_SLOTS))  # 按 DiceType 计数
+        self.dice_total = 0
+        self.active_index = None         # 出战角色在打包数组中的下标
+        self.skills = array("i")         # 出战角色可用技能定义 id
+
+    def _add_character(self, cid, def_id, health, max_health, energy, max_energy, aura, defeated, tags, entities):
+        self._char_index[cid] = len(self.char_ids)
+        self.char_ids.append(cid)
+        self.char_defs.append(def_id)
+        self.health.append(health)
+        self.max_health.append(max_health)
+        self.energy.append(energy)
+        self.max_energy.append(max_energy)
+        self.aura.append(aura)
+        self.defeated.append(1 if defeated else 0)
+        self.char_tags.append(tags)
+        self.char_entities.append(entities)
+
+    @classmethod
+    def from_proto(cls, msg):
+        p = cls()
+        p.active_character_id = msg.active_character_id if msg.HasField("active_character_id") else None
+        p.status = msg.status
+        p.declared_end = msg.declared_end
+        p.legend_used = msg.legend_used
+        for c in msg.character:
+            p._add_character(c.id, c.definition_id, c.health, c.max_health, c.energy, c.max_energy,
+                             c.aura, c.defeated, c.tags, tuple(EntityView.from_proto(e) for e in c.entity))
+        p.combat_status = tuple(EntityView.from_proto(e) for e in msg.combat_status)
+        p.summon = tuple(EntityView.from_proto(e) for e in msg.summon)
+        p.support = tuple(EntityView.from_proto(e) for e in msg.support)
+        p.hand = tuple(EntityView.from_proto(e) for e in msg.hand_card)
+        p.pile = array("i", [e.definition_id for e in msg.pile_card])
+        for d in msg.dice:
+            p.dice[d] += 1
+        p.dice_total = len(msg.dice)
+        p.active_index = p._char_index.get(p.active_character_id)
+        p.skills = array("i", [s.definition_id for s in msg.initiative_skill])
+        return p
+
+    @classmethod
+    def from_dict(cls, d):
+        p = cls()
+        p.active_character_id = d.get("activeCharacterId")
+        p.status = enum_int(d.get("status"), PLAYER_STATUSES)
+        p.declared_end = d.get("declaredEnd", False)
+        p.legend_used = d.get("legendUsed", False)
+        for c in d.get("character", []):
+            p._add_character(
+                c.get("id", 0), c.get("definitionId", 0), c.get("health", 0), c.get("maxHealth", 0),
+                c.get("energy", 0), c.get("maxEnergy", 0), enum_int(c.get("aura"), AURA_TYPES),
+                c.get("defeated", False), c.get("tags", 0),
+                tuple(EntityView.from_dict(e) for e in c.get("entity", [])),
+            )
+        p.combat_status = tuple(EntityView.from_dict(e) for e in d.get("combatStatus", []))
+        p.summon = tuple(EntityView.from_dict(e) for e in d.get("summon", []))
+        p.support = tuple(EntityView.from_dict(e) for e in d.get("support", []))
+        p.hand = tuple(EntityView.from_dict(e) for e in d.get("handCard", []))
+        p.pile = array("i", [e.get("definitionId", 0) for e in d.get("pileCard", [])])
+        dice = d.get("dice", [])
+        for die in dice:
+            p.dice[enum_int(die, DICE_TYPES)] += 1
+        p.dice_total = len(dice)
+        p.active_index = p._char_index.get(p.active_character_id)
+        p.skills = array("i", [s.get("definitionId", 0) for s in d.get("initiativeSkill", [])])
+        return p
+
+    # ------------------------------------------
+    # 查询
+    # ------------------------------------------
+    @property
+    def character_count(self):
+        return len(self.char_ids)
+
+    def character(self, index):
+        return CharacterView(self, index)
+
+    def characters(self):
+        return [CharacterView(self, i) for i in range(len(self.char_ids))]
+
+    def index_of(self, character_id):
+        """ 角色 Entity ID -> 打包数组下标 (找不到返回 None) """
+        return self._char_index.get(character_id)
+
+    @property
+    def active(self):
+        i = self.active_index
+        return None if i is None else CharacterView(self, i)
+
+    def alive_indices(self):
+        return [i for i, dead in enumerate(self.defeated) if not dead]
+
+
+class GameState:
+    """ 完整对局状态 """
+    __slots__ = ("phase", "round_number", "current_turn", "winner", "players")
+
+    def __init__(self, phase=0, round_number=0, current_turn=0, winner=None, players=()):
+        self.phase = phase
+        self.round_number = round_number
+        self.current_turn = current_turn
+        self.winner = winner
+        self.players = players
+
+    @classmethod
+    def from_proto(cls, msg):
+        """ 由 state_pb2.State 构建 (不经过 MessageToDict) """
+        return cls(
+            msg.phase, msg.round_number, msg.current_turn,
+            msg.winner if msg.HasField("winner") else None,
+            tuple(PlayerState.from_proto(p) for p in msg.player),
+        )
+
+    @classmethod
+    def from_dict(cls, d):
+        """ 由服务端 JSON (camelCase) 构建，例如 StateStore.state """
+        return cls(
+            enum_int(d.get("phase"), PHASE_TYPES), d.get("roundNumber", 0), d.get("currentTurn", 0),
+            d.get("winner"),
+            tuple(PlayerState.from_dict(p) for p in d.get("player", [])),
+        )
+
+    def player(self, who):
+        return self.players[who]
+
+    def __repr__(self):
+        return f"GameState(phase={self.phase}, round={self.round_number}, turn={self.current_turn}, players={len(self.players)})"
@@ -0,0 +1,524 @@
+# core/stub_server.py
+import asyncio
+import itertools
+import json
+import re
+import secrets
+import time
+from urllib.parse import parse_qs
+
+# ==========================================
+# 🧪 本地桩服务器 (Stub Game Server)
+# 纯 asyncio 实现的最小 HTTP/1.1 服务，模拟真实服务端的三个接口：
+#   POST /api/rooms                                          建房，返回 accessToken / playerId / room.id
+#   POST /api/rooms/{id}/players                             第二名玩家加入 (自对弈)，返回 accessToken / playerId
+#   GET  /api/rooms/{id}/players/{pid}/notification          SSE 事件流
+#   POST /api/rooms/{id}/players/{pid}/actionResponse        提交 RPC 响应
+# 事件序列来自脚本 (scripted_game，按 raw_protos 构造) 或录制文件 (load_recording)；
+# 加入的玩家拿到一份独立的脚本流；胜负每个房间只定一次，双方收到同一个 winPlayerId (真实玩家 id：房主 1，加入者 2)。
+# 可配置事件间隔、RPC 截止时间、中途断流，用于无服务端环境下的吞吐 / 重连 / 延迟测试。
+#
+# 用法:
+#   python -m core.stub_server --port 3000 --rounds 3 --interval 0.05
+#   async with StubServer(script=scripted_game(rounds=2)) as server:
+#       bot = GenshinTCGBot(base_url=server.base_url, open_debug_link=False)
+# ==========================================
+
+from core import protos
+from core.codec import BinaryProtoCodec, _protos
+from core.replay import ReplayReader
+from core.scheduler import DEFAULT_TIMING, request_kind
+
+JOIN_ROUTE = re.compile(r"^/api/rooms/(?P<room>\d+)/players$")
+ROUTE = re.compile(r"^/api/rooms/(?P<room>\d+)/players/(?P<player>\d+)/(?P<action>notification|actionResponse)$")
+
+# RPC 类型 -> 房间计时参数 (与 core/scheduler.py 的计时模型一致)
+DEADLINE_KEYS = {
+    "switchHands": "initTotalActionTime",
+    "chooseActive": "initTotalActionTime",
+    "rerollDice": "rerollTime",
+    "action": "actionTime",
+    "selectCard": "actionTime",
+}
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found", 409: "Conflict"}
+
+
+class ScriptEvent:
+    """
+    脚本中的一条 SSE 事件；两种线路格式的编码结果按需生成并缓存，可被多个房间共享。
+    winner 只用于 gameEnd：胜者座位 (0 = 房主，1 = 加入者)，推送时换成该房间确定的 winPlayerId；
+    为 None 表示 data 里已经是真实的 winPlayerId (如录制文件)。
+    """
+    __slots__ = ("type", "data", "rpc_id", "winner", "_encoded")
+
+    def __init__(self, type, data, rpc_id=None, winner=None):
+        self.type = type
+        self.data = data
+        self.rpc_id = rpc_id
+        self.winner = winner
+        self._encoded = {}
+
+    @property
+    def kind(self):
+        return request_kind(self.data) if self.type == "rpc" else None
+
+    def encode(self, wire="json"):
+        """ wire = "json" 或 "protobuf" (对应 BinaryProtoCodec 的信封) """
+        cached = self._encoded.get(wire)
+        if cached is None:
+            if wire == "protobuf" and self.type in ("notification", "rpc"):
+                notification_pb2, rpc_pb2, parse_dict = _protos()
+                message = notification_pb2.Notification() if self.type == "notification" else rpc_pb2.Request()
+                parse_dict(self.data, message, ignore_unknown_fields=True)
+                cached = BinaryProtoCodec.encode(self.type, message, self.rpc_id)
+            else:
+                envelope = {"type": self.type, "data": self.data}
+                if self.rpc_id is not None:
+                    envelope["id"] = self.rpc_id
+                cached = json.dumps(envelope, separators=(",", ":"))
+            self._encoded[wire] = cached
+        return cached
+
+
+def script_from_events(events):
+    """ [(type, data), ...] -> [ScriptEvent]，按出现顺序为 rpc 编号 (0, 1, 2 ...) """
+    counter = itertools.count()
+    return [ScriptEvent(t, d, next(counter) if t == "rpc" else None) for t, d in events]
+
+
+def load_recording(path, game=None):
+    """
+    读取录制文件：每行一个 SSE data (JSON 信封 {"type", "data", "id"?})，
+    或 core/replay.py 的录像文件 (game 为对局 id，缺省取第一局)。
+    rpc 的 id 沿用录制值；缺失时按顺序补齐。
+    """
+    if ReplayReader.is_replay(path):
+        with ReplayReader(path) as reader:
+            games = reader.games()
+            if not games:
+                return []
+            envelopes = [record.envelope() for record in reader.records(game or games[0])
+                         if record.type != "response"]
+        return [ScriptEvent(e["type"], e["data"], e.get("id")) for e in envelopes]
+    script, counter = [], itertools.count()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            envelope = json.loads(line)
+            evt_type = envelope.get("type")
+            rpc_id = None
+            if evt_type == "rpc":
+                fallback_id = next(counter)
+                rpc_id = envelope.get("id", fallback_id)
+            script.append(ScriptEvent(evt_type, envelope.get("data", {}), rpc_id))
+    return script
+
+
+def scripted_game(rounds=3, actions_per_round=4, opp_timer=True, winner=0):
+    """
+    生成一局完整的脚本对局 (消息按 raw_protos 构造后转为 camelCase JSON)：
+    开局换牌 -> 选出战 (switchActive) -> 每回合 [投骰 (resetDice) -> 若干次行动 (伤害变更 + 行动请求)] -> gameEnd。
+    winner 为胜者座位 (0 = 房主，1 = 加入者)。
+    """
+    from google.protobuf.json_format import MessageToDict
+    action_pb2, mutation_pb2, rpc_pb2, state_pb2 = protos.load("action_pb2", "mutation_pb2", "rpc_pb2", "state_pb2")
+
+    state = state_pb2.State(phase=state_pb2.PHASE_TYPE_INIT_HANDS, round_number=0)
+    next_id = itertools.count(-1, -1)
+    for who in range(2):
+        player = state.player.add(status=state_pb2.PLAYER_STATUS_SWITCHING_HANDS)
+        for c in range(3):
+            player.character.add(id=next(next_id), definition_id=1101 + 100 * c + who,
+                                 health=10, max_health=10, max_energy=3)
+        for k in range(5):
+            player.hand_card.add(id=next(next_id), definition_id=311301 + k if who == 0 else 0)
+        player.initiative_skill.add(definition_id=11011).definition_cost.add(type=1, count=1)
+    me, opp = state.player[0], state.player[1]
+
+    events = []
+
+    def notify(*mutations):
+        message = {"state": MessageToDict(state)}
+        if mutations:
+            message["mutation"] = [MessageToDict(m) for m in mutations]
+        events.append(("notification", message))
+
+    def request(req):
+        events.append(("rpc", MessageToDict(req)))
+
+    def phase(new_phase):
+        state.phase = new_phase
+        return mutation_pb2.ExposedMutation(change_phase=mutation_pb2.ChangePhaseEM(new_phase=new_phase))
+
+    def status(new_status):
+        me.status = new_status
+        return mutation_pb2.ExposedMutation(
+            player_status_change=mutation_pb2.PlayerStatusChangeEM(who=0, status=new_status))
+
+    notify()
+    request(rpc_pb2.Request(switch_hands=rpc_pb2.SwitchHandsRequest()))
+    notify(phase(state_pb2.PHASE_TYPE_INIT_ACTIVES), status(state_pb2.PLAYER_STATUS_CHOOSING_ACTIVE))
+    request(rpc_pb2.Request(choose_active=rpc_pb2.ChooseActiveRequest(candidate_ids=[c.id for c in me.character])))
+    switches = []
+    for who, p in enumerate(state.player):
+        p.active_character_id = p.character[0].id
+        switches.append(mutation_pb2.ExposedMutation(switch_active=mutation_pb2.SwitchActiveEM(
+            who=who, character_id=p.character[0].id, character_definition_id=p.character[0].definition_id)))
+    notify(*switches)
+
+    for r in range(1, rounds + 1):
+        state.round_number = r
+        del me.dice[:]
+        me.dice.extend([(r + k) % 8 + 1 for k in range(8)])
+        step = mutation_pb2.ExposedMutation(step_round=mutation_pb2.StepRoundEM())
+        dice = mutation_pb2.ExposedMutation(reset_dice=mutation_pb2.ResetDiceEM(
+            who=0, dice=me.dice, reason=mutation_pb2.RESET_DICE_REASON_ROLL))
+        notify(step, phase(state_pb2.PHASE_TYPE_ROLL), dice, status(state_pb2.PLAYER_STATUS_REROLLING))
+        request(rpc_pb2.Request(reroll_dice=rpc_pb2.RerollDiceRequest()))
+        notify(phase(state_pb2.PHASE_TYPE_ACTION), status(state_pb2.PLAYER_STATUS_ACTING))
+
+        for a in range(actions_per_round):
+            target = opp.character[a % 3]
+            old_health = target.health
+            target.health = max(1, old_health - 1)
+            damage = mutation_pb2.DamageEM(value=old_health - target.health, target_id=target.id,
+                                           target_definition_id=target.definition_id,
+                                           old_health=old_health, new_health=target.health)
+            if opp_timer:
+                events.append(("oppTimer", {"current": 20, "total": DEFAULT_TIMING["actionTime"]}))
+            notify(mutation_pb2.ExposedMutation(damage=damage))
+            skill = rpc_pb2.Action(use_skill=action_pb2.UseSkillAction(skill_definition_id=11011),
+                                   auto_selected_dice=[me.dice[0]], is_fast=False)
+            skill.required_cost.add(type=1, count=1)
+            # 预览：下一次技能对同一目标再造成 1 点伤害
+            skill.preview.add(damage=mutation_pb2.DamageEM(
+                value=1, target_id=target.id, target_definition_id=target.definition_id,
+                old_health=target.health, new_health=max(0, target.health - 1)))
+            declare_end = rpc_pb2.Action(declare_end=action_pb2.DeclareEndAction())
+            request(rpc_pb2.Request(action=rpc_pb2.ActionRequest(action=[skill, declare_end])))
+
+    state.phase = state_pb2.PHASE_TYPE_GAME_END
+    state.winner = winner
+    notify(phase(state_pb2.PHASE_TYPE_GAME_END))
+    script = script_from_events(events)
+    # 脚本不知道玩家 id：胜者记为座位，推送时由 StubServer 换成该房间的真实玩家 id
+    script.append(ScriptEvent("gameEnd", {"reason": "scripted", "message": "stub game finished"}, winner=winner))
+    return script
+
+
+class StubRoom:
+    """
+    单个房间 (的一个座位)：脚本游标、待响应的 RPC 与统计数据。
+    seat 为 0 (房主) / 1 (加入者)；outcome 由同一房间的两个座位共用，胜负只定一次。
+    """
+
+    def __init__(self, room_id, player_id, opponent_id, config, script, seat=0, outcome=None):
+        self.id = room_id
+        self.player_id = player_id
+        self.opponent_id = opponent_id
+        self.seat = seat
+        self.outcome = {} if outcome is None else outcome
+        self.token = secrets.token_hex(8)
+        self.config = config
+        self.script = script
+        self.cursor = 0
+        self.pending = None            # 当前等待响应的 (rpc_id, future)
+        self.answered = set()          # 已收到响应的 rpc id (续传重放时不再等待)
+        self.rpc_sent_at = None
+        self.latencies = []            # 每个 RPC 从发出到收到响应的秒数
+        self.timeouts = 0
+        self.connections = 0
+        self.finished = False
+        self.responses = []
+
+
+class StubServer:
+    """
+    本地桩服务器。port=0 时随机分配端口，启动后可读取 base_url。
+
+    script         : ScriptEvent 列表，或无参工厂函数 (每个房间调用一次)；默认 scripted_game()
+    event_interval : 相邻事件之间的间隔秒数 (0 表示尽快发送)
+    deadline_scale : RPC 截止时间 = 房间计时参数 * deadline_scale
+    rpc_deadlines  : 按 RPC 类型覆盖截止时间 (秒)，如 {"action": 0.5}
+    drop_after     : 每个房间第一次连接在发送这么多事件后强制断开，用于测试重连
+    stall_after    : 每个房间第一次连接在发送这么多事件后保持连接但不再发送，用于测试静默检测
+    每个事件带 SSE id (脚本下标)；重连请求带 Last-Event-ID 时从其后一条开始续传。
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, script=None, event_interval=0.0,
+                 deadline_scale=1.0, rpc_deadlines=None, drop_after=None, stall_after=None):
+        self.host = host
+        self.port = port
+        self.script = script
+        self.event_interval = event_interval
+        self.deadline_scale = deadline_scale
+        self.rpc_deadlines = rpc_deadlines or {}
+        self.drop_after = drop_after
+        self.stall_after = stall_after
+        self._closing = None
+        self.rooms = {}
+        self.guests = {}               # (房间 id, 玩家 id) -> 加入者的 StubRoom
+        self._room_ids = itertools.count(1000)
+        self._server = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}/api"
+
+    async def start(self):
+        self._closing = asyncio.Event()
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self._server is not None:
+            self._closing.set()
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def stats(self):
+        """ 汇总所有房间的统计 """
+        seats = list(self.rooms.values()) + list(self.guests.values())
+        latencies = sorted(x for room in seats for x in room.latencies)
+        return {
+            "rooms": len(self.rooms),
+            "guests": len(self.guests),
+            "finished": sum(room.finished for room in self.rooms.values()),
+            "rpcs": len(latencies),
+            "timeouts": sum(room.timeouts for room in seats),
+            "reconnects": sum(max(0, room.connections - 1) for room in seats),
+            "latency_p50": latencies[len(latencies) // 2] if latencies else None,
+            "latency_max": latencies[-1] if latencies else None,
+        }
+
+    # ---------- 业务逻辑 ----------
+
+    def _new_script(self):
+        if self.script is None:
+            return scripted_game()
+        return self.script() if callable(self.script) else self.script
+
+    def create_room(self, payload):
+        config = dict(DEFAULT_TIMING)
+        config.update({k: payload[k] for k in DEFAULT_TIMING if k in payload})
+        room = StubRoom(next(self._room_ids), 1, 2, config, self._new_script())
+        self.rooms[room.id] = room
+        return room
+
+    def join_room(self, room_id):
+        """ 第二名玩家加入：同一房间 id、新的玩家 id 与 Token、独立的脚本流；房间不存在或已满返回 None """
+        host = self.rooms.get(room_id)
+        if host is None or any(key[0] == room_id for key in self.guests):
+            return None
+        guest = StubRoom(room_id, host.opponent_id, host.player_id, host.config, self._new_script(),
+                         seat=1, outcome=host.outcome)
+        self.guests[(room_id, guest.player_id)] = guest
+        return guest
+
+    def deadline(self, room, kind):
+        if kind in self.rpc_deadlines:
+            return self.rpc_deadlines[kind]
+        return room.config[DEADLINE_KEYS.get(kind, "actionTime")] * self.deadline_scale
+
+    def submit(self, room, payload):
+        """ 处理 actionResponse；返回 (状态码, 响应体)。response 必须能解析为 rpc_pb2.Response，否则 400 """
+        if not isinstance(payload, dict) or not isinstance(payload.get("response"), dict):
+            return 400, {"message": "missing response"}
+        _, rpc_pb2, parse_dict = _protos()
+        try:
+            response = parse_dict(payload["response"], rpc_pb2.Response())
+        except Exception as e:
+            return 400, {"message": f"invalid response: {e}"}
+        if response.WhichOneof("response") is None:
+            return 400, {"message": "empty response"}
+        if room.pending is None or room.pending[0] != payload.get("id"):
+            return 409, {"message": f"no pending rpc with id {payload.get('id')}"}
+        rpc_id, future = room.pending
+        room.answered.add(rpc_id)
+        room.latencies.append(time.perf_counter() - room.rpc_sent_at)
+        room.responses.append(payload)
+        room.pending = None
+        if not future.done():
+            future.set_result(payload)
+        return 200, {"ok": True}
+
+    # ---------- HTTP ----------
+
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, target, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = header.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                body = await reader.readexactly(length) if length else b""
+                path, _, query = target.partition("?")
+                if not await self._dispatch(method, path, parse_qs(query), headers, body, writer):
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method, path, query, headers, body, writer):
+        """ 返回 False 表示处理完后关闭连接 """
+        if method == "POST" and path == "/api/rooms":
+            room = self.create_room(json.loads(body or b"{}"))
+            return await self._json(writer, 201, {
+                "accessToken": room.token, "playerId": room.player_id, "room": {"id": room.id},
+            })
+
+        join = JOIN_ROUTE.match(path) if method == "POST" else None
+        if join:
+            guest = self.join_room(int(join["room"]))
+            if guest is None:
+                return await self._json(writer, 409, {"message": "room not joinable"})
+            return await self._json(writer, 201, {"accessToken": guest.token, "playerId": guest.player_id})
+
+        match = ROUTE.match(path)
+        room = None
+        if match:
+            room_id, player_id = int(match["room"]), int(match["player"])
+            room = self.rooms.get(room_id)
+            if room is not None and player_id != room.player_id:
+                room = self.guests.get((room_id, player_id))
+        if room is None:
+            return await self._json(writer, 404, {"message": "not found"})
+        if headers.get("authorization") != f"Bearer {room.token}":
+            return await self._json(writer, 401, {"message": "bad token"})
+
+        if method == "GET" and match["action"] == "notification":
+            wire = "protobuf" if query.get("format") == ["protobuf"] else "json"
+            await self._stream(room, wire, headers.get("last-event-id"), writer)
+            return False
+        if method == "POST" and match["action"] == "actionResponse":
+            status, reply = self.submit(room, json.loads(body or b"{}"))
+            return await self._json(writer, status, reply)
+        return await self._json(writer, 404, {"message": "not found"})
+
+    async def _json(self, writer, status, payload):
+        body = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+        return True
+
+    async def _stream(self, room, wire, last_event_id, writer):
+        """ 按脚本推送 SSE；遇到 rpc 就等待响应或截止时间 """
+        room.connections += 1
+        if last_event_id is not None and last_event_id.isdigit():
+            # 客户端可能没收到断线前最后几条，从它确认的位置之后重放
+            room.cursor = min(room.cursor, int(last_event_id) + 1)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                     b"Transfer-Encoding: chunked\r\n\r\n")
+        sent = 0
+        first = room.connections == 1
+        drop_at = self.drop_after if first else None
+        stall_at = self.stall_after if first else None
+        while room.cursor < len(room.script):
+            event = room.script[room.cursor]
+            if self.event_interval:
+                await asyncio.sleep(self.event_interval)
+            await self._chunk(writer, f"id: {room.cursor}\ndata: {self._for_room(room, event).encode(wire)}\n\n")
+            sent += 1
+
+            if event.type == "rpc" and event.rpc_id not in room.answered:
+                if room.pending is None or room.pending[0] != event.rpc_id:
+                    room.pending = (event.rpc_id, asyncio.get_running_loop().create_future())
+                    room.rpc_sent_at = time.perf_counter()
+                try:
+                    await asyncio.wait_for(asyncio.shield(room.pending[1]),
+                                           timeout=self.deadline(room, event.kind))
+                except asyncio.TimeoutError:
+                    room.timeouts += 1
+                    room.finished = True
+                    timeout_event = ScriptEvent("gameEnd", {"reason": "timeout",
+                                                            "message": f"rpc {event.rpc_id} timed out"},
+                                                winner=1 - room.seat)
+                    await self._chunk(writer, f"data: {self._for_room(room, timeout_event).encode(wire)}\n\n")
+                    break
+            room.cursor += 1
+            if event.type == "gameEnd":
+                room.finished = True
+            if drop_at is not None and sent >= drop_at and room.cursor < len(room.script):
+                # 模拟网络中断：不发终止块直接断开
+                writer.transport.abort()
+                return
+            if stall_at is not None and sent >= stall_at:
+                # 模拟链路静默：连接保持，但再也没有数据
+                await self._closing.wait()
+                return
+        await self._chunk(writer, "")
+
+    @staticmethod
+    def _for_room(room, event):
+        """
+        按座位记录胜者的 gameEnd 换成真实 winPlayerId；其余事件原样返回 (共享编码缓存)。
+        房间里第一个到达 gameEnd 的座位决定胜者，另一座位收到同一个 winPlayerId。
+        """
+        if event.winner is None:
+            return event
+        seat_ids = (room.player_id, room.opponent_id) if room.seat == 0 else (room.opponent_id, room.player_id)
+        win_player_id = room.outcome.setdefault("winPlayerId", seat_ids[event.winner])
+        return ScriptEvent(event.type, {"winPlayerId": win_player_id, **event.data})
+
+    @staticmethod
+    async def _chunk(writer, text):
+        data = text.encode()
+        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        await writer.drain()
+
+
+async def _main(args):
+    script = load_recording(args.recording) if args.recording else None
+    server = StubServer(
+        host=args.host, port=args.port, event_interval=args.interval, deadline_scale=args.deadline_scale,
+        script=script or (lambda: scripted_game(rounds=args.rounds, actions_per_round=args.actions)),
+    )
+    await server.start()
+    print(f"🧪 Stub server listening on {server.base_url}")
+    await server.serve_forever()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="本地桩游戏服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--rounds", type=int, default=3, help="脚本对局的回合数")
+    parser.add_argument("--actions", type=int, default=4, help="每回合的行动请求数")
+    parser.add_argument("--interval", type=float, default=0.0, help="事件间隔 (秒)")
+    parser.add_argument("--deadline-scale", type=float, default=1.0, help="RPC 截止时间缩放系数")
+    parser.add_argument("--recording", help="录制文件 (每行一个 SSE data JSON)，替代脚本对局")
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
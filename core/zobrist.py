@@ -0,0 +1,147 @@
+# core/zobrist.py
+import zlib
+from collections import Counter, OrderedDict
+from functools import lru_cache
+
+# ==========================================
+# 局面哈希 (Zobrist-style Hashing) 与置换表 (Transposition Table)
+# 局面哈希 = 各组成部分键值之和 (mod 2^64)。用加法而不是异或，
+# 这样同一区域里两张相同的牌不会互相抵消 (多重集合也能正确表示)。
+# 组成部分：阶段 / 回合 / 行动方 / 胜者、每个玩家的出战角色 / 标记 / 骰子多重集、
+# 每个角色的血量 / 充能 / 附着 / 倒下、每个实体的 (区域, 定义 id, 变量值)。
+# 实体键不含实体 id，所以"同样的牌面"会得到同样的哈希，便于识别相似局面。
+# StateStore 在应用每条 mutation 时先减去旧部分再加上新部分，O(1) 维护。
+# ==========================================
+
+MASK = (1 << 64) - 1
+SEED = 0x2545F4914F6CDD1D
+
+# 角色装备 / 状态所在的"区域"编号 = 基数 + 所属角色定义 id，与 EntityArea 枚举 (<=6) 不冲突
+CHARACTER_AREA_BASE = 1_000_000
+
+AREA_CODES = {
+    "ENTITY_AREA_COMBAT_STATUS": 2, "ENTITY_AREA_SUMMON": 3, "ENTITY_AREA_SUPPORT": 4,
+    "ENTITY_AREA_HAND": 5, "ENTITY_AREA_PILE": 6,
+    "combatStatus": 2, "summon": 3, "support": 4, "handCard": 5, "pileCard": 6,
+}
+PLAYER_AREAS = ("combatStatus", "summon", "support", "handCard", "pileCard")
+
+
+def _mix(x):
+    """ splitmix64 终结函数 """
+    x = (x + 0x9E3779B97F4A7C15) & MASK
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK
+    return x ^ (x >> 31)
+
+
+@lru_cache(maxsize=1 << 16)
+def key(*parts):
+    """ 由若干整数 / 字符串 / 布尔 / None 确定性地生成 64 位键 (跨进程稳定，不依赖 PYTHONHASHSEED) """
+    h = SEED
+    for part in parts:
+        if isinstance(part, str):
+            part = zlib.crc32(part.encode())
+        elif part is None:
+            part = 0x5BD1E995
+        h = _mix(h ^ (int(part) & MASK))
+    return h
+
+
+def global_part(state):
+    return (key("phase", state.get("phase")) + key("round", state.get("roundNumber", 0))
+            + key("turn", state.get("currentTurn", 0)) + key("winner", state.get("winner"))) & MASK
+
+
+def player_part(who, player):
+    """ 出战角色、宣布结束 / 秘传标记、骰子多重集 """
+    h = (key("active", who, player.get("activeCharacterId"))
+         + key("declaredEnd", who, bool(player.get("declaredEnd")))
+         + key("legendUsed", who, bool(player.get("legendUsed"))))
+    for die, count in Counter(player.get("dice") or ()).items():
+        h += key("dice", who, die, count)
+    return h & MASK
+
+
+def character_part(who, char):
+    cid = char.get("id")
+    return (key("hp", who, cid, char.get("health", 0)) + key("energy", who, cid, char.get("energy", 0))
+            + key("aura", who, cid, char.get("aura")) + key("defeated", who, cid, bool(char.get("defeated")))) & MASK
+
+
+def entity_part(who, area, entity):
+    return key("entity", who, area, entity.get("definitionId", 0), entity.get("variableValue"))
+
+
+def character_area(char):
+    return CHARACTER_AREA_BASE + (char.get("definitionId") or 0)
+
+
+def full_hash(state):
+    """ 从头计算整局哈希 (快照加载时用；增量结果应与之相等) """
+    h = global_part(state)
+    for who, p in enumerate(state.get("player", [])):
+        h += player_part(who, p)
+        for char in p.get("character", []):
+            h += character_part(who, char)
+            area = character_area(char)
+            for ent in char.get("entity", []):
+                h += entity_part(who, area, ent)
+        for field in PLAYER_AREAS:
+            area = AREA_CODES[field]
+            for ent in p.get(field, []):
+                h += entity_part(who, area, ent)
+    return h & MASK
+
+
+class TranspositionTable:
+    """
+    有界置换表：哈希 -> 任意值 (评估分数 / 已选行动 ...)。
+    超过 capacity 时按 LRU 淘汰；每个条目记录写入时的代 (generation)，
+    调用 new_generation() (如每回合一次) 后，超过 max_age 代的条目视为过期。
+    """
+
+    def __init__(self, capacity=100_000, max_age=None):
+        self.capacity = capacity
+        self.max_age = max_age
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def new_generation(self):
+        self.generation += 1
+
+    def get(self, h, default=None):
+        entry = self._entries.get(h)
+        if entry is None or self._stale(entry):
+            if entry is not None:
+                del self._entries[h]
+            self.misses += 1
+            return default
+        self._entries.move_to_end(h)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, h, value):
+        self._entries[h] = (value, self.generation)
+        self._entries.move_to_end(h)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def purge(self):
+        """ 主动清掉全部过期条目，返回清掉的数量 """
+        stale = [h for h, entry in self._entries.items() if self._stale(entry)]
+        for h in stale:
+            del self._entries[h]
+        return len(stale)
+
+    def _stale(self, entry):
+        return self.max_age is not None and self.generation - entry[1] > self.max_age
+
+    def __contains__(self, h):
+        entry = self._entries.get(h)
+        return entry is not None and not self._stale(entry)
+
+    def __len__(self):
+        return len(self._entries)
@@ -2,8 +2,6 @@ import httpx
 import asyncio
 from colorama import Fore, init
 
-init(autoreset=True)
-
 BASE_URL = "http://localhost:3000/api"
 
 async def inspect():
@@ -64,4 +62,5 @@ async def inspect():
             print(Fore.RED + f"❌ 侦察卡组异常: {e}")
 
 if __name__ == "__main__":
+    init(autoreset=True)
     asyncio.run(inspect())
\ No newline at end of file
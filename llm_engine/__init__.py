@@ -0,0 +1,2 @@
+# llm_engine/__init__.py
+# 本地 LLM 决策引擎；入口: python -m llm_engine.agent --stub (见 agent.py)
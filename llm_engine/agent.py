@@ -0,0 +1,316 @@
+# llm_engine/agent.py
+import asyncio
+import json
+import re
+import time
+from collections import OrderedDict
+
+import httpx
+
+from core.catalog import get_catalog
+from core.logs import get_logger
+from core.policy import pay_for
+from core.state import GameState
+from core.zobrist import TranspositionTable
+
+# ==========================================
+# 🧠 本地 LLM 决策引擎 (LLM Agent)
+# 把状态和合法 Action 列表渲染成稳定、可 diff 的文本提示词，交给本地推理服务
+# (OpenAI 兼容的 /v1/completions，如 llama.cpp server / vLLM / Ollama) 选出行动下标。
+#   - 提示词分三段：固定规则 -> 本局不变的信息 (双方角色) -> 当前局面与合法行动。
+#     前两段按对局缓存、逐字节不变，配合 cache_prompt 让服务端复用 KV 前缀。
+#   - 回答按 (局面哈希, 合法行动集合) 缓存在 LRU 置换表里，舰队内所有 Bot 共用；
+#     同一个键正在推理时，后来者等待同一个结果而不是重复请求。
+# 用法 (main.py --policy llm 会自动加载本文件):
+#   python -m llm_engine.agent --stub --port 8081          # 本地桩推理服务 (在项目根目录运行)
+#   python main.py --policy llm --llm-url http://127.0.0.1:8081
+# ==========================================
+
+log = get_logger("llm")
+
+RULES = """You are playing Genius Invokation TCG.
+Each turn you receive the board and a numbered list of legal actions.
+Reply with the number of the single best action and nothing else.
+"""
+
+AURA_NAMES = {0: "-", 1: "cryo", 2: "hydro", 3: "pyro", 4: "electro", 7: "dendro", 0x71: "cryo+dendro"}
+DICE_NAMES = ("void", "cryo", "hydro", "pyro", "electro", "anemo", "geo", "dendro", "omni")
+COST_NAMES = DICE_NAMES[:8] + ("aligned", "energy", "legend")
+ANSWER = re.compile(r"-?\d+")
+
+
+# ------------------------------------------
+# 提示词
+# ------------------------------------------
+
+def render_prefix(state, who):
+    """ 本局不变的部分：规则 + 双方角色 (定义 id，目录里有名字时附上名字，按座位顺序) """
+    catalog = get_catalog()
+    lines = [RULES, "## Match"]
+    for side, player in (("me", state.players[who]), ("opponent", state.players[1 - who])):
+        names = (f"{d} {catalog.name(d)}" if catalog.name(d) else str(d) for d in player.char_defs)
+        lines.append(f"{side} characters: " + ", ".join(names))
+    return "\n".join(lines) + "\n"
+
+
+def _render_player(side, player):
+    lines = [f"### {side}" + (" (declared end)" if player.declared_end else "")]
+    for i in range(player.character_count):
+        marks = "*" if i == player.active_index else " "
+        status = "defeated" if player.defeated[i] else (
+            f"hp {player.health[i]}/{player.max_health[i]} energy {player.energy[i]}/{player.max_energy[i]} "
+            f"aura {AURA_NAMES.get(player.aura[i], player.aura[i])}")
+        equip = sorted(e.definition_id for e in player.char_entities[i])
+        lines.append(f"{marks} [{player.char_defs[i]}] {status}" + (f" with {equip}" if equip else ""))
+    dice = " ".join(f"{DICE_NAMES[t]}x{n}" for t, n in enumerate(player.dice) if n)
+    lines.append(f"dice: {dice or 'none'}")
+    hand = sorted(e.definition_id for e in player.hand)
+    lines.append(f"hand ({len(hand)}): {' '.join(str(d) for d in hand if d) or '?'}")
+    for name, entities in (("summons", player.summon), ("supports", player.support), ("statuses", player.combat_status)):
+        if entities:
+            items = sorted((e.definition_id, e.variable_value) for e in entities)
+            lines.append(f"{name}: " + " ".join(f"{d}({v})" if v is not None else str(d) for d, v in items))
+    return lines
+
+
+def render_turn(state, who):
+    """ 当前局面：固定字段顺序，手牌 / 召唤物等按定义 id 排序，方便逐行 diff """
+    lines = [f"## Round {state.round_number} phase {state.phase}" + (" (my turn)" if state.current_turn == who else "")]
+    lines += _render_player("me", state.players[who])
+    lines += _render_player("opponent", state.players[1 - who])
+    return "\n".join(lines) + "\n"
+
+
+def render_actions(table):
+    """ 合法行动，用 ActionRequest 里的原始下标编号 """
+    lines = ["## Legal actions"]
+    for c in table.valid:
+        cost = " ".join(f"{COST_NAMES[t] if t < len(COST_NAMES) else t}x{n}" for t, n in c.cost if n)
+        target = f" -> {c.target_id}" if c.target_id else ""
+        definition = f" {c.definition_id}" if c.definition_id else ""
+        fast = " (fast)" if c.is_fast else ""
+        lines.append(f"{c.index}: {c.kind}{definition}{target}{fast}" + (f" cost {cost}" if cost else ""))
+    return "\n".join(lines) + "\nAnswer:"
+
+
+def action_signature(table):
+    return tuple((c.index, c.kind, c.definition_id, c.target_id) for c in table.valid)
+
+
+def parse_answer(text, table):
+    """ 回答中第一个属于合法下标的整数 """
+    legal = {c.index for c in table.valid}
+    for match in ANSWER.finditer(text or ""):
+        index = int(match.group())
+        if index in legal:
+            return index
+    return None
+
+
+# ------------------------------------------
+# 推理客户端与策略
+# ------------------------------------------
+
+class CompletionClient:
+    """ OpenAI 兼容的 /v1/completions 客户端 (温度 0，只要几个 token) """
+
+    def __init__(self, base_url="http://127.0.0.1:8081", model="local", max_tokens=8, timeout=10.0, client=None):
+        self.model = model
+        self.max_tokens = max_tokens
+        self._owns_client = client is None
+        self.client = client if client is not None else httpx.AsyncClient(base_url=base_url, timeout=timeout)
+
+    async def complete(self, prompt):
+        resp = await self.client.post("/v1/completions", json={
+            "model": self.model, "prompt": prompt, "max_tokens": self.max_tokens, "temperature": 0,
+            "stop": ["\n"], "cache_prompt": True,
+        })
+        resp.raise_for_status()
+        choices = resp.json().get("choices") or [{}]
+        return choices[0].get("text", "")
+
+    async def aclose(self):
+        if self._owns_client:
+            await self.client.aclose()
+
+
+class LLMPolicy:
+    """
+    用法:
+        policy = LLMPolicy(CompletionClient("http://127.0.0.1:8081"))
+        result = await policy.decide(state, table, who, position_hash, game="room/player")
+        # result = (候选下标, 支付骰子或 None)，推理失败 / 回答无法解析时为 None
+    """
+
+    def __init__(self, client, cache_size=4096, prefix_games=256):
+        self.client = client
+        self.cache = TranspositionTable(capacity=cache_size)
+        self._prefixes = OrderedDict()     # game -> 本局固定前缀
+        self._prefix_games = prefix_games
+        self._inflight = {}
+        self.stats = {"calls": 0, "cache_hits": 0, "shared": 0, "unparsed": 0, "errors": 0, "latency": 0.0}
+
+    def prompt(self, state, table, who, game=None):
+        prefix = self._prefixes.get(game) if game is not None else None
+        if prefix is None:
+            prefix = render_prefix(state, who)
+            if game is not None:
+                self._prefixes[game] = prefix
+                if len(self._prefixes) > self._prefix_games:
+                    self._prefixes.popitem(last=False)
+        elif game is not None:
+            self._prefixes.move_to_end(game)
+        return prefix + render_turn(state, who) + render_actions(table)
+
+    async def decide(self, state, table, who, position_hash, game=None):
+        if not table.valid:
+            return None
+        if not isinstance(state, GameState):
+            state = GameState.from_dict(state)
+        key = (position_hash, action_signature(table))
+        index = self.cache.get(key)
+        if index is not None:
+            self.stats["cache_hits"] += 1
+        elif key in self._inflight:
+            self.stats["shared"] += 1
+            index = await asyncio.shield(self._inflight[key])
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            try:
+                index = await self._infer(state, table, who, game)
+                if index is not None:
+                    self.cache.put(key, index)
+            finally:
+                del self._inflight[key]
+                if not future.done():
+                    future.set_result(index)
+        if index is None:
+            return None
+        return index, pay_for(table[index], state.players[who])
+
+    async def _infer(self, state, table, who, game):
+        prompt = self.prompt(state, table, who, game)
+        self.stats["calls"] += 1
+        start = time.perf_counter()
+        try:
+            text = await self.client.complete(prompt)
+        except (httpx.HTTPError, ValueError) as e:
+            self.stats["errors"] += 1
+            log.warning("LLM 推理失败: %s", e)
+            return None
+        finally:
+            self.stats["latency"] += time.perf_counter() - start
+        index = parse_answer(text, table)
+        if index is None:
+            self.stats["unparsed"] += 1
+            log.warning("无法解析 LLM 回答: %r", text)
+        return index
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+# ------------------------------------------
+# 本地桩推理服务 (测试 / 基准用)
+# ------------------------------------------
+
+class StubCompletionServer:
+    """
+    最小的 /v1/completions 实现：回答提示词里第一个非 declareEnd 的合法行动，
+    可选 latency 模拟推理耗时。记录收到的提示词数量与最长公共前缀命中情况。
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.requests = 0
+        self.prefix_reused = 0
+        self._last_prompt = ""
+        self._server = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def answer(self, prompt):
+        self.requests += 1
+        prefix = prompt.split("## Round", 1)[0]
+        if self._last_prompt.startswith(prefix):
+            self.prefix_reused += 1
+        self._last_prompt = prompt
+        actions = prompt.rsplit("## Legal actions", 1)[-1].splitlines()
+        choices = [line.split(":", 1) for line in actions if ":" in line and line[0].isdigit()]
+        for index, text in choices:
+            if "declareEnd" not in text:
+                return index
+        return choices[0][0] if choices else "0"
+
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = header.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                body = json.loads(await reader.readexactly(length) if length else b"{}")
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                reply = json.dumps({"choices": [{"text": self.answer(body.get("prompt", ""))}]}).encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             + f"Content-Length: {len(reply)}\r\n\r\n".encode() + reply)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _main(args):
+    server = StubCompletionServer(args.host, args.port, args.latency)
+    await server.start()
+    print(f"🧪 Stub LLM listening on {server.base_url}/v1/completions")
+    async with server._server:
+        await server._server.serve_forever()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="LLM 决策引擎 (本地桩推理服务)")
+    parser.add_argument("--stub", action="store_true", help="启动本地桩推理服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟推理耗时 (秒)")
+    args = parser.parse_args()
+    if not args.stub:
+        parser.error("目前只支持 --stub；Bot 侧请用 python main.py --policy llm")
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
@@ -1,22 +1,22 @@
-import sys
-import os
 import asyncio
+import argparse
 import json
-from colorama import Fore, Style, init
 
-# ==========================================
-# 🛠️ 环境路径修正
-# ==========================================
-current_path = os.path.dirname(os.path.abspath(__file__))
-sys.path.append(current_path)
-proto_dir = os.path.join(current_path, "proto_compiled")
-sys.path.append(proto_dir)
-
-# 导入核心模块
+# 导入核心模块 (均无导入期副作用；Protobuf 由 core/protos.py、numpy 由决策路径按需加载)
 from core.network import GenshinTCGBot
-
-# 初始化彩色输出
-init(autoreset=True)
+from core.codec import CODECS, get_codec
+from core.fleet import BotFleet
+from core.scheduler import fallback_response, request_kind
+from core.actions import DICE_REQUIREMENT_TYPES, ActionTable
+from core.dice import OMNI, dice_vector, solve_reroll
+from core.executor import MODES, DecisionExecutor
+from core.batching import BatchBroker
+from core.speculation import SPECULATIVE_KINDS, Speculator
+from core.serializer import Serializer
+from core.state import DICE_TYPES, PLAYER_STATUSES, GameState, enum_int, viewer_index
+from core.zobrist import TranspositionTable
+from core.replay import ReplayRecorder
+from core.logs import get_logger, setup_logging
 
 # ==========================================
 # ⚙️ 房间规格预设 (已修正数值限制)
@@ -70,152 +70,292 @@ ROOM_PRESETS = {
     }
 }
 
+def load_llm_agent():
+    """ 按需导入 llm_engine.agent：只有 --policy llm 才付 httpx 之外的导入开销 """
+    from llm_engine import agent
+    return agent
+
+
 class SmartBot(GenshinTCGBot):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, executor=None, policy=None, broker=None, **kwargs):
+        super().__init__(**kwargs)
         self.last_rpc_id = None      
+        self.last_request = None     # 最近一次 rpc 的请求体 (rerollDice / action / ...)
+        self.last_rpc_at = None      # 收到该 rpc 的时刻，截止时间从这里起算
         self.current_state = None    
+        self.action_table = None     # 最近一次行动请求的候选表 (core/actions.py)
+        self.weights = None          # 预览评估权重 (None = core/evaluator.py 的默认权重)
+        # 决策执行器 (core/executor.py)：inline / thread / process，舰队模式下共用
+        self.executor = executor or DecisionExecutor("inline")
+        # 可选的外部策略 (如 llm_engine/agent.py 的 LLMPolicy)；失败时回退到贪心评估
+        self.policy = policy
+        # 跨对局批处理 (core/batching.py)：舰队模式下把各局的贪心评估攒成一批
+        self.broker = broker
+        # 推测执行 (core/speculation.py)：Notification 把我方置为待操作状态时提前开算
+        self.speculator = Speculator()
+        # (局面哈希, 候选签名) -> (Candidate.key, 支付骰子)；每回合换代，只保留最近两回合
+        self.decisions = TranspositionTable(capacity=4096, max_age=1)
         self.max_rpc_id_seen = -1 
-
-    async def start_heartbeat(self):
-        """ 防止 AttributeError 的心跳占位符 """
-        try:
-            while True:
-                await asyncio.sleep(60)
-        except asyncio.CancelledError:
-            pass
+        # 状态更新段应用过新的 notification、决策段还没看过 (决策段据此按最新局面推测)
+        self.state_dirty = False
 
     async def try_action(self):
-        """ 尝试行动：基于 RPC ID 的绝对优先逻辑 """
+        """ 尝试行动：按 rpc 请求的种类分派，响应交给调度器按截止时间发送 """
         if self.last_rpc_id is None:
             return
 
         rpc_id = self.last_rpc_id
-        state = self.current_state or {} 
-        phase_raw = state.get("phase", "Unknown")
-
-        print(Fore.MAGENTA + f"🧩 [决策流] RPC: {rpc_id} | Phase: {phase_raw}")
-
-        # --- RPC 0: 换牌 ---
-        if rpc_id == 0:
-            print(Fore.YELLOW + f"🤖 [AI] 强制响应换牌 (RPC: 0)...")
-            payload = {
-                "id": rpc_id,
-                "response": {"switchHands": {"removedHandIds": []}}
-            }
-            self.last_rpc_id = None 
-            await asyncio.sleep(0.5)
-            await self.send_action(payload)
+        state = self.current_state or {}
+        kind = request_kind(self.last_request) or "action"
+        self.log.debug("🧩 [决策流] Phase: %s | 请求: %s", state.get("phase", "Unknown"), kind, rpc=rpc_id)
+
+        # --- 换牌 ---
+        if kind == "switchHands":
+            self.log.info("🤖 [AI] 响应换牌 (全部保留)", rpc=rpc_id)
+            await self.respond(rpc_id, kind, lambda: {"id": rpc_id, "response": Serializer.switch_hands([])})
             return
 
-        # --- RPC 1: 选首发 (关键修复逻辑) ---
-        if rpc_id == 1:
-            print(Fore.YELLOW + f"🤖 [AI] 强制响应选人 (RPC: 1)...")
-            
-            target_entity_id = None
-            if state:
-                players = state.get("player", [])
-                my_idx = 0 
-                # 自动识别 P0/P1
-                if len(players) > 1:
-                    if players[0].get("handCard", []) and players[0]["handCard"][0].get("definitionId") == 0:
-                        my_idx = 1
-                
-                me = players[my_idx]
-                my_chars = me.get("characters", [])
-                if my_chars:
-                    # 必须用 id (Entity ID)
-                    target_entity_id = my_chars[0].get("id")
-                    print(Fore.GREEN + f"   ✅ 从状态中提取角色 Entity ID: {target_entity_id}")
-
-            if target_entity_id is None:
-                print(Fore.RED + "⚠️ 警告: 无法获取角色状态，尝试盲打 Entity ID: 1")
-                target_entity_id = 1 
-
-            payload = {
-                "id": rpc_id,
-                "response": {
-                    "decideActive": { 
-                        "activeId": target_entity_id
-                    }
-                }
-            }
-            self.last_rpc_id = None
-            await asyncio.sleep(0.5)
-            await self.send_action(payload)
+        # --- 选出战 (开局首发 / 角色倒下后的替补) ---
+        if kind == "chooseActive":
+            self.log.info("🤖 [AI] 响应选人", rpc=rpc_id)
+            candidates = (self.last_request.get(kind) or {}).get("candidateIds") or []
+            payload = await self.speculator.take(kind, self.state_store.hash)
+            if payload is None or (candidates and payload["response"]["chooseActive"]["activeCharacterId"]
+                                   not in candidates):
+                payload = self.choose_active_payload(rpc_id, self.active_choices(state), candidates)
+            await self.respond(rpc_id, kind, lambda: dict(payload, id=rpc_id))
             return
 
-        # --- RPC 2~8: 投骰子 ---
-        is_roll_phase = (phase_raw == "PHASE_ROLL" or phase_raw == 1 or "ROLL" in str(phase_raw).upper())
-        if is_roll_phase:
-            print(Fore.YELLOW + f"🤖 [AI] 响应重投 (RPC: {rpc_id})...")
-            payload = {
-                "id": rpc_id,
-                "response": {"rerollDice": {"diceIndex": []}}
-            }
-            self.last_rpc_id = None
-            await asyncio.sleep(1)
-            await self.send_action(payload)
+        # --- 投骰子 ---
+        if kind == "rerollDice":
+            self.log.info("🤖 [AI] 响应重投", rpc=rpc_id)
+            payload = await self.speculator.take(kind, self.state_store.hash)
+            if payload is None:
+                payload = self.reroll_payload(rpc_id, self.reroll_plan(state))
+            await self.respond(rpc_id, kind, lambda: dict(payload, id=rpc_id))
             return
 
         # --- 通用行动 ---
-        print(Fore.RED + f"🤖 [AI] 通用行动响应 (RPC: {rpc_id})...")
-        payload = {
-            "id": rpc_id,
-            "response": {"action": {"declareEnd": {}}}
-        }
+        self.log.info("🤖 [AI] 通用行动响应", rpc=rpc_id)
+        if kind == "action":
+            self.action_table = ActionTable.from_dict(self.last_request)
+            table = self.action_table
+            deadline = self.scheduler.deadline(kind, self.last_rpc_at)
+            snapshot, guess = await self.speculator.take(kind, self.state_store.hash) or (None, None)
+            await self.respond(rpc_id, kind, lambda: self.choose_action(rpc_id, table, deadline, snapshot, guess))
+            return
+        await self.respond(rpc_id, kind, lambda: fallback_response(rpc_id, kind, self.last_request))
+
+    async def choose_action(self, rpc_id, table, deadline=None, snapshot=None, guess=None):
+        """
+        行动策略：按预览评估后贪心选分数最高的合法行动 (core/policy.py)；没有状态时宣布结束。
+        评估交给决策执行器，进程模式下只传 GameState / ActionTable 快照。
+        snapshot 为推测阶段已转换好的 GameState (局面未变时可直接用)；
+        guess 为推测阶段用上一张候选表算出的 (候选签名, Candidate.key, 骰子)，签名与本次一致才采用。
+        """
+        state = self.current_state
+        if state and table.valid:
+            signature = table.signature()
+            key = (self.state_store.hash, signature)
+            cached = self.decisions.get(key)
+            if cached is not None:
+                # 缓存的是候选身份而不是下标：同一局面下不合法候选的排列可能不同
+                choice, dice = cached
+                candidate = table.find(choice)
+                if candidate is not None:
+                    self.log.debug("🎯 命中置换表 %r", candidate, rpc=rpc_id)
+                    return candidate.response(rpc_id, dice)
+            if guess is not None and guess[0] == signature:
+                candidate = table.find(guess[1])
+                if candidate is not None:
+                    self.decisions.put(key, guess[1:])
+                    self.log.debug("🔮 采用推测结果 %r", candidate, rpc=rpc_id)
+                    return candidate.response(rpc_id, guess[2])
+            if snapshot is None:
+                snapshot = GameState.from_dict(state)
+            who = self.my_index(state)
+            result = None
+            if self.policy is not None:
+                result = await self.policy.decide(snapshot, table, who, self.state_store.hash, game=self.game_key())
+            if result is None and self.broker is not None:
+                result = await self.broker.submit((snapshot, table, who), deadline=deadline, key=rpc_id)
+            elif result is None:
+                from core.policy import greedy_action
+                result = await self.executor.run(greedy_action, snapshot, table, who, self.weights)
+            if result is not None:
+                index, dice = result
+                self.decisions.put(key, (table[index].key, dice))
+                self.log.debug("🎯 选择 %r", table[index], rpc=rpc_id)
+                return table[index].response(rpc_id, dice)
+        if table.end is None:
+            return None
+        return table.end.response(rpc_id)
+
+    async def respond(self, rpc_id, kind, decide):
+        """ 清掉待处理令牌后交给调度器：决策就绪立即发送，超时前保证发出兜底响应 """
+        request = self.last_request
+        received_at = self.last_rpc_at
         self.last_rpc_id = None
-        await asyncio.sleep(1)
-        await self.send_action(payload)
+        await self.scheduler.respond(
+            rpc_id, kind, decide, fallback_response(rpc_id, kind, request),
+            self.send_action, received_at=received_at,
+        )
 
-    async def handle_game_event(self, raw_data):
-        import json
-        try:
-            event = json.loads(raw_data)
-        except:
-            return 
+    def speculate(self, state):
+        """
+        我方进入待操作状态时，按当前局面提前准备 rpc 的答案 (见 core/speculation.py)。
+        推测任务稍后才运行，而 state 会被状态更新段原地修改，所以这里先取出计算所需的输入快照。
+        """
+        me = self.my_player(state)
+        kind = SPECULATIVE_KINDS.get(enum_int(me.get("status"), PLAYER_STATUSES)) if me else None
+        if kind is None:
+            return
+        if kind == "chooseActive":
+            choices = self.active_choices(state)
+            compute = lambda: self.choose_active_payload(None, choices)
+        elif kind == "rerollDice":
+            plan = self.reroll_plan(state)
+            compute = lambda: self.reroll_payload(None, plan)
+        else:
+            snapshot, table, who = GameState.from_dict(state), self.action_table, self.my_index(state)
+            compute = lambda: self.speculate_action(snapshot, table, who)
+        self.speculator.start(kind, self.state_store.hash, compute)
+
+    async def speculate_action(self, snapshot, table, who):
+        """
+        行动推测：真正的候选要等 rpc 才知道，先用上一张候选表在新局面上跑一遍贪心评估，
+        返回 (snapshot, guess)；rpc 到达后 choose_action 只在候选签名一致时采用 guess。
+        外部策略 / 批处理有自己的调度，不做推测评估，只提前转换快照。
+        """
+        if table is None or not table.valid or self.policy is not None or self.broker is not None:
+            return snapshot, None
+        from core.policy import greedy_action
+        result = await self.executor.run(greedy_action, snapshot, table, who, self.weights)
+        if result is None:
+            return snapshot, None
+        index, dice = result
+        return snapshot, (table.signature(), table[index].key, dice)
 
-        evt_type = event.get("type")
-        evt_data = event.get("data", {})
+    @staticmethod
+    def my_index(state):
+        """ 自动识别 P0/P1 (见 core/state.py 的 viewer_index) """
+        return viewer_index(state)
+
+    def my_player(self, state):
+        players = (state or {}).get("player", [])
+        return players[self.my_index(state)] if players else None
+
+    def reroll_plan(self, state):
+        """ 重投的输入快照：(骰子计数, 要保留的元素)；没有己方状态时返回 None """
+        me = self.my_player(state)
+        if me is None:
+            return None
+        pool = dice_vector(enum_int(d, DICE_TYPES) for d in me.get("dice", []))
+        keep = {c.get("type") for s in me.get("initiativeSkill", []) for c in s.get("definitionCost", [])}
+        keep = tuple(sorted(t for t in (enum_int(x, DICE_REQUIREMENT_TYPES) for x in keep) if 0 < t < OMNI))
+        return pool, keep
+
+    @staticmethod
+    def reroll_payload(rpc_id, plan):
+        """ 重投：保留万能骰和己方技能费用涉及的元素骰，其余重投 """
+        if plan is None:
+            return {"id": rpc_id, "response": Serializer.reroll_dice([])}
+        return {"id": rpc_id, "response": Serializer.reroll_dice(list(solve_reroll(*plan)))}
+
+    def active_choices(self, state):
+        """ 选出战的输入快照：可上场角色的 ((Entity ID, 血量), ...)，不含倒下的和当前出战的 """
+        me = self.my_player(state)
+        if me is None:
+            return ()
+        active = me.get("activeCharacterId")
+        return tuple((c.get("id"), c.get("health", 0)) for c in me.get("character", [])
+                     if not c.get("defeated") and c.get("health", 0) > 0 and c.get("id") != active)
+
+    def choose_active_payload(self, rpc_id, choices, candidates=()):
+        """ 选出战：开局选首发 / 倒下后选替补，取剩余血量最高的角色 (同血量按站位)；只在候选范围内选 """
+        if candidates:
+            choices = [c for c in choices if c[0] in candidates] or [(candidates[0], 0)]
+        if choices:
+            target_entity_id = max(choices, key=lambda c: c[1])[0]
+            self.log.debug("   ✅ 选择角色 Entity ID: %s", target_entity_id, rpc=rpc_id)
+        else:
+            self.log.warning("⚠️ 警告: 无法获取角色状态，尝试盲打 Entity ID: 1", rpc=rpc_id)
+            target_entity_id = 1
+        return {"id": rpc_id, "response": Serializer.choose_active(target_entity_id)}
+
+    def apply_event(self, event):
+        """ 状态更新段 (core/pipeline.py)：每条事件都按顺序应用，返回是否需要唤醒决策段 """
+        # event.data 只在用到的分支里取：proto 模式下 notification 不整份转成 dict
+        evt_type = event.type
 
         # 💀 游戏结束监听
         if evt_type == "gameEnd":
-            print(Fore.RED + "\n" + "█"*50)
-            print(Fore.RED + f"💀 游戏结束! 获胜者: {evt_data.get('winPlayerId')}")
-            print(Fore.RED + f"❌ [判负原因]: {evt_data.get('reason')}")
-            print(Fore.RED + f"📜 信息: {evt_data.get('message')}")
-            print(Fore.RED + "█"*50 + "\n")
-            return
+            self.log.warning("💀 游戏结束! 获胜者: %s | ❌ [判负原因]: %s | 📜 信息: %s",
+                             event.data.get('winPlayerId'), event.data.get('reason'), event.data.get('message'))
+            self.winner = event.data.get('winPlayerId')
+            self.game_finished = True
+            self.publish_end(self.winner, event.data.get('reason'))
+            return False
 
         # ⚡ RPC 监听
         if evt_type == "rpc":
-            rpc_id = event.get("id")
-            if rpc_id is None: rpc_id = evt_data.get("id")
+            rpc_id = event.rpc_id
             self.last_rpc_id = rpc_id
-            if rpc_id is not None:
-                self.max_rpc_id_seen = max(self.max_rpc_id_seen, rpc_id)
-                print(Fore.MAGENTA + f"⚡ [Event] ✅ 收到令牌 RPC: {self.last_rpc_id}")
-                await self.try_action()
-            return
+            self.last_request = event.data
+            self.last_rpc_at = self.scheduler.clock()
+            if rpc_id is None:
+                return False
+            self.max_rpc_id_seen = max(self.max_rpc_id_seen, rpc_id)
+            self.log.debug("⚡ [Event] ✅ 收到令牌", rpc=rpc_id)
+            return True
+
+        # ⏱️ 对手计时：校正服务端实际生效的行动时限
+        if evt_type == "oppTimer":
+            self.scheduler.observe_opp_timer(event.data)
+            return False
 
-        # 📡 Notification 监听
+        # 📡 Notification 监听：状态必须逐条更新，推测执行留给决策段按最新局面做
         if evt_type == "notification":
-            state = evt_data.get("state", {})
+            self.last_delta = self.state_store.apply_event(event)
+            state = self.state_store.state
             if state:
                 self.current_state = state
-                if self.last_rpc_id is not None:
-                    await self.try_action()
+                self.scheduler.on_round(state.get("roundNumber"))
+                self.decisions.generation = state.get("roundNumber", 0)
+                self.publish_state()
+                self.state_dirty = True
+                return True
+        return False
 
-async def main():
-    bot = SmartBot()
-    
-    print(Fore.CYAN + "请选择房间规格 (官方配置):")
-    for key, val in ROOM_PRESETS.items():
-        print(f"  [{key}] {val['name']}")
+    async def decide(self):
+        """
+        决策段：唤醒时只看最新局面。决策 + POST 期间到达的 notification 合并成下一次唤醒，
+        只重新推测一次；每个 rpc 只调用一次 try_action (respond 会清掉 last_rpc_id)。
+        """
+        if self.state_dirty:
+            self.state_dirty = False
+            if self.current_state:
+                self.speculate(self.current_state)
+        if self.last_rpc_id is not None:
+            await self.try_action()
+
+async def main(preset_key=None, base_url="http://localhost:3000/api", codec="json", stall_timeout=15.0, recorder=None,
+               executor=None, policy=None):
+    from colorama import Fore
+
+    bot = SmartBot(base_url=base_url, codec=get_codec(codec), stall_timeout=stall_timeout, recorder=recorder,
+                   executor=executor, policy=policy)
     
-    choice = input(Fore.CYAN + "请输入序号 (默认 5): ").strip()
-    if not choice:
-        choice = "5"
+    if preset_key is None:
+        print(Fore.CYAN + "请选择房间规格 (官方配置):")
+        for key, val in ROOM_PRESETS.items():
+            print(f"  [{key}] {val['name']}")
+        
+        choice = input(Fore.CYAN + "请输入序号 (默认 5): ").strip()
+        if not choice:
+            choice = "5"
+    else:
+        choice = preset_key
         
     selected_preset = ROOM_PRESETS.get(choice, ROOM_PRESETS["2"])
     print(Fore.GREEN + f"✅ 已选择: {selected_preset['name']}")
@@ -230,22 +370,94 @@ async def main():
         else:
             print(Fore.RED + "⚠️ 警告：generate_debug_link 未在 network.py 中定义，无法自动生成链接")
 
-        # 创建任务
-        listener_task = asyncio.create_task(bot.listen_to_game())
-        heartbeat_task = asyncio.create_task(bot.start_heartbeat())
-        
+        # 链路存活检测与断线重连都在 listen_to_game 内部完成
         try:
-            await asyncio.wait(
-                [listener_task, heartbeat_task], 
-                return_when=asyncio.FIRST_COMPLETED
-            )
+            await bot.listen_to_game()
         except asyncio.CancelledError:
             pass
+        finally:
+            await bot.aclose()
     else:
         print(Fore.RED + "⛔ 程序终止")
 
+async def run_fleet(args, recorder=None, executor=None, policy=None):
+    """ 舰队模式：单进程、单事件循环并发跑多局 (所有对局写入同一个录像文件) """
+    broker = None
+    if args.batch_size > 1:
+        from core.policy import greedy_batch
+        broker = BatchBroker(greedy_batch, executor=executor, max_batch=args.batch_size,
+                             window=args.batch_window / 1000)
+    preset = ROOM_PRESETS.get(args.preset or "2", ROOM_PRESETS["2"])
+    fleet = BotFleet(
+        SmartBot,
+        total_games=args.bots,
+        concurrency=args.concurrency,
+        base_url=args.base_url,
+        room_config=preset["config"],
+        max_restarts=args.max_restarts,
+        bot_kwargs={"codec": get_codec(args.codec), "stall_timeout": args.stall_timeout, "recorder": recorder,
+                    "executor": executor, "policy": policy, "broker": broker},
+    )
+    await fleet.run()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="七圣召唤 AI Agent")
+    parser.add_argument("--preset", choices=sorted(ROOM_PRESETS), help="房间规格序号 (不填则交互选择)")
+    parser.add_argument("--bots", type=int, default=0, help="舰队模式：总对局数 (0 = 单 Bot 交互模式)")
+    parser.add_argument("--concurrency", type=int, default=None, help="舰队模式：同时进行的最大局数 (默认等于 --bots)")
+    parser.add_argument("--max-restarts", type=int, default=2, help="舰队模式：每个 Bot 崩溃后的最大重启次数")
+    parser.add_argument("--base-url", default="http://localhost:3000/api", help="游戏服务端 API 地址")
+    parser.add_argument("--codec", choices=sorted(CODECS), default="json", help="SSE 事件解码方式 (proto 需服务端支持)")
+    parser.add_argument("--stall-timeout", type=float, default=15.0, help="SSE 链路多少秒没有数据即判定静默并重连")
+    parser.add_argument("--log-level", default=None, choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="日志级别 (默认 INFO；舰队模式下 Bot 日志默认只输出 WARNING 以上)")
+    parser.add_argument("--record", default=None, help="把全部 SSE 事件追加写入该录像文件 (core/replay.py)")
+    parser.add_argument("--record-binary", action="store_true", help="录像中 notification / rpc 以 Protobuf 二进制保存")
+    parser.add_argument("--decide-mode", choices=MODES, default="inline",
+                        help="决策在哪里执行：事件循环内 / 线程池 / 进程池 (舰队模式下所有 Bot 共用)")
+    parser.add_argument("--decide-workers", type=int, default=None, help="线程池 / 进程池大小 (默认 CPU 核数)")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="舰队模式：跨对局批量评估的最大批大小 (1 = 不批处理)")
+    parser.add_argument("--batch-window", type=float, default=5.0, help="舰队模式：攒批的最长等待 (毫秒)")
+    parser.add_argument("--policy", choices=["greedy", "llm"], default="greedy",
+                        help="行动策略：预览贪心 / 本地 LLM (llm_engine/agent.py，失败时回退贪心)")
+    parser.add_argument("--llm-url", default="http://127.0.0.1:8081", help="OpenAI 兼容的本地推理服务地址")
+    parser.add_argument("--llm-model", default="local", help="推理服务的模型名")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="在该端口启动本地监控服务 (web_ui/server.py：/metrics、/metrics.json、观战推送 /feed 与仪表盘)")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
+    from colorama import Fore, init
+
+    # 初始化彩色输出
+    init(autoreset=True)
+    args = parse_args()
+    setup_logging(args.log_level or "INFO")
+    if args.bots > 0 and args.log_level is None:
+        # 舰队模式下几十个 Bot 的逐事件日志没有意义，只保留警告以上；舰队汇总照常输出
+        get_logger("bot").setLevel("WARNING")
+    recorder = ReplayRecorder(args.record, binary=args.record_binary) if args.record else None
+    executor = DecisionExecutor(args.decide_mode, args.decide_workers)
+    policy = None
+    if args.policy == "llm":
+        agent = load_llm_agent()
+        policy = agent.LLMPolicy(agent.CompletionClient(args.llm_url, args.llm_model))
+    dashboard = None
+    if args.metrics_port is not None:
+        from web_ui.server import DashboardServer
+        dashboard = DashboardServer(port=args.metrics_port).start_in_thread()
+        print(Fore.CYAN + f"📊 监控服务: {dashboard.url}  (/metrics, /metrics.json, /feed)")
     try:
-        asyncio.run(main())
+        if args.bots > 0:
+            asyncio.run(run_fleet(args, recorder, executor, policy))
+        else:
+            asyncio.run(main(args.preset, args.base_url, args.codec, args.stall_timeout, recorder, executor, policy))
     except KeyboardInterrupt:
-        print(Fore.YELLOW + "\n👋 用户手动中断")
\ No newline at end of file
+        print(Fore.YELLOW + "\n👋 用户手动中断")
+    finally:
+        executor.shutdown(wait=False)
+        if recorder is not None:
+            recorder.close()
+        if dashboard is not None:
+            dashboard.stop_thread()
@@ -0,0 +1,342 @@
+# selfplay.py
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import httpx
+
+from core.logs import get_logger, setup_logging
+
+# ==========================================
+# 🏟️ 卡组自对弈评测 (Self-Play Harness)
+# 参赛者 = 卡组 × 策略；两两循环赛，每对打 N 局、轮换房主座位。
+# 每局在进程池的一个工作进程里跑：房主用自己的卡组建房，对手以第二名玩家加入同一房间，
+# 两个 SmartBot 在同一个事件循环里对打到 gameEnd。
+#   - 结果逐局追加写入 JSONL，中断后以同一文件再次运行只补跑未完成的对局；
+#   - 工作进程崩溃 (BrokenProcessPool) 时重建进程池，在途对局重新排队，
+#     同一局失败 / 崩溃超过 max_attempts 次则记为失败，不再阻塞其余对局；
+#   - 胜率 (平局记半场) 给出 Wilson 置信区间。
+# 用法:
+#   python selfplay.py --fetch-decks 0 --policies greedy --games 20 --workers 8 --out runs/selfplay.jsonl
+#   python -m core.stub_server --port 3000 &  python selfplay.py --entrants entrants.json --games 4
+# entrants.json: [{"name": "...", "deck": {"characters": [...], "cards": [...]}, "policy": "greedy"}, ...]
+# ==========================================
+
+DEFAULT_BASE_URL = "http://localhost:3000/api"
+POLICIES = ("greedy", "llm")
+
+log = get_logger("selfplay")
+
+
+# ------------------------------------------
+# 参赛者与赛程
+# ------------------------------------------
+
+def fetch_decks(base_url=DEFAULT_BASE_URL, version=0, limit=None):
+    """ 从服务端拉取该版本下的合法卡组 (与 debug_server.py 相同的 GET /decks?requiredVersion=) """
+    resp = httpx.get(f"{base_url}/decks", params={"requiredVersion": version}, timeout=10.0)
+    resp.raise_for_status()
+    decks = resp.json().get("data", [])[:limit]
+    return [{"name": str(d.get("name") or d.get("id")), "deck": {"characters": d["characters"], "cards": d["cards"]}}
+            for d in decks]
+
+
+def make_entrants(decks, policies=("greedy",)):
+    """ 卡组 × 策略 -> 参赛者列表；名字为 "卡组名/策略" """
+    return [{"name": f"{d['name']}/{policy}", "deck": d["deck"], "policy": policy}
+            for d in decks for policy in policies]
+
+
+def round_robin(entrants, games_per_pair):
+    """
+    两两循环赛程：每对 (a, b) 打 games_per_pair 局，偶数局 a 当房主、奇数局 b 当房主。
+    每局的 key 在多次运行间保持不变，用于续跑。
+    """
+    tasks = []
+    for i, a in enumerate(entrants):
+        for b in entrants[i + 1:]:
+            for game in range(games_per_pair):
+                tasks.append({"key": f"{a['name']}|{b['name']}|{game}", "a": a, "b": b, "game": game,
+                              "host": "a" if game % 2 == 0 else "b"})
+    return tasks
+
+
+def wilson(score, n, z=1.96):
+    """ 胜率的 Wilson 置信区间 (score 为胜场数，平局记 0.5)；n = 0 时返回 (0, 1) """
+    if n == 0:
+        return 0.0, 1.0
+    p = score / n
+    center = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+# ------------------------------------------
+# 结果存储 (JSONL，追加写入)
+# ------------------------------------------
+
+class ResultStore:
+    """ 每局一行；同一 key 以最后一行为准。只有 status == "ok" 的对局在续跑时被跳过 """
+
+    def __init__(self, path):
+        self.path = path
+        self.results = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        result = json.loads(line)
+                    except ValueError:
+                        continue    # 中断时写了一半的行
+                    self.results[result["key"]] = result
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def done(self, key):
+        result = self.results.get(key)
+        return result is not None and result["status"] == "ok"
+
+    def append(self, result):
+        self.results[result["key"]] = result
+        self._file.write(json.dumps(result, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+# ------------------------------------------
+# 单局 (在工作进程中执行)
+# ------------------------------------------
+
+def _init_worker(log_level):
+    setup_logging(log_level)
+
+
+def _make_policy(entrant, options):
+    if entrant["policy"] != "llm":
+        return None
+    from main import load_llm_agent
+    agent = load_llm_agent()
+    return agent.LLMPolicy(agent.CompletionClient(options["llm_url"], options["llm_model"]))
+
+
+async def _play(task, options):
+    from main import SmartBot
+
+    host_side, guest_side = ("a", "b") if task["host"] == "a" else ("b", "a")
+    host_entrant, guest_entrant = task[host_side], task[guest_side]
+    policies = [_make_policy(host_entrant, options), _make_policy(guest_entrant, options)]
+    started = time.monotonic()
+    async with httpx.AsyncClient(base_url=options["base_url"], timeout=None) as client:
+        host, guest = (SmartBot(client=client, base_url=options["base_url"], open_debug_link=False, policy=policy)
+                       for policy in policies)
+        try:
+            config = dict(options["room"], deck=host_entrant["deck"])
+            if not await host.login_guest(name=f"SelfPlay_{task['game']:03d}", custom_config=config):
+                raise RuntimeError("建房失败")
+            if not await guest.join_room(host.room_id, name=f"SelfPlay_{task['game']:03d}b",
+                                         deck=guest_entrant["deck"]):
+                raise RuntimeError("加入房间失败")
+            await asyncio.wait_for(asyncio.gather(host.listen_to_game(), guest.listen_to_game()),
+                                   timeout=options["game_timeout"])
+            if not host.game_finished:
+                raise RuntimeError("未收到 gameEnd")
+            state = host.state_store.state or {}
+            if host.winner is None:
+                score = 0.5
+            else:
+                host_won = host.winner == host.player_id
+                score = 1.0 if host_won == (host_side == "a") else 0.0
+            return {"score": score, "winner": host.winner, "rounds": state.get("roundNumber"),
+                    "room": host.room_id, "elapsed": round(time.monotonic() - started, 2)}
+        finally:
+            for bot in (host, guest):
+                await bot.aclose()
+            for policy in policies:
+                if policy is not None:
+                    await policy.aclose()
+
+
+def play_game(task, options):
+    """ 工作进程入口：跑一局，返回可写入 ResultStore 的结果 (score 为 a 方得分) """
+    result = {"key": task["key"], "a": task["a"]["name"], "b": task["b"]["name"], "game": task["game"],
+              "host": task["host"]}
+    try:
+        result.update(asyncio.run(_play(task, options)), status="ok")
+    except Exception as e:
+        result.update(status="error", error=f"{type(e).__name__}: {e}")
+    return result
+
+
+# ------------------------------------------
+# 调度
+# ------------------------------------------
+
+def run_tournament(tasks, store, options, workers=None, max_attempts=3, games_per_worker=None, log_level="ERROR"):
+    """
+    在进程池中跑完所有未完成的对局。同时在途的对局数不超过 workers，
+    这样进程池崩溃时只有在途的几局被计一次失败。返回本次新完成的局数。
+    """
+    workers = workers or os.cpu_count() or 1
+    queue = deque(task for task in tasks if not store.done(task["key"]))
+    attempts = {}
+    finished = 0
+    log.info("🏟️ 共 %d 局，已完成 %d 局，待跑 %d 局 | 进程数 %d", len(tasks), len(tasks) - len(queue), len(queue), workers)
+
+    def retry_or_fail(task, result):
+        attempts[task["key"]] = attempts.get(task["key"], 0) + 1
+        if attempts[task["key"]] < max_attempts:
+            queue.append(task)
+        else:
+            log.error("⛔ %s 失败 %d 次，放弃: %s", task["key"], max_attempts, result.get("error"))
+            store.append(result)
+
+    while queue:
+        # spawn：工作进程不继承父进程的日志线程与连接；max_tasks_per_child 定期回收工作进程
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker, initargs=(log_level,),
+                                   max_tasks_per_child=games_per_worker)
+        running = {}
+        try:
+            while queue or running:
+                while queue and len(running) < workers:
+                    task = queue.popleft()
+                    running[pool.submit(play_game, task, options)] = task
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()    # 进程池崩溃时在这里抛出，该局仍留在 running 里重新排队
+                    task = running.pop(future)
+                    if result["status"] == "ok":
+                        store.append(result)
+                        finished += 1
+                        if finished % 10 == 0 or not (queue or running):
+                            log.info("📈 已完成 %d 局 (剩余 %d)", finished, len(queue) + len(running))
+                    else:
+                        log.warning("⚠️ %s 出错: %s", task["key"], result["error"])
+                        retry_or_fail(task, result)
+        except BrokenProcessPool:
+            log.error("💥 工作进程崩溃，重建进程池；%d 局在途对局重新排队", len(running))
+            for task in running.values():
+                retry_or_fail(task, {"key": task["key"], "a": task["a"]["name"], "b": task["b"]["name"],
+                                     "game": task["game"], "host": task["host"], "status": "error",
+                                     "error": "worker crashed"})
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+    return finished
+
+
+# ------------------------------------------
+# 汇总
+# ------------------------------------------
+
+def summarize(results, entrants):
+    """ 返回 ({(a, b): (局数, a 得分)}, {参赛者: (局数, 得分)})，只统计 status == "ok" 的对局 """
+    pairs, totals = {}, {e["name"]: (0, 0.0) for e in entrants}
+    for r in results:
+        if r["status"] != "ok":
+            continue
+        n, s = pairs.get((r["a"], r["b"]), (0, 0.0))
+        pairs[(r["a"], r["b"])] = (n + 1, s + r["score"])
+        for name, score in ((r["a"], r["score"]), (r["b"], 1 - r["score"])):
+            if name in totals:
+                n, s = totals[name]
+                totals[name] = (n + 1, s + score)
+    return pairs, totals
+
+
+def print_report(results, entrants):
+    pairs, totals = summarize(results, entrants)
+    names = [e["name"] for e in entrants]
+    width = max([len(n) for n in names] + [8])
+    print("\n🏆 对阵矩阵 (行方胜率 [95% 置信区间] / 局数)")
+    print(" " * width + " | " + " | ".join(f"{n[:18]:^26}" for n in names))
+    for a in names:
+        cells = []
+        for b in names:
+            if a == b:
+                cells.append(f"{'-':^26}")
+                continue
+            n, score = pairs.get((a, b), (0, 0.0))
+            if not n and (b, a) in pairs:
+                n, score = pairs[(b, a)]
+                score = n - score
+            lo, hi = wilson(score, n)
+            cells.append(f"{score / n if n else 0:6.1%} [{lo:5.1%},{hi:6.1%}] /{n:<3d}" if n else f"{'?':^26}")
+        print(f"{a:<{width}} | " + " | ".join(cells))
+    print("\n📊 总胜率")
+    for name, (n, score) in sorted(totals.items(), key=lambda kv: -(kv[1][1] / kv[1][0] if kv[1][0] else 0)):
+        lo, hi = wilson(score, n)
+        print(f"  {name:<{width}} {score / n if n else 0:6.1%}  [{lo:.1%}, {hi:.1%}]  ({n} 局)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="卡组自对弈评测：循环赛 + 进程池 + 可续跑")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--entrants", help="参赛者 JSON：[{name, deck, policy}, ...]")
+    source.add_argument("--fetch-decks", type=int, metavar="VERSION",
+                        help="从服务端拉取该 gameVersion 索引下的合法卡组 (GET /decks?requiredVersion=)")
+    parser.add_argument("--deck-limit", type=int, default=None, help="--fetch-decks 时最多取几套卡组")
+    parser.add_argument("--policies", default="greedy", help=f"--fetch-decks 时每套卡组搭配的策略，逗号分隔 {POLICIES}")
+    parser.add_argument("--games", type=int, default=10, help="每对参赛者的对局数 (房主座位轮换)")
+    parser.add_argument("--workers", type=int, default=None, help="进程数 (默认 CPU 核数)")
+    parser.add_argument("--games-per-worker", type=int, default=None, help="每个工作进程跑多少局后回收 (默认不回收)")
+    parser.add_argument("--max-attempts", type=int, default=3, help="单局最多尝试次数 (出错 / 工作进程崩溃)")
+    parser.add_argument("--game-timeout", type=float, default=900.0, help="单局超时 (秒)")
+    parser.add_argument("--out", default="selfplay.jsonl", help="结果文件 (JSONL，续跑时沿用)")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help="游戏服务端 (或 core/stub_server.py) API 地址")
+    parser.add_argument("--preset", default="2", help="房间规格序号 (见 main.py 的 ROOM_PRESETS)")
+    parser.add_argument("--llm-url", default="http://127.0.0.1:8081", help="llm 策略的推理服务地址")
+    parser.add_argument("--llm-model", default="local")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="调度器日志级别 (工作进程内的 Bot 日志只输出 ERROR)")
+    parser.add_argument("--report", action="store_true", help="只汇总已有结果，不跑对局")
+    args = parser.parse_args()
+    setup_logging(args.log_level)
+
+    if args.entrants:
+        with open(args.entrants, encoding="utf-8") as f:
+            entrants = json.load(f)
+        for entrant in entrants:
+            entrant.setdefault("policy", "greedy")
+    else:
+        policies = [p.strip() for p in args.policies.split(",") if p.strip()]
+        unknown = set(policies) - set(POLICIES)
+        if unknown:
+            parser.error(f"未知策略: {sorted(unknown)}")
+        entrants = make_entrants(fetch_decks(args.base_url, args.fetch_decks, args.deck_limit), policies)
+    if len(entrants) < 2:
+        parser.error("至少需要两名参赛者")
+
+    from main import ROOM_PRESETS
+    options = {
+        "base_url": args.base_url,
+        "room": ROOM_PRESETS.get(args.preset, ROOM_PRESETS["2"])["config"],
+        "game_timeout": args.game_timeout,
+        "llm_url": args.llm_url,
+        "llm_model": args.llm_model,
+    }
+    tasks = round_robin(entrants, args.games)
+    store = ResultStore(args.out)
+    try:
+        if not args.report:
+            run_tournament(tasks, store, options, workers=args.workers, max_attempts=args.max_attempts,
+                           games_per_worker=args.games_per_worker)
+    except KeyboardInterrupt:
+        log.warning("⏹️ 已中断，已完成的对局保存在 %s，再次运行即可续跑", args.out)
+    finally:
+        store.close()
+    keys = {task["key"] for task in tasks}
+    print_report([r for key, r in store.results.items() if key in keys], entrants)
+
+
+if __name__ == "__main__":
+    main()
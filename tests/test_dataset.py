@@ -0,0 +1,139 @@
+# tests/test_dataset.py
+# ==========================================
+# 录像 -> 训练样本：P1 视角的对局不能被镜像，Protobuf 录像与 JSON 录像编码结果一致，
+# 伤害清除的附着不能残留在特征里，胜负按本方玩家 id 计算；房间号复用时各局分开，manifest 随分片保存
+# 用法: python -m pytest -q tests
+# ==========================================
+import json
+
+import numpy as np
+import pytest
+from google.protobuf.json_format import MessageToDict
+
+from core import protos
+from core import dataset
+from core.dataset import (ARRAYS, CHARACTER_WIDTH, GLOBAL_WIDTH, PHASES, PLAYER_WIDTH, build_dataset, encode_game,
+                          load_dataset)
+from core.replay import ReplayReader, ReplayRecorder
+from core.state import AURA_TYPES
+
+action_pb2, mutation_pb2, notification_pb2, rpc_pb2, state_pb2 = protos.load(
+    "action_pb2", "mutation_pb2", "notification_pb2", "rpc_pb2", "state_pb2")
+
+GAME = "1000/2"     # 房间 1000，玩家 id 2 (加入者，坐在 P1)
+
+
+def p1_game():
+    """ 一局 P1 视角的短对局：[(事件类型, rpc id, 消息或 dict)] """
+    state = state_pb2.State(phase=state_pb2.PHASE_TYPE_ACTION, round_number=1, current_turn=1)
+    next_id = -1
+    for who in range(2):
+        player = state.player.add()
+        for c in range(3):
+            player.character.add(id=next_id, definition_id=1101 + 100 * c, health=10, max_health=10, max_energy=3)
+            next_id -= 1
+        player.active_character_id = player.character[0].id
+        # 对手 (P0) 的手牌定义 id 不可见
+        player.hand_card.add(id=-100 - who, definition_id=311301 if who == 1 else 0)
+    state.player[0].character[0].aura = AURA_TYPES["AURA_TYPE_CRYO"]
+    state.player[1].dice.extend([1, 1, 8])
+    events = [("notification", None, notification_pb2.Notification(state=state))]
+
+    # 打掉对手 3 点血并清除附着 (new_aura 为 0，proto3 JSON 会省略)
+    target = state.player[0].character[0]
+    damage = mutation_pb2.DamageEM(value=3, target_id=target.id, old_health=10, new_health=7)
+    target.health, target.aura = 7, 0
+    notification = notification_pb2.Notification(state=state)
+    notification.mutation.add(damage=damage)
+    events.append(("notification", None, notification))
+
+    skill = rpc_pb2.Action(use_skill=action_pb2.UseSkillAction(skill_definition_id=11011), auto_selected_dice=[1])
+    end = rpc_pb2.Action(declare_end=action_pb2.DeclareEndAction())
+    events.append(("rpc", 5, rpc_pb2.Request(action=rpc_pb2.ActionRequest(action=[skill, end]))))
+    events.append(("response", 5, {"action": {"chosenActionIndex": 0, "usedDice": [1]}}))
+    events.append(("gameEnd", None, {"winPlayerId": 2, "reason": "scripted"}))
+    return events
+
+
+def write_replay(path, binary, times=1):
+    with ReplayRecorder(str(path), background=False) as recorder:
+        for _ in range(times):
+            record_game(recorder, binary)
+
+
+def record_game(recorder, binary):
+    for evt_type, rpc_id, body in p1_game():
+        if binary and evt_type in ("notification", "rpc"):
+            payload = body.SerializeToString()
+        else:
+            data = MessageToDict(body) if hasattr(body, "DESCRIPTOR") else body
+            envelope = {"type": evt_type, "data": data}
+            if rpc_id is not None:
+                envelope["id"] = rpc_id
+            payload = json.dumps(envelope)
+        recorder.record(GAME, evt_type, rpc_id, payload, 1 if evt_type == "notification" else None)
+
+
+def encode(path):
+    with ReplayReader(str(path)) as reader:
+        return encode_game(reader, GAME)
+
+
+@pytest.mark.parametrize("binary", [True, False])
+def test_p1_replay_round_trip(tmp_path, binary):
+    path = tmp_path / "games.agcr"
+    write_replay(path, binary)
+    arrays, finished = encode(path)
+    assert finished
+    assert len(arrays["action"]) == 1
+    row = arrays["features"][0]
+    me, opp = GLOBAL_WIDTH, GLOBAL_WIDTH + PLAYER_WIDTH
+    assert row[PHASES + 1] == 1                     # 轮到 P1 (本方)
+    assert row[me] == 10                            # 本方出战角色满血
+    assert row[opp] == 7                            # 对手出战角色被打到 7
+    assert row[opp + 4] == 0                        # 伤害清除了冰附着
+    assert row[opp + CHARACTER_WIDTH] == 10
+    assert arrays["action"][0] == 0
+    assert arrays["outcome"][0] == 1                # winPlayerId 2 即本方
+    assert arrays["mask"][0][:2].tolist() == [True, True]
+
+
+def test_proto_and_json_replays_encode_identically(tmp_path):
+    write_replay(tmp_path / "proto.agcr", binary=True)
+    write_replay(tmp_path / "json.agcr", binary=False)
+    proto_arrays, _ = encode(tmp_path / "proto.agcr")
+    json_arrays, _ = encode(tmp_path / "json.agcr")
+    for name in ARRAYS:
+        assert np.array_equal(proto_arrays[name], json_arrays[name]), name
+
+
+def test_reused_room_ids_stay_separate_games(tmp_path):
+    path = tmp_path / "games.agcr"
+    write_replay(path, binary=True, times=2)    # 同一 "房间/玩家" 在一个文件里打了两局
+    with ReplayReader(str(path)) as reader:
+        runs = reader.runs(GAME)
+        assert len(runs) == 2
+        for start, _ in runs:
+            arrays, finished = encode_game(reader, GAME, start)
+            assert finished and len(arrays["action"]) == 1
+
+    out = tmp_path / "out"
+    assert build_dataset([str(path)], str(out), workers=1, shard_size=1) == (2, 2)
+    assert sum(len(shard["action"]) for shard in load_dataset(str(out))) == 2
+    assert build_dataset([str(path)], str(out), workers=1, shard_size=1) == (0, 0)
+
+
+def test_manifest_is_saved_after_each_shard(tmp_path, monkeypatch):
+    path = tmp_path / "games.agcr"
+    write_replay(path, binary=False, times=3)
+    saved = []
+    save = dataset._save_manifest
+
+    def spy(out_dir, manifest):
+        saved.append((len(manifest["shards"]), len(manifest["games"])))
+        save(out_dir, manifest)
+
+    monkeypatch.setattr(dataset, "_save_manifest", spy)
+    build_dataset([str(path)], str(tmp_path / "out"), workers=1, shard_size=2)
+    # 第一片 (两局) 写完就落盘 manifest，最后一局随收尾的分片保存
+    assert saved == [(1, 2), (2, 3)]
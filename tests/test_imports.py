@@ -0,0 +1,34 @@
+# tests/test_imports.py
+# ==========================================
+# 导入期预算与副作用 (测量方法见 benchmarks/bench_import.py)：
+# 每个模块在全新解释器里导入，中位耗时不超过预算；不改 sys.path、不打印、不提前加载重依赖。
+# 慢机器上可用环境变量 IMPORT_BUDGET_SCALE 放宽预算 (如 2.0)。
+# 用法: python -m pytest -q tests
+# ==========================================
+import os
+import statistics
+
+import pytest
+
+from benchmarks.bench_import import BUDGETS, probe
+
+SCALE = float(os.environ.get("IMPORT_BUDGET_SCALE", "1.0"))
+REPEAT = 3
+
+
+@pytest.mark.parametrize("module", sorted(BUDGETS))
+def test_import_budget_and_side_effects(module):
+    samples = [probe(module) for _ in range(REPEAT)]
+    first = samples[0]
+    assert not first["path_changed"], f"{module} 导入时修改了 sys.path"
+    assert not first["printed"], f"{module} 导入时打印了 {first['printed'][:60]!r}"
+    assert not first["loaded"], f"{module} 导入时加载了 {first['loaded']}"
+    ms = statistics.median(s["ms"] for s in samples)
+    assert ms <= BUDGETS[module] * SCALE, f"{module}: {ms:.1f} ms > 预算 {BUDGETS[module] * SCALE:.0f} ms"
+
+
+def test_llm_engine_imports_without_path_hacks():
+    # agent 本身就是决策路径 (会用到 numpy)，只检查不改 sys.path、不打印
+    sample = probe("llm_engine.agent")
+    assert not sample["path_changed"]
+    assert not sample["printed"]
@@ -0,0 +1,77 @@
+# tests/test_parser.py
+# ==========================================
+# StateStore 的附着表示：快照 / 伤害 / 附着变更 / 变量修改在两种线路格式下都落成同一种表示，
+# 校验不触发重同步，增量哈希与重新载入快照得到的哈希一致
+# 用法: python -m pytest -q tests
+# ==========================================
+import copy
+
+import pytest
+from google.protobuf.json_format import MessageToDict
+
+from core import protos, zobrist
+from core.codec import DecodedEvent
+from core.parser import StateStore
+from core.state import AURA_TYPES
+from core.serializer import proto_to_dict
+
+mutation_pb2, notification_pb2, state_pb2 = protos.load("mutation_pb2", "notification_pb2", "state_pb2")
+
+
+def two_player_state():
+    state = state_pb2.State(phase=state_pb2.PHASE_TYPE_ACTION, round_number=1)
+    next_id = -1
+    for who in range(2):
+        player = state.player.add()
+        for c in range(3):
+            player.character.add(id=next_id, definition_id=1101 + 100 * c, health=10, max_health=10)
+            next_id -= 1
+    return state
+
+
+def notifications():
+    """ 附着被变量修改加上，再被伤害清除，再被 ApplyAura 加上 """
+    state = two_player_state()
+    yield notification_pb2.Notification(state=state)
+    target = state.player[1].character[0]
+    target.aura = AURA_TYPES["AURA_TYPE_HYDRO"]
+    message = notification_pb2.Notification(state=state)
+    message.mutation.add(modify_entity_var=mutation_pb2.ModifyEntityVarEM(
+        entity_id=target.id, variable_name="aura", variable_value=AURA_TYPES["AURA_TYPE_HYDRO"]))
+    yield message
+    target.health, target.aura = 8, 0
+    message = notification_pb2.Notification(state=state)
+    message.mutation.add(damage=mutation_pb2.DamageEM(value=2, target_id=target.id, old_health=10, new_health=8))
+    yield message
+    target.aura = AURA_TYPES["AURA_TYPE_CRYO"]
+    message = notification_pb2.Notification(state=state)
+    message.mutation.add(apply_aura=mutation_pb2.ApplyAuraEM(target_id=target.id,
+                                                             new_aura=AURA_TYPES["AURA_TYPE_CRYO"]))
+    yield message
+
+
+@pytest.mark.parametrize("wire", ["json", "proto"])
+def test_aura_changes_stay_incremental(wire):
+    store = StateStore(verify=True)
+    for message in notifications():
+        if wire == "json":
+            event = DecodedEvent("notification", None, data=MessageToDict(message))
+        else:
+            event = DecodedEvent("notification", None, raw_body=message.SerializeToString())
+        store.apply_event(event)
+        fresh = StateStore()
+        fresh.apply_notification({"state": copy.deepcopy(proto_to_dict(message.state))})
+        assert store.hash == fresh.hash
+    assert store.resyncs == 1
+    assert store.state["player"][1]["character"][0]["aura"] == "AURA_TYPE_CRYO"
+
+
+def test_modified_aura_is_stored_as_enum_name():
+    store = StateStore()
+    messages = list(notifications())
+    store.apply_notification(MessageToDict(messages[0]))
+    store.apply_notification(MessageToDict(messages[1]))
+    char = store.state["player"][1]["character"][0]
+    assert char["aura"] == "AURA_TYPE_HYDRO"
+    assert store.resyncs == 1
+    assert zobrist.full_hash(store.state) == store.hash
@@ -0,0 +1,65 @@
+# tests/test_policy.py
+# ==========================================
+# 贪心策略：没有预览收益的调和 / 切人不应胜过宣布结束，有伤害预览的技能应当胜过
+# 用法: python -m pytest -q tests
+# ==========================================
+import pytest
+
+from core import protos
+from core.actions import ActionTable
+from core.policy import greedy_action
+from core.serializer import proto_to_dict
+from core.state import GameState
+
+action_pb2, mutation_pb2, rpc_pb2, state_pb2 = protos.load("action_pb2", "mutation_pb2", "rpc_pb2", "state_pb2")
+
+
+def sample_state():
+    state = state_pb2.State(phase=state_pb2.PHASE_TYPE_ACTION, round_number=1)
+    next_id = -1
+    for who in range(2):
+        player = state.player.add(status=state_pb2.PLAYER_STATUS_ACTING if who == 0 else 0)
+        for c in range(3):
+            player.character.add(id=next_id, definition_id=1101 + 100 * c, health=10, max_health=10, max_energy=3)
+            next_id -= 1
+        player.active_character_id = player.character[0].id
+        if who == 0:
+            player.dice.extend([1, 2, 3, 8])
+            player.hand_card.add(id=-100, definition_id=311301)
+    return state
+
+
+def table_of(*actions):
+    request = rpc_pb2.Request()
+    for action in actions:
+        request.action.action.append(action)
+    return ActionTable.from_dict(proto_to_dict(request))
+
+
+def one_die(**fields):
+    action = rpc_pb2.Action(**fields)
+    action.required_cost.add(type=8, count=1)
+    return action
+
+
+TUNING = one_die(elemental_tuning=action_pb2.ElementalTuningAction(removed_card_id=-100, target_dice=1),
+                 is_fast=True)
+SWITCH = one_die(switch_active=action_pb2.SwitchActiveAction(character_id=-2, character_definition_id=1201))
+END = rpc_pb2.Action(declare_end=action_pb2.DeclareEndAction())
+
+
+@pytest.mark.parametrize("actions", [(TUNING, END), (SWITCH, END), (TUNING, SWITCH, END)])
+def test_greedy_prefers_end_over_previewless_tuning_and_switch(actions):
+    state = GameState.from_dict(proto_to_dict(sample_state()))
+    index, _ = greedy_action(state, table_of(*actions), who=0)
+    assert index == len(actions) - 1
+
+
+def test_greedy_prefers_damaging_skill_over_end():
+    state_msg = sample_state()
+    target = state_msg.player[1].character[0]
+    skill = one_die(use_skill=action_pb2.UseSkillAction(skill_definition_id=11011))
+    skill.preview.add(damage=mutation_pb2.DamageEM(value=2, target_id=target.id, old_health=10, new_health=8))
+    state = GameState.from_dict(proto_to_dict(state_msg))
+    index, _ = greedy_action(state, table_of(TUNING, skill, END), who=0)
+    assert index == 1
@@ -0,0 +1,104 @@
+# tests/test_replay.py
+# ==========================================
+# 录像文件的崩溃容错：末尾残块在下次打开时被截掉，中间损坏的块被跳过，后续对局都能读到
+# 用法: python -m pytest -q tests
+# ==========================================
+import json
+
+import pytest
+
+from core.replay import MAGIC, ReplayReader, ReplayRecorder
+
+
+def record_game(recorder, game, rounds=3):
+    for r in range(1, rounds + 1):
+        data = {"state": {"roundNumber": r}}
+        recorder.record(game, "notification", None, json.dumps({"type": "notification", "data": data}), r)
+    recorder.record(game, "gameEnd", None, json.dumps({"type": "gameEnd", "data": {"winPlayerId": 1}}))
+
+
+def record_counts(path):
+    with ReplayReader(path) as reader:
+        return {game: sum(1 for _ in reader.records(game)) for game in reader.games()}, reader.truncated
+
+
+@pytest.mark.parametrize("background", [True, False])
+def test_round_trip(tmp_path, background):
+    path = tmp_path / "games.agcr"
+    with ReplayRecorder(str(path), background=background) as recorder:
+        record_game(recorder, "1000/1")
+        record_game(recorder, "1001/1", rounds=5)
+    counts, truncated = record_counts(path)
+    assert counts == {"1000/1": 4, "1001/1": 6}
+    assert not truncated
+    with ReplayReader(str(path)) as reader:
+        assert [r.event().data.get("state", {}).get("roundNumber") for r in reader.records("1001/1")][:5] == \
+            [1, 2, 3, 4, 5]
+
+
+def test_torn_tail_is_cut_before_appending(tmp_path):
+    path = tmp_path / "games.agcr"
+    with ReplayRecorder(str(path)) as recorder:
+        record_game(recorder, "1000/1")
+    good_size = path.stat().st_size
+    with open(path, "rb") as f:
+        f.seek(len(MAGIC))
+        torn = f.read(40)
+    with open(path, "ab") as f:
+        f.write(torn)    # 崩溃时只写出了块的前 40 字节
+
+    with ReplayRecorder(str(path)) as recorder:
+        assert recorder.repaired == 40
+        assert path.stat().st_size == good_size
+        record_game(recorder, "1001/1")
+    counts, truncated = record_counts(path)
+    assert counts == {"1000/1": 4, "1001/1": 4}
+    assert not truncated
+
+
+def test_torn_header_starts_a_new_file(tmp_path):
+    path = tmp_path / "games.agcr"
+    path.write_bytes(MAGIC[:3])
+    with ReplayRecorder(str(path)) as recorder:
+        record_game(recorder, "1000/1")
+    assert record_counts(path)[0] == {"1000/1": 4}
+
+
+def test_refuses_to_append_to_other_files(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("not a replay file")
+    with pytest.raises(ValueError):
+        ReplayRecorder(str(path))
+
+
+def test_reader_resyncs_after_damaged_chunk(tmp_path):
+    path = tmp_path / "games.agcr"
+    with ReplayRecorder(str(path), background=False) as recorder:
+        record_game(recorder, "1000/1", rounds=1)
+    first = path.read_bytes()
+    with ReplayRecorder(str(path), background=False) as recorder:
+        record_game(recorder, "1001/1")
+    data = bytearray(path.read_bytes())
+    # 把第二局第一个块的块头改坏：读取端要跳过它并在下一个块重新同步
+    data[len(first):len(first) + 4] = b"XXXX"
+    path.write_bytes(bytes(data))
+
+    counts, truncated = record_counts(path)
+    assert truncated
+    assert counts["1000/1"] == 2
+    assert 0 < counts["1001/1"] < 4
+
+
+def test_recording_proto_events_keeps_them_typed(tmp_path):
+    from core import protos
+    from core.codec import BinaryProtoCodec
+
+    notification_pb2, state_pb2 = protos.load("notification_pb2", "state_pb2")
+    message = notification_pb2.Notification(state=state_pb2.State(round_number=2))
+    raw = BinaryProtoCodec.encode("notification", message)
+    path = tmp_path / "games.agcr"
+    with ReplayRecorder(str(path), binary=True, background=False) as recorder:
+        event = recorder.wrap(BinaryProtoCodec(), "1000/1").decode(raw)
+        assert not event.has_dict
+    with ReplayReader(str(path)) as reader:
+        assert reader.rounds("1000/1") == [2]
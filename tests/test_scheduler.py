@@ -0,0 +1,60 @@
+# tests/test_scheduler.py
+# ==========================================
+# fallback_response 的每一种兜底答案都必须是合法的 rpc_pb2.Response (用 ParseDict 校验)
+# 用法: python -m pytest -q tests
+# ==========================================
+import pytest
+from google.protobuf.json_format import ParseDict
+
+from core import protos
+from core.scheduler import REQUEST_KINDS, fallback_response
+from core.serializer import proto_to_dict
+
+rpc_pb2 = protos.load("rpc_pb2")
+
+
+def action_request(*actions):
+    request = rpc_pb2.Request()
+    for fields in actions:
+        request.action.action.add(**fields)
+    return proto_to_dict(request)
+
+
+def parse(payload):
+    return ParseDict(payload["response"], rpc_pb2.Response())
+
+
+@pytest.mark.parametrize("kind", REQUEST_KINDS)
+def test_fallback_parses_without_request(kind):
+    response = parse(fallback_response(7, kind))
+    assert response.DESCRIPTOR.fields_by_name[response.WhichOneof("response")].json_name == kind
+
+
+def test_fallback_choose_active_takes_first_candidate():
+    request = proto_to_dict(rpc_pb2.Request(choose_active=rpc_pb2.ChooseActiveRequest(candidate_ids=[-3, -2])))
+    assert parse(fallback_response(1, "chooseActive", request)).choose_active.active_character_id == -3
+
+
+def test_fallback_select_card_takes_first_candidate():
+    request = proto_to_dict(rpc_pb2.Request(select_card=rpc_pb2.SelectCardRequest(candidate_definition_ids=[311308])))
+    assert parse(fallback_response(1, "selectCard", request)).select_card.selected_definition_id == 311308
+
+
+def test_fallback_action_declares_end():
+    request = action_request(
+        {"use_skill": {"skill_definition_id": 11011}, "auto_selected_dice": [1, 1]},
+        {"declare_end": {}},
+    )
+    action = parse(fallback_response(3, "action", request)).action
+    assert action.chosen_action_index == 1
+    assert list(action.used_dice) == []
+
+
+def test_fallback_action_without_end_uses_first_valid_action():
+    request = action_request(
+        {"use_skill": {"skill_definition_id": 11011}, "validity": 3},
+        {"switch_active": {"character_id": -2}, "auto_selected_dice": [8]},
+    )
+    action = parse(fallback_response(3, "action", request)).action
+    assert action.chosen_action_index == 1
+    assert list(action.used_dice) == [8]
@@ -0,0 +1,121 @@
+# tests/test_smartbot.py
+# ==========================================
+# SmartBot：置换表缓存的是候选身份 (候选排列不同也能映射回当前下标)；
+# rpc 按请求种类分派 (对局中途的 chooseActive 也走启发式)；推测任务使用开算时的输入快照
+# 用法: python -m pytest -q tests
+# ==========================================
+import asyncio
+
+from core import protos
+from core.serializer import proto_to_dict
+from main import SmartBot
+from tests.test_policy import END, sample_state, table_of
+
+action_pb2, mutation_pb2, rpc_pb2 = protos.load("action_pb2", "mutation_pb2", "rpc_pb2")
+
+
+def damaging_skill():
+    skill = rpc_pb2.Action(use_skill=action_pb2.UseSkillAction(skill_definition_id=11011), auto_selected_dice=[1])
+    skill.required_cost.add(type=8, count=1)
+    skill.preview.add(damage=mutation_pb2.DamageEM(value=2, target_id=-4, old_health=10, new_health=8))
+    return skill
+
+
+def invalid_card():
+    return rpc_pb2.Action(play_card=action_pb2.PlayCardAction(card_id=-100, card_definition_id=311301), validity=3)
+
+
+def test_transposition_hit_maps_back_to_current_index():
+    async def run():
+        bot = SmartBot(open_debug_link=False)
+        try:
+            bot.current_state = proto_to_dict(sample_state())
+            first = await bot.choose_action(1, table_of(damaging_skill(), invalid_card(), END))
+            assert first["response"]["action"]["chosenActionIndex"] == 0
+            # 同一局面、同样的合法候选，但不合法的卡排到了前面
+            second = await bot.choose_action(2, table_of(invalid_card(), damaging_skill(), END))
+            assert second["response"]["action"]["chosenActionIndex"] == 1
+            assert len(bot.decisions) == 1
+        finally:
+            await bot.aclose()
+
+    asyncio.run(run())
+
+
+def bot_with_outbox():
+    bot = SmartBot(open_debug_link=False)
+    sent = []
+
+    async def send_action(payload):
+        sent.append(payload)
+
+    bot.send_action = send_action
+    return bot, sent
+
+
+def receive(bot, rpc_id, request):
+    bot.last_rpc_id, bot.last_request, bot.last_rpc_at = rpc_id, request, bot.scheduler.clock()
+
+
+def mid_game_state(status):
+    """ 本方 (P0) 出战角色已倒下，两名替补分别剩 5 / 8 血 """
+    state = proto_to_dict(sample_state())
+    me = state["player"][0]
+    me["status"] = status
+    me["character"][0].update(health=0, defeated=True)
+    me["character"][1]["health"] = 5
+    me["character"][2]["health"] = 8
+    return state
+
+
+def test_mid_game_choose_active_uses_speculated_snapshot():
+    async def run():
+        bot, sent = bot_with_outbox()
+        try:
+            state = bot.current_state = mid_game_state("PLAYER_STATUS_CHOOSING_ACTIVE")
+            bot.speculate(state)
+            # 推测任务运行前局面字典被原地改写：推测结果仍按开算时的快照
+            state["player"][0]["character"][2]["health"] = 1
+            receive(bot, 9, {"chooseActive": {"candidateIds": [-2, -3]}})
+            await bot.try_action()
+            assert sent[0]["response"] == {"chooseActive": {"activeCharacterId": -3}}
+            assert bot.speculator.stats["hits"] == 1
+        finally:
+            await bot.aclose()
+
+    asyncio.run(run())
+
+
+def test_choose_active_stays_within_candidates():
+    async def run():
+        bot, sent = bot_with_outbox()
+        try:
+            bot.current_state = mid_game_state("PLAYER_STATUS_CHOOSING_ACTIVE")
+            receive(bot, 9, {"chooseActive": {"candidateIds": [-2]}})
+            await bot.try_action()
+            assert sent[0]["response"] == {"chooseActive": {"activeCharacterId": -2}}
+        finally:
+            await bot.aclose()
+
+    asyncio.run(run())
+
+
+def test_action_speculation_is_checked_against_arriving_table():
+    async def run():
+        bot, sent = bot_with_outbox()
+        try:
+            state = bot.current_state = proto_to_dict(sample_state())
+            bot.action_table = table_of(damaging_skill(), invalid_card(), END)
+            bot.speculate(state)
+            request = rpc_pb2.Request()
+            request.action.action.extend([invalid_card(), damaging_skill(), END])
+            receive(bot, 4, proto_to_dict(request))
+            await bot.try_action()
+            assert sent[0]["response"]["action"]["chosenActionIndex"] == 1
+            assert bot.speculator.stats["hits"] == 1
+            assert bot.executor.stats["submitted"] == 1     # 只有推测时评估过一次
+            assert len(bot.decisions) == 1
+        finally:
+            await bot.aclose()
+
+    asyncio.run(run())
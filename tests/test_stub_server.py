@@ -0,0 +1,62 @@
+# tests/test_stub_server.py
+# ==========================================
+# 桩服务器：脚本对局能被 StateStore 无重同步地跟上；actionResponse 按 rpc_pb2.Response 校验；
+# gameEnd 的 winPlayerId 是真实玩家 id
+# 用法: python -m pytest -q tests
+# ==========================================
+import asyncio
+
+from core.codec import JsonCodec
+from core.parser import StateStore
+from core.scheduler import fallback_response
+from core.stub_server import StubServer, scripted_game
+
+
+def test_scripted_game_needs_no_resync():
+    store = StateStore(verify=True)
+    for event in scripted_game(rounds=3):
+        if event.type == "notification":
+            store.apply_event(JsonCodec().decode(event.encode()))
+    # 只有第一条快照是整体载入，之后每一回合的骰子都由 resetDice 增量跟上
+    assert store.resyncs == 1
+
+
+def test_submit_validates_response():
+    async def run():
+        server = StubServer()
+        room = server.create_room({})
+        room.pending = (3, asyncio.get_running_loop().create_future())
+        room.rpc_sent_at = 0.0
+        bad = [
+            {"id": 3},
+            {"id": 3, "response": {}},
+            {"id": 3, "response": {"rerollDice": {"diceIndex": []}}},
+            {"id": 3, "response": {"decideActive": {"activeId": 1}}},
+        ]
+        for payload in bad:
+            assert server.submit(room, payload)[0] == 400
+        assert room.pending is not None
+        assert server.submit(room, fallback_response(3, "rerollDice"))[0] == 200
+        assert server.submit(room, fallback_response(3, "rerollDice"))[0] == 409
+
+    asyncio.run(run())
+
+
+def test_game_end_uses_real_player_ids():
+    server = StubServer()
+    host = server.create_room({})
+    guest = server.join_room(host.id)
+    end = scripted_game(rounds=1)[-1]
+    assert (host.player_id, guest.player_id) == (1, 2)
+    # 房主与加入者各有一份脚本，但收到同一个胜者
+    assert server._for_room(guest, end).data["winPlayerId"] == 1
+    assert server._for_room(host, end).data["winPlayerId"] == 1
+
+
+def test_winner_is_decided_once_per_room():
+    server = StubServer()
+    host = server.create_room({})
+    guest = server.join_room(host.id)
+    assert server._for_room(host, scripted_game(rounds=1, winner=1)[-1]).data["winPlayerId"] == 2
+    # 另一座位之后 (如超时) 到达的 gameEnd 不会改写已定的胜负
+    assert server._for_room(guest, scripted_game(rounds=1, winner=0)[-1]).data["winPlayerId"] == 2
@@ -0,0 +1,228 @@
+# web_ui/server.py
+import asyncio
+import json
+import mimetypes
+import os
+import threading
+
+from core.metrics import METRICS
+from core.spectate import FEED
+
+# ==========================================
+# 🖥️ 本地监控服务 (Dashboard Server)
+# 最小的 HTTP/1.1 服务，跑在独立线程自己的事件循环里，抓取与渲染不占用 Bot 的事件循环：
+#   GET /metrics        Prometheus 文本格式 (text/plain; version=0.0.4)
+#   GET /metrics.json   同一份指标的 JSON 视图 (含 events/s 与各直方图分位数)
+#   GET /feed           观战推送 (SSE)：所有 Bot 的局面 / 决策 / 终局，见 core/spectate.py
+#   GET /               templates/dashboard.html (static/script.js 定时拉取 /metrics.json)
+#   GET /static/<file>  静态资源
+# 有人抓取时才会打开 core/metrics.py 的计时埋点，idle_after 秒没人抓取后自动关闭；
+# 同理只有连着 /feed 的观众时 Bot 才会发布局面，编码与分发都在本线程里完成。
+# 用法:
+#   python main.py --bots 20 --metrics-port 9100
+#   curl http://127.0.0.1:9100/metrics
+# ==========================================
+
+WEB_ROOT = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(WEB_ROOT, "static")
+TEMPLATE = os.path.join(WEB_ROOT, "templates", "dashboard.html")
+PROMETHEUS_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+FEED_HEADER = (b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream; charset=utf-8\r\n"
+               b"Cache-Control: no-store\r\nConnection: close\r\n\r\n")
+
+REASONS = {200: "OK", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+class DashboardServer:
+    """
+    用法:
+        server = DashboardServer(port=9100).start_in_thread()
+        ...
+        server.stop_thread()
+    也可以在已有事件循环里 await server.start() / await server.close()。
+    """
+
+    def __init__(self, host="127.0.0.1", port=9100, metrics=METRICS, expire_interval=1.0,
+                 feed=FEED, feed_interval=0.1, feed_buffer=256, heartbeat=15.0):
+        self.host = host
+        self.port = port
+        self.metrics = metrics
+        self.expire_interval = expire_interval
+        # 观战推送：每 feed_interval 秒取空一次交接区；每位观众最多缓冲 feed_buffer 帧；
+        # 空闲时每 heartbeat 秒发一行 SSE 注释，顺带发现已断开的观众
+        self.feed = feed
+        self.feed_interval = feed_interval
+        self.feed_buffer = feed_buffer
+        self.heartbeat = heartbeat
+        self._server = None
+        self._expirer = None
+        self._pump = None
+        self._closing = False
+        self._streams = {}          # 观众 Subscriber -> 推送它的连接任务
+        self._loop = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        loop = asyncio.get_running_loop()
+        self._expirer = loop.create_task(self._expire())
+        self._pump = loop.create_task(self._pump_feed())
+        return self
+
+    async def close(self):
+        for task in (self._expirer, self._pump):
+            if task is not None:
+                task.cancel()
+        self._expirer = self._pump = None
+        # 让观战连接自己退出循环并关闭 (而不是取消连接任务)
+        self._closing = True
+        for subscriber in self._streams:
+            subscriber.wakeup.set()
+        await asyncio.gather(*self._streams.values(), return_exceptions=True)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _expire(self):
+        while True:
+            await asyncio.sleep(self.expire_interval)
+            self.metrics.expire()
+
+    async def _pump_feed(self):
+        while True:
+            await asyncio.sleep(self.feed_interval)
+            self.feed.pump()
+
+    # ---------- 独立线程 ----------
+
+    def start_in_thread(self):
+        """ 在后台守护线程里启动；端口占用等启动错误在调用线程里抛出 """
+        ready, failure = threading.Event(), []
+
+        def run():
+            loop = self._loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(self.start())
+            except Exception as e:
+                failure.append(e)
+                ready.set()
+                loop.close()
+                return
+            ready.set()
+            try:
+                loop.run_forever()
+            finally:
+                loop.run_until_complete(self.close())
+                loop.close()
+
+        self._thread = threading.Thread(target=run, name="dashboard-server", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if failure:
+            raise failure[0]
+        return self
+
+    def stop_thread(self, timeout=5.0):
+        if self._thread is not None and self._loop is not None and self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+        self._thread = None
+
+    # ---------- HTTP ----------
+
+    async def _serve(self, reader, writer):
+        try:
+            line = await reader.readline()
+            if not line:
+                return
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+            while True:
+                header = await reader.readline()
+                if header in (b"\r\n", b"\n", b""):
+                    break
+            path = target.partition("?")[0]
+            if method != "GET":
+                await self._send(writer, 405, "text/plain", b"method not allowed")
+            else:
+                await self._route(path, writer)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, path, writer):
+        if path == "/metrics":
+            await self._send(writer, 200, PROMETHEUS_TYPE, self.metrics.render_prometheus().encode())
+        elif path == "/metrics.json":
+            body = json.dumps(self.metrics.as_dict(), ensure_ascii=False, default=str).encode()
+            await self._send(writer, 200, "application/json", body)
+        elif path == "/feed":
+            await self._stream(writer)
+        elif path in ("/", "/dashboard"):
+            await self._file(writer, TEMPLATE)
+        elif path.startswith("/static/"):
+            name = os.path.basename(path[len("/static/"):])
+            await self._file(writer, os.path.join(STATIC_DIR, name))
+        else:
+            await self._send(writer, 404, "text/plain", b"not found")
+
+    async def _stream(self, writer):
+        """ 观战 SSE：把该观众缓冲里的帧 (已编码的共享 bytes) 拼起来写出，直到断开 """
+        subscriber = self.feed.subscribe(self.feed_buffer)
+        self._streams[subscriber] = asyncio.current_task()
+        try:
+            writer.write(FEED_HEADER)
+            while not self._closing:
+                try:
+                    await asyncio.wait_for(subscriber.wakeup.wait(), self.heartbeat)
+                    writer.write(b"".join(subscriber.take()))
+                except asyncio.TimeoutError:
+                    writer.write(b": ping\n\n")
+                await writer.drain()
+        finally:
+            self._streams.pop(subscriber, None)
+            self.feed.unsubscribe(subscriber)
+
+    async def _file(self, writer, path):
+        if not os.path.isfile(path):
+            await self._send(writer, 404, "text/plain", b"not found")
+            return
+        with open(path, "rb") as f:
+            body = f.read()
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type.endswith("javascript"):
+            content_type += "; charset=utf-8"
+        await self._send(writer, 200, content_type, body)
+
+    @staticmethod
+    async def _send(writer, status, content_type, body):
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nCache-Control: no-store\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="本地监控服务 (通常由 main.py --metrics-port 在进程内启动)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    args = parser.parse_args()
+
+    async def _main():
+        server = await DashboardServer(args.host, args.port).start()
+        print(f"📊 Dashboard listening on {server.url}  (/metrics, /metrics.json, /feed)")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(_main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,181 @@
+// web_ui/static/script.js
+// 每 2 秒拉取一次 /metrics.json 并刷新页面 (抓取本身会打开 Bot 端的计时埋点)；
+// 同时订阅 /feed 实时显示所有对局的局面与决策
+
+const POLL_MS = 2000;
+const HISTOGRAMS = {
+    agc_decode_seconds: "解码",
+    agc_decision_seconds: "决策",
+    agc_post_seconds: "POST",
+};
+const COUNTERS = ["agc_sse_events_total", "agc_sse_bytes_total", "agc_decisions_total", "agc_post_failures_total",
+                  "agc_feed_frames_total", "agc_feed_dropped_total", "agc_pipeline_reader_stalls_total",
+                  "agc_pipeline_coalesced_total"];
+
+function fmt(value, digits = 1) {
+    if (value === null || value === undefined) return "-";
+    if (typeof value !== "number") return String(value);
+    return value === Infinity ? "∞" : value.toFixed(digits);
+}
+
+function bytes(value) {
+    if (value === null || value === undefined) return "-";
+    const units = ["B", "KB", "MB", "GB"];
+    let i = 0;
+    while (value >= 1024 && i < units.length - 1) {
+        value /= 1024;
+        i += 1;
+    }
+    return `${value.toFixed(1)} ${units[i]}`;
+}
+
+function total(value) {
+    if (typeof value === "number") return value;
+    return Object.values(value || {}).reduce((a, b) => a + b, 0);
+}
+
+function row(cells) {
+    const tr = document.createElement("tr");
+    for (const cell of cells) {
+        const td = document.createElement("td");
+        td.textContent = cell;
+        tr.appendChild(td);
+    }
+    return tr;
+}
+
+function render(data) {
+    document.getElementById("events-per-sec").textContent = fmt(data.events_per_sec);
+    document.getElementById("games-in-flight").textContent = fmt(data.agc_games_in_flight, 0);
+    document.getElementById("rss-per-bot").textContent = bytes(data.agc_rss_per_bot_bytes);
+    document.getElementById("reconnects").textContent = fmt(data.agc_reconnects_total, 0);
+    document.getElementById("post-failures").textContent = fmt(total(data.agc_post_failures_total), 0);
+    document.getElementById("queue-depth").textContent =
+        `${fmt(data.agc_pipeline_raw_depth, 0)} / ${fmt(data.agc_pipeline_event_depth, 0)}`;
+
+    const histograms = document.getElementById("histograms");
+    histograms.replaceChildren();
+    for (const [name, title] of Object.entries(HISTOGRAMS)) {
+        for (const [label, s] of Object.entries(data[name] || {})) {
+            histograms.appendChild(row([title, label, s.count, fmt(s.mean_ms, 2), fmt(s.p50_ms, 2),
+                                        fmt(s.p95_ms, 2), fmt(s.p99_ms, 2)]));
+        }
+    }
+
+    const counters = document.getElementById("counters");
+    counters.replaceChildren();
+    for (const name of COUNTERS) {
+        const value = data[name];
+        if (typeof value === "number") {
+            counters.appendChild(row([name, "", value]));
+        } else {
+            for (const [label, v] of Object.entries(value || {})) counters.appendChild(row([name, label, v]));
+        }
+    }
+}
+
+async function poll() {
+    const status = document.getElementById("status");
+    try {
+        const resp = await fetch("/metrics.json", {cache: "no-store"});
+        render(await resp.json());
+        status.textContent = `更新于 ${new Date().toLocaleTimeString()}`;
+        status.className = "ok";
+    } catch (e) {
+        status.textContent = `连接失败: ${e}`;
+        status.className = "error";
+    }
+}
+
+poll();
+setInterval(poll, POLL_MS);
+
+// ---------- 观战推送 (/feed, SSE) ----------
+// 局面与决策分开到达，先合并进 games，再每帧最多重绘一次表格
+
+const FINISHED_KEEP_MS = 10000;
+const games = new Map();
+let redrawQueued = false;
+
+function game(id) {
+    if (!games.has(id)) games.set(id, {id, state: null, decision: "-", finished: false});
+    return games.get(id);
+}
+
+function hp(player) {
+    return player ? player.hp.join(" / ") : "-";
+}
+
+function decisionText(response) {
+    if (!response) return "-";
+    const [kind, body] = Object.entries(response)[0] || ["-", null];
+    const text = body ? JSON.stringify(body) : "";
+    return text.length > 60 ? `${kind} ${text.slice(0, 60)}…` : `${kind} ${text}`;
+}
+
+function redraw() {
+    redrawQueued = false;
+    const tbody = document.getElementById("games");
+    tbody.replaceChildren();
+    for (const g of [...games.values()].sort((a, b) => a.id.localeCompare(b.id))) {
+        const s = g.state;
+        const me = s ? s.players[s.viewer] : null;
+        const opp = s ? s.players[1 - s.viewer] : null;
+        const tr = row([
+            g.id,
+            s ? s.round : "-",
+            s ? s.phase : "-",
+            s ? s.turn : "-",
+            hp(me),
+            hp(opp),
+            me ? `${me.dice} / ${me.hand}` : "-",
+            g.finished ? `🏁 胜者 ${g.winner}` : g.decision,
+        ]);
+        tr.lastChild.className = "decision";
+        if (g.finished) tr.className = "finished";
+        tbody.appendChild(tr);
+    }
+}
+
+function queueRedraw() {
+    if (!redrawQueued) {
+        redrawQueued = true;
+        requestAnimationFrame(redraw);
+    }
+}
+
+function connectFeed() {
+    const status = document.getElementById("feed-status");
+    const source = new EventSource("/feed");
+    source.onopen = () => {
+        status.textContent = "已连接";
+        status.className = "ok";
+    };
+    source.onerror = () => {
+        status.textContent = "重连中...";
+        status.className = "error";
+    };
+    source.addEventListener("state", (e) => {
+        const s = JSON.parse(e.data);
+        game(s.game).state = s;
+        queueRedraw();
+    });
+    source.addEventListener("decision", (e) => {
+        const d = JSON.parse(e.data);
+        game(d.game).decision = `#${d.rpc} ${decisionText(d.response)}`;
+        queueRedraw();
+    });
+    source.addEventListener("end", (e) => {
+        const d = JSON.parse(e.data);
+        const g = game(d.game);
+        g.finished = true;
+        g.winner = d.winner;
+        setTimeout(() => {
+            games.delete(d.game);
+            queueRedraw();
+        }, FINISHED_KEEP_MS);
+        queueRedraw();
+    });
+}
+
+connectFeed();